@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import itertools
+import json
+import threading
+import time
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Optional, Union
+from urllib.parse import urlsplit
+
+from requests import RequestException, Response, Session
+from requests.structures import CaseInsensitiveDict
+
+#: Only headers API client relies on are recorded, cookies never are
+RECORDED_HEADERS = ('Content-Type', 'ETag', 'Retry-After')
+
+
+def request_key(url: str) -> str:
+    """
+    Recordings are keyed by request path, which identifies game, player
+    and window of a match history request regardless of API host.
+    """
+    parts = urlsplit(url)
+    return f'{parts.path}?{parts.query}' if parts.query else parts.path
+
+
+@dataclass(frozen=True)
+class Recording:
+    status_code: int
+    headers: dict[str, str]
+    content: bytes
+    #: Seconds the response took to arrive
+    latency: float
+
+
+class CassetteWriter:
+    """
+    Writes recorded responses into a zip archive, one compressed entry
+    per response. Archive is readable only once the writer is closed.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self._zip = zipfile.ZipFile(
+            path, 'w', compression=zipfile.ZIP_DEFLATED
+        )
+        self._lock = threading.Lock()
+        self._seq = itertools.count()
+
+    def record(self, key: str, recording: Recording) -> None:
+        with self._lock:
+            info = zipfile.ZipInfo(f'{next(self._seq):08d}')
+            info.compress_type = zipfile.ZIP_DEFLATED
+            info.comment = json.dumps(
+                {
+                    'key': key,
+                    'status_code': recording.status_code,
+                    'headers': recording.headers,
+                    'latency': recording.latency,
+                }
+            ).encode()
+            self._zip.writestr(info, recording.content)
+
+    def close(self) -> None:
+        with self._lock:
+            self._zip.close()
+
+    def __enter__(self) -> CassetteWriter:
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+class CassetteReader:
+    """
+    Plays responses of every key back in recorded order, the last one is
+    repeated once the key runs out of recordings.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self._zip = zipfile.ZipFile(path)
+        self._lock = threading.Lock()
+        self._entries: dict[str, list[zipfile.ZipInfo]] = {}
+        for info in self._zip.infolist():
+            key = json.loads(info.comment)['key']
+            self._entries.setdefault(key, []).append(info)
+        self._played: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._entries.values())
+
+    def play(self, key: str) -> Optional[Recording]:
+        entries = self._entries.get(key)
+        if not entries:
+            return None
+
+        with self._lock:
+            played = self._played.get(key, 0)
+            self._played[key] = played + 1
+            info = entries[min(played, len(entries) - 1)]
+            content = self._zip.read(info)
+
+        meta = json.loads(info.comment)
+        return Recording(
+            meta['status_code'], meta['headers'], content, meta['latency']
+        )
+
+    def close(self) -> None:
+        self._zip.close()
+
+    def __enter__(self) -> CassetteReader:
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+class RecordingSession:
+    """`requests.Session` proxy recording every received response."""
+
+    def __init__(self, session: Session, writer: CassetteWriter):
+        self._session = session
+        self._writer = writer
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._session, name)
+
+    def get(self, url: str, **kwargs: Any) -> Response:
+        started_at = time.perf_counter()
+        response = self._session.get(url, **kwargs)
+        self._writer.record(
+            request_key(url),
+            Recording(
+                response.status_code,
+                {
+                    name: response.headers[name]
+                    for name in RECORDED_HEADERS
+                    if name in response.headers
+                },
+                response.content,
+                time.perf_counter() - started_at,
+            ),
+        )
+        return response
+
+
+class ReplaySession:
+    """
+    `requests.Session` stand-in responding with recorded responses, an
+    unrecorded request fails as a transport error.
+    """
+
+    def __init__(
+        self,
+        reader: CassetteReader,
+        realtime: bool = False,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        """
+        :param realtime: wait for recorded latency before responding,
+            otherwise respond immediately
+        """
+        self._reader = reader
+        self._realtime = realtime
+        self._sleep = sleep
+        self.cookies: dict[str, str] = {}
+        self.headers: dict[str, str] = {}
+
+    def get(self, url: str, **kwargs: Any) -> Response:
+        recording = self._reader.play(request_key(url))
+        if recording is None:
+            raise RequestException(f'Response of {url!r} is not recorded')
+        if self._realtime:
+            self._sleep(recording.latency)
+
+        response = Response()
+        response.url = url
+        response.status_code = recording.status_code
+        response.headers = CaseInsensitiveDict(recording.headers)
+        response._content = recording.content
+        response._content_consumed = True
+        return response
+
+    def close(self) -> None:
+        pass
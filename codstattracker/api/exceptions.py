@@ -1,3 +1,6 @@
+from typing import Optional
+
+
 class FetchError(Exception):
     pass
 
@@ -8,3 +11,14 @@ class PlayerNotFoundError(FetchError):
 
 class UnrecoverableFetchError(Exception):
     pass
+
+
+class NotAuthenticatedError(UnrecoverableFetchError):
+    pass
+
+
+class RateLimitedError(FetchError):
+    def __init__(self, *args, retry_after: Optional[float] = None):
+        super().__init__(*args)
+        #: Delay requested by upstream before next request, seconds
+        self.retry_after = retry_after
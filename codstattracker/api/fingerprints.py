@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Mapping, NamedTuple, Optional
+
+
+class Fingerprint(NamedTuple):
+    etag: Optional[str]
+    digest: bytes
+
+
+def content_digest(content: bytes) -> bytes:
+    return hashlib.blake2b(content, digest_size=16).digest()
+
+
+class FingerprintCache:
+    """
+    Thread-safe LRU cache of response fingerprints per request, used to
+    tell an unchanged response without decoding it.
+
+    Upstream validator (ETag) is sent along with the next request when
+    known, otherwise content digests are compared.
+    """
+
+    def __init__(self, max_size: int = 10_000):
+        if max_size < 1:
+            raise ValueError('Cache must hold at least one fingerprint')
+
+        self._max_size = max_size
+        self._lock = threading.Lock()
+        self._fingerprints: OrderedDict[str, Fingerprint] = OrderedDict()
+
+    def _get(self, key: str) -> Optional[Fingerprint]:
+        with self._lock:
+            fingerprint = self._fingerprints.get(key)
+            if fingerprint is not None:
+                self._fingerprints.move_to_end(key)
+            return fingerprint
+
+    def request_headers(self, key: str) -> dict[str, str]:
+        """Conditional request headers of a request already responded."""
+        fingerprint = self._get(key)
+        if fingerprint is None or fingerprint.etag is None:
+            return {}
+        return {'If-None-Match': fingerprint.etag}
+
+    def is_unchanged(self, key: str, status: int, content: bytes) -> bool:
+        """
+        "Not Modified" response is unchanged only while the fingerprint
+        its request was validated with is still cached, otherwise it tells
+        nothing and the request must be repeated unconditionally.
+        """
+        fingerprint = self._get(key)
+        if fingerprint is None:
+            return False
+        return status == 304 or fingerprint.digest == content_digest(content)
+
+    def remember(
+        self, key: str, headers: Mapping[str, str], content: bytes
+    ) -> None:
+        """Must be called only once response is handled successfully."""
+        fingerprint = Fingerprint(headers.get('ETag'), content_digest(content))
+        with self._lock:
+            self._fingerprints[key] = fingerprint
+            self._fingerprints.move_to_end(key)
+            if len(self._fingerprints) > self._max_size:
+                self._fingerprints.popitem(last=False)
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional, Sequence
+from typing import Iterator, Optional, Sequence
 
 from codstattracker.api.models import Game, PlayerID, PlayerMatch
 
@@ -23,3 +23,55 @@ class PlayerAPI:
         :raises UnrecoverableFetchError:
         """
         raise NotImplementedError
+
+    def iter_recent_matches(
+        self,
+        game: Game,
+        player_id: PlayerID,
+        from_: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> Iterator[PlayerMatch]:
+        """
+        Same as `get_recent_matches`, but yields matches one by one, which
+        allows implementations to not hold the whole response in memory.
+
+        :raises FetchError:
+        :raises UnrecoverableFetchError:
+        """
+        return iter(self.get_recent_matches(game, player_id, from_, until))
+
+    def get_matches_played(self, game: Game, player_id: PlayerID) -> int:
+        """
+        Lifetime number of matches played by the player, which is much
+        cheaper to request than matches.
+
+        :raises FetchError:
+        :raises UnrecoverableFetchError:
+        """
+        raise NotImplementedError
+
+
+class AsyncPlayerAPI:
+    async def get_recent_matches(
+        self,
+        game: Game,
+        player_id: PlayerID,
+        from_: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> Sequence[PlayerMatch]:
+        """
+        Asyncio counterpart of `PlayerAPI.get_recent_matches`.
+
+        :raises FetchError:
+        :raises UnrecoverableFetchError:
+        """
+        raise NotImplementedError
+
+    async def get_matches_played(self, game: Game, player_id: PlayerID) -> int:
+        """
+        Asyncio counterpart of `PlayerAPI.get_matches_played`.
+
+        :raises FetchError:
+        :raises UnrecoverableFetchError:
+        """
+        raise NotImplementedError
@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+import json
+from typing import Any, Callable, Union
+
+Loads = Callable[[Union[bytes, str]], Any]
+
+
+def stdlib_loads(content: Union[bytes, str]) -> Any:
+    return json.loads(content)
+
+
+def _fastest_loads() -> Loads:
+    try:
+        import orjson
+    except ImportError:
+        return stdlib_loads
+    return orjson.loads
+
+
+#: Fastest available JSON decoder, `orjson` if "fast-json" extra is
+#: installed. Decoders must raise `ValueError` on malformed input.
+loads: Loads = _fastest_loads()
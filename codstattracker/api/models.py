@@ -5,7 +5,7 @@ from datetime import datetime, timedelta
 from enum import Enum
 from typing import Optional, Sequence
 
-from codstattracker.base_model import Model
+from codstattracker.base_model import Model, slotted
 
 
 class Game(str, Enum):
@@ -35,6 +35,7 @@ class PlayerID(Model, unsafe_hash=True):
         return f'{self.platform}:{self.nickname}#{self.id}'
 
 
+@slotted
 class MatchStats(Model):
     kills: int
     assists: int
@@ -56,6 +57,7 @@ class MatchStats(Model):
     average_speed: float
 
 
+@slotted
 class WeaponStats(Model):
     name: str
     hits: int
@@ -66,6 +68,7 @@ class WeaponStats(Model):
     headshots: int
 
 
+@slotted
 class BattleRoyaleStats(Model):
     teams_count: int
     players_count: int
@@ -1,10 +1,107 @@
-from requests import Session
+from concurrent.futures import Executor
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
 
-from codstattracker.api.interfaces import PlayerAPI
+from codstattracker.api.cassette import (
+    CassetteReader,
+    CassetteWriter,
+    RecordingSession,
+    ReplaySession,
+)
+from codstattracker.api.fingerprints import FingerprintCache
+from codstattracker.api.interfaces import AsyncPlayerAPI, PlayerAPI
 from codstattracker.api.mycallofduty.mw import PlayerAPI as _PlayerAPI
+from codstattracker.api.ratelimit import AdaptiveRateLimiter
+from codstattracker.api.transport import (
+    TransportOptions,
+    aiohttp_session_kwargs,
+    create_session,
+)
 
 
-def api_factory(act_sso_cookie: str, collect_meta: bool = False) -> PlayerAPI:
-    session = Session()
+def api_factory(
+    act_sso_cookie: str,
+    collect_meta: bool = False,
+    rate_limiter: Optional[AdaptiveRateLimiter] = None,
+    transport: TransportOptions = TransportOptions(),
+    fingerprint_cache: Optional[FingerprintCache] = None,
+    validate_every: int = 1,
+    recorder: Optional[CassetteWriter] = None,
+    parse_executor: Optional[Executor] = None,
+) -> PlayerAPI:
+    """
+    :param recorder: every received response is recorded into it
+    :param parse_executor: matches responses are parsed in it
+    """
+    session = create_session(transport)
     session.cookies.set('ACT_SSO_COOKIE', act_sso_cookie)
-    return _PlayerAPI(session, collect_source_info_data=collect_meta)
+    if recorder is not None:
+        session = RecordingSession(session, recorder)
+    return _PlayerAPI(
+        session,
+        collect_source_info_data=collect_meta,
+        rate_limiter=rate_limiter,
+        fingerprint_cache=fingerprint_cache,
+        validate_every=validate_every,
+        parse_executor=parse_executor,
+    )
+
+
+def replay_api_factory(
+    cassette: CassetteReader,
+    realtime: bool = False,
+    collect_meta: bool = False,
+    fingerprint_cache: Optional[FingerprintCache] = None,
+    validate_every: int = 1,
+    base_api_url: Optional[str] = None,
+    parse_executor: Optional[Executor] = None,
+) -> PlayerAPI:
+    """
+    API client responding with responses recorded by `api_factory`
+    recorder, my.callofduty.com is never requested.
+
+    :param base_api_url: must match API url responses were recorded from
+    """
+    return _PlayerAPI(
+        ReplaySession(cassette, realtime),  # type: ignore
+        base_api_url,
+        collect_source_info_data=collect_meta,
+        fingerprint_cache=fingerprint_cache,
+        validate_every=validate_every,
+        parse_executor=parse_executor,
+    )
+
+
+@asynccontextmanager
+async def async_api_factory(
+    act_sso_cookie: str,
+    collect_meta: bool = False,
+    max_connections: int = 100,
+    rate_limiter: Optional[AdaptiveRateLimiter] = None,
+    transport: TransportOptions = TransportOptions(),
+    fingerprint_cache: Optional[FingerprintCache] = None,
+    validate_every: int = 1,
+    parse_executor: Optional[Executor] = None,
+) -> AsyncIterator[AsyncPlayerAPI]:
+    """
+    Asyncio API client factory, requires `aiohttp` to be installed
+    (`async` extra). Session lives until context exits.
+    """
+    from aiohttp import ClientSession
+
+    from codstattracker.api.mycallofduty.mw_async import (
+        PlayerAPI as _AsyncPlayerAPI,
+    )
+
+    async with ClientSession(
+        cookies={'ACT_SSO_COOKIE': act_sso_cookie},
+        **aiohttp_session_kwargs(transport, max_connections),
+    ) as session:
+        yield _AsyncPlayerAPI(
+            session,
+            collect_source_info_data=collect_meta,
+            rate_limiter=rate_limiter,
+            fingerprint_cache=fingerprint_cache,
+            validate_every=validate_every,
+            parse_executor=parse_executor,
+        )
@@ -99,6 +99,26 @@ class TrackableMatchStats(PlayerMatch):
         return self._entity_source, self._entity_meta
 
 
+def _player_match_cls(
+    entity_source: Optional[dict[str, Any]],
+    entity_meta: Optional[dict[str, Any]],
+) -> tuple[type[PlayerMatch], dict[str, Any]]:
+    if entity_meta and entity_source:
+        return TrackableMatchStats, {
+            '_entity_source': entity_source,
+            '_entity_meta': entity_meta,
+        }
+    return PlayerMatch, {}
+
+
+def _utc_datetime(timestamp: int) -> datetime:
+    return datetime.utcfromtimestamp(timestamp).replace(tzinfo=timezone.utc)
+
+
+def _optional_int(value: Any) -> Optional[int]:
+    return None if value is None else int(value)
+
+
 def convert_api_resp_to_player_match(
     api_resp: MatchResponse,
     game: Game,
@@ -117,25 +137,12 @@ def convert_api_resp_to_player_match(
         br_stats = None
         is_win = api_resp.winning_team == api_resp.player.team
 
-    if entity_meta and entity_source:
-        cls = TrackableMatchStats
-        add_kwargs = {
-            '_entity_source': entity_source,
-            '_entity_meta': entity_meta,
-        }
-    else:
-        cls = PlayerMatch
-        add_kwargs = {}
-
+    cls, add_kwargs = _player_match_cls(entity_source, entity_meta)
     return cls(
         id=api_resp.match_id,
         game=game,
-        start=datetime.utcfromtimestamp(api_resp.utc_start_seconds).replace(
-            tzinfo=timezone.utc
-        ),
-        end=datetime.utcfromtimestamp(api_resp.utc_end_seconds).replace(
-            tzinfo=timezone.utc
-        ),
+        start=_utc_datetime(api_resp.utc_start_seconds),
+        end=_utc_datetime(api_resp.utc_end_seconds),
         map=api_resp.map,
         is_win=is_win,
         br_stats=br_stats,
@@ -172,3 +179,75 @@ def convert_api_resp_to_player_match(
         ],
         **add_kwargs,
     )
+
+
+def convert_raw_match_to_player_match(
+    raw: dict[str, Any],
+    game: Game,
+    entity_source: Optional[dict[str, Any]] = None,
+    entity_meta: Optional[dict[str, Any]] = None,
+) -> PlayerMatch:
+    """
+    Same as `convert_api_resp_to_player_match`, but reads decoded response
+    match directly, skipping `MatchResponse` validation. Raises `KeyError`,
+    `TypeError` or `ValueError` on malformed match, though doesn't catch
+    every schema violation `MatchResponse` would.
+    """
+    ps = raw['playerStats']
+    player = raw['player']
+    kills = int(ps['kills'])
+    deaths = int(ps['deaths'])
+    if raw['gameType'] == 'wz':
+        placement = int(ps.get('teamPlacement', -1))
+        br_stats = BattleRoyaleStats(
+            teams_count=_optional_int(raw.get('teamCount')),
+            players_count=_optional_int(raw.get('playerCount')),
+            placement=placement,
+        )
+        is_win = placement == 1
+    else:
+        br_stats = None
+        is_win = raw.get('winningTeam') == player['team']
+
+    cls, add_kwargs = _player_match_cls(entity_source, entity_meta)
+    return cls(
+        id=str(raw['matchID']),
+        game=game,
+        start=_utc_datetime(int(raw['utcStartSeconds'])),
+        end=_utc_datetime(int(raw['utcEndSeconds'])),
+        map=str(raw['map']),
+        is_win=is_win,
+        br_stats=br_stats,
+        stats=MatchStats(
+            kills=kills,
+            assists=int(ps['assists']),
+            deaths=deaths,
+            kd_ratio=kills / (deaths if deaths else 1),
+            killstreaks_used=list(player.get('killstreakUsage', {})),
+            longest_streak=int(ps['longestStreak']),
+            suicides=int(ps.get('suicides', 0)),
+            executions=int(ps['executions']),
+            damage_dealt=int(ps['damageDone']),
+            damage_received=int(ps['damageTaken']),
+            percent_time_moved=float(ps['percentTimeMoving']),
+            shots_fired=int(ps.get('shotsFired', 0)),
+            shots_missed=int(ps.get('shotsMissed', 0)),
+            headshots=int(ps['headshots']),
+            wall_bangs=int(ps['wallBangs']),
+            time_played=timedelta(seconds=int(ps['timePlayed'])),
+            distance_traveled=float(ps['distanceTraveled']),
+            average_speed=float(ps.get('averageSpeedDuringMatch', 0.0)),
+        ),
+        weapon_stats=[
+            WeaponStats(
+                name=weapon_name,
+                hits=int(weapon_stat['hits']),
+                kills=int(weapon_stat['kills']),
+                deaths=int(weapon_stat['deaths']),
+                shots=int(weapon_stat['shots']),
+                headshots=int(weapon_stat['headshots']),
+            )
+            for weapon_name, weapon_stat in raw.get('weaponStats', {}).items()
+        ],
+        **add_kwargs,
+    )
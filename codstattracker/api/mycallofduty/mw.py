@@ -1,31 +1,59 @@
 from __future__ import annotations
 
+import itertools
+import time
+from concurrent.futures import Executor
+from dataclasses import dataclass
 from datetime import datetime, timezone
-from json import JSONDecodeError
-from typing import TYPE_CHECKING, Any, Optional, Sequence
+from email.utils import parsedate_to_datetime
+from functools import partial
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Iterable,
+    Iterator,
+    Mapping,
+    Optional,
+    Sequence,
+)
 from urllib.parse import quote
 
 from pydantic import ValidationError
 from requests import RequestException, Response, Session
 
-from codstattracker import logging
+from codstattracker import logging, metrics
+from codstattracker.api import jsonlib
 from codstattracker.api.exceptions import (
     FetchError,
+    NotAuthenticatedError,
     PlayerNotFoundError,
+    RateLimitedError,
     UnrecoverableFetchError,
 )
+from codstattracker.api.fingerprints import FingerprintCache
 from codstattracker.api.interfaces import PlayerAPI as _PlayerAPI
 from codstattracker.api.models import Game, PlayerID, PlayerMatch
 from codstattracker.api.mycallofduty.models import (
     ErrorData,
     MatchesDataResponse,
+    MatchResponse,
     ResponseBody,
     convert_api_resp_to_player_match,
+    convert_raw_match_to_player_match,
 )
+from codstattracker.api.ratelimit import AdaptiveRateLimiter
+
+try:
+    import ijson
+except ImportError:  # "streaming" extra is not installed
+    ijson = None
 
 if TYPE_CHECKING:
     from loguru import Logger
 
+JSONEvent = tuple[str, str, Any]
+
 
 def _player_id_as_user_name(player_id: PlayerID) -> str:
     return quote(f'{player_id.nickname}#{player_id.id}')
@@ -35,7 +63,30 @@ def _datetime_as_utctimestamp(dt: datetime) -> int:
     return int(dt.astimezone(timezone.utc).timestamp())
 
 
-class PlayerAPI(_PlayerAPI):
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parses "Retry-After" header given either in seconds or as HTTP-date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class BasePlayerAPI:
+    """
+    Transport-agnostic part of my.callofduty.com API client: urls building
+    and response checking shared by sync and async implementations.
+    """
+
     API_HOST = 'https://my.callofduty.com'
     BASE_API_SUFFIX = '/api/papi-client/crm/cod/v2/title/mw'
     PROFILE_INFO_URL_PATTERN = '/platform/{pf}/gamer/{un}/profile/type/{gm}'
@@ -43,37 +94,120 @@ class PlayerAPI(_PlayerAPI):
         '/platform/{pf}/gamer/{un}/matches/'
         '{gm}/start/{start}/end/{end}/details'
     )
+    THROTTLING_STATUS_CODES = frozenset({429, 503})
+    #: Path of lifetime played matches counter in profile response data
+    MATCHES_PLAYED_PATHS = {
+        'mp': ('lifetime', 'all', 'properties', 'totalGamesPlayed'),
+        'wz': ('lifetime', 'mode', 'br_all', 'properties', 'gamesPlayed'),
+    }
 
     def __init__(
         self,
-        authorized_session: Session,
         base_api_url: Optional[str] = None,
         collect_source_info_data: bool = False,
         logger: Logger = logging.default,
+        rate_limiter: Optional[AdaptiveRateLimiter] = None,
+        fingerprint_cache: Optional[FingerprintCache] = None,
+        json_loads: Optional[jsonlib.Loads] = None,
+        validate_every: int = 1,
+        parse_executor: Optional[Executor] = None,
     ):
-        self._session = authorized_session
+        """
+        :param fingerprint_cache: responses unchanged since the previous
+            request of the same url are reported as no matches, without
+            decoding them
+        :param json_loads: JSON decoder, the fastest available by default
+        :param validate_every: every Nth matches response is validated
+            against the schema, the rest are converted without validation
+        :param parse_executor: matches responses are decoded, validated and
+            converted in it, a `ProcessPoolExecutor` spreads this CPU-bound
+            work over cores (`json_loads` must be picklable then)
+        """
+        if validate_every < 1:
+            raise ValueError('Validation interval must be positive')
+
         self._base_api_url = base_api_url or (
             self.API_HOST + self.BASE_API_SUFFIX
         )
         self._collect_source_info_data = collect_source_info_data
         self._logger = logger
+        self._rate_limiter = rate_limiter
+        self._fingerprint_cache = fingerprint_cache
+        self._json_loads = json_loads or jsonlib.loads
+        self._validate_every = validate_every
+        self._parsed_responses = itertools.count()
+        self._parse_executor = parse_executor
+
+    def _rate_limit_delay(self) -> float:
+        if self._rate_limiter is None:
+            return 0.0
+        return self._rate_limiter.reserve()
+
+    def _raise_if_throttled(
+        self, status_code: int, headers: Mapping[str, str]
+    ) -> None:
+        """
+        Reports response to rate limiter, raises `RateLimitedError` if
+        upstream throttled the request.
+        """
+        if status_code not in self.THROTTLING_STATUS_CODES:
+            if self._rate_limiter:
+                self._rate_limiter.on_success()
+            return
+
+        retry_after = _parse_retry_after(headers.get('Retry-After'))
+        if self._rate_limiter:
+            self._rate_limiter.on_throttled(retry_after)
+        raise RateLimitedError(
+            f'Request throttled with status code {status_code}',
+            retry_after=retry_after,
+        )
+
+    def _request_kwargs(self, url: str) -> dict[str, Any]:
+        if self._fingerprint_cache is None:
+            return {}
+        headers = self._fingerprint_cache.request_headers(url)
+        return {'headers': headers} if headers else {}
+
+    def _is_unchanged(
+        self, url: str, game: Game, status_code: int, content: bytes
+    ) -> bool:
+        if self._fingerprint_cache is None:
+            return False
+        if not self._fingerprint_cache.is_unchanged(url, status_code, content):
+            return False
+        metrics.UNCHANGED_RESPONSES.labels(game.value).inc()
+        return True
+
+    def _remember_fingerprint(
+        self, url: str, headers: Mapping[str, str], content: bytes
+    ) -> None:
+        if self._fingerprint_cache is not None:
+            self._fingerprint_cache.remember(url, headers, content)
 
     @staticmethod
-    def _raise_if_resp_error(response: Response) -> dict[str, Any]:
-        if response.status_code != 200:
+    def _raise_if_status_error(status_code: int) -> None:
+        if status_code != 200:
             raise UnrecoverableFetchError(
-                f'Unexpected status code {response.status_code}'
+                f'Unexpected status code {status_code}'
             )
 
+    def _loads_body(self, content: bytes) -> Any:
         try:
-            body = response.json()
-        except JSONDecodeError:
+            return self._json_loads(content)
+        except ValueError:
             raise UnrecoverableFetchError(
                 'API response is not a JSON, '
                 'make sure url or other params are valid'
             )
 
-        if body.get('status') != 'success':
+    def _decode_body(self, content: bytes) -> Any:
+        with metrics.JSON_DECODE_SECONDS.time():
+            return self._loads_body(content)
+
+    @staticmethod
+    def _raise_if_body_error(body: Any) -> dict[str, Any]:
+        if not isinstance(body, dict) or body.get('status') != 'success':
             try:
                 error = ResponseBody[ErrorData].parse_obj(body)
             except ValidationError:
@@ -82,7 +216,7 @@ class PlayerAPI(_PlayerAPI):
                 )
 
             if 'not authenticated ' in error.data.message:
-                raise UnrecoverableFetchError('Access not authorized', body)
+                raise NotAuthenticatedError('Access not authorized', body)
 
             player_not_found_err = 'user not found' in error.data.message
             if player_not_found_err:
@@ -91,23 +225,32 @@ class PlayerAPI(_PlayerAPI):
 
         return body
 
-    def get_recent_matches(
-        self,
-        game: Game,
-        player_id: PlayerID,
-        from_: Optional[datetime] = None,
-        until: Optional[datetime] = None,
-    ) -> Sequence[PlayerMatch]:
+    @staticmethod
+    def _check_game(game: Game) -> None:
         if game.name != 'mw':
             raise ValueError('Only Modern Warfare 2019 is supported now')
         if game.mode not in ('wz', 'mp'):
             raise ValueError('Unknown game mode given')
 
-        log = self._logger.bind(game=game, player_id=player_id)
+    def _profile_url(self, game: Game, player_id: PlayerID) -> str:
+        self._check_game(game)
+        return (self._base_api_url + self.PROFILE_INFO_URL_PATTERN).format(
+            pf=quote(player_id.platform),
+            un=_player_id_as_user_name(player_id),
+            gm=game.mode,
+        )
 
+    def _match_history_url(
+        self,
+        game: Game,
+        player_id: PlayerID,
+        from_: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> str:
+        self._check_game(game)
         start = _datetime_as_utctimestamp(from_) if from_ else 0
         end = _datetime_as_utctimestamp(until) if until else 0
-        url = (self._base_api_url + self.MATCH_HISTORY_URL_PATTERN).format(
+        return (self._base_api_url + self.MATCH_HISTORY_URL_PATTERN).format(
             pf=quote(player_id.platform),
             un=_player_id_as_user_name(player_id),
             gm=game.mode,
@@ -115,31 +258,354 @@ class PlayerAPI(_PlayerAPI):
             end=end,
         )
 
+    def _parse_matches_played(
+        self, body: dict[str, Any], game: Game, log: Logger
+    ) -> int:
+        value: Any = body.get('data')
+        try:
+            for name in self.MATCHES_PLAYED_PATHS[game.mode]:
+                value = value[name]
+            return int(value)
+        except (KeyError, TypeError, ValueError):
+            log.warning('Profile decode failed', body=body)
+            raise FetchError('Player profile decode error')
+
+    def _should_validate(self) -> bool:
+        return next(self._parsed_responses) % self._validate_every == 0
+
+    def _source_info(
+        self, raw_match: Any, meta: dict[str, Any]
+    ) -> tuple[Any, ...]:
+        """
+        Match source is its own slice of the response, while request meta
+        is shared by all matches of the response.
+        """
+        if not self._collect_source_info_data:
+            return ()
+        return raw_match, meta
+
+    def _parse_validated_matches(
+        self,
+        body: dict[str, Any],
+        game: Game,
+        meta: dict[str, Any],
+        log: Logger,
+    ) -> list[PlayerMatch]:
+        try:
+            parsed_data = ResponseBody[MatchesDataResponse].parse_obj(body)
+        except ValidationError:
+            log.warning('Info decode failed', body=body)
+            raise FetchError('Player info decode error')
+
+        return [
+            convert_api_resp_to_player_match(
+                match, game, *self._source_info(raw_match, meta)
+            )
+            for match, raw_match in zip(
+                parsed_data.data.matches, body['data']['matches']
+            )
+        ]
+
+    def _convert_match(
+        self,
+        raw_match: Any,
+        game: Game,
+        validate: bool,
+        meta: dict[str, Any],
+        log: Logger,
+    ) -> PlayerMatch:
+        source_info = self._source_info(raw_match, meta)
+        if not validate:
+            try:
+                return convert_raw_match_to_player_match(
+                    raw_match, game, *source_info
+                )
+            except (KeyError, TypeError, ValueError):
+                pass
+
+        try:
+            match = MatchResponse.parse_obj(raw_match)
+        except ValidationError:
+            log.warning('Info decode failed', body=raw_match)
+            raise FetchError('Player info decode error')
+        return convert_api_resp_to_player_match(match, game, *source_info)
+
+    def _convert_matches(
+        self,
+        body: dict[str, Any],
+        game: Game,
+        url: str,
+        validate: bool,
+        log: Logger,
+    ) -> list[PlayerMatch]:
+        meta = {'url': url}
+        if validate:
+            return self._parse_validated_matches(body, game, meta, log)
+
+        try:
+            return [
+                convert_raw_match_to_player_match(
+                    raw_match, game, *self._source_info(raw_match, meta)
+                )
+                for raw_match in body['data']['matches']
+            ]
+        except (KeyError, TypeError, ValueError):
+            # let validation tell what's wrong with the response
+            return self._parse_validated_matches(body, game, meta, log)
+
+    def _parse_matches(
+        self,
+        body: dict[str, Any],
+        game: Game,
+        url: str,
+        validate: bool,
+        log: Logger,
+    ) -> list[PlayerMatch]:
+        with metrics.PARSE_SECONDS.labels(game.value).time():
+            return self._convert_matches(body, game, url, validate, log)
+
+    def _matches_parser(
+        self, content: bytes, game: Game, url: str
+    ) -> Callable[[], ParsedMatches]:
+        """
+        Picklable call of `parse_matches_content` for matches response
+        `content`, to be run in parse executor.
+        """
+        return partial(
+            parse_matches_content,
+            content,
+            game,
+            url,
+            self._should_validate(),
+            self._collect_source_info_data,
+            self._json_loads,
+        )
+
+
+@dataclass(frozen=True)
+class ParsedMatches:
+    matches: list[PlayerMatch]
+    #: Timings are returned rather than recorded, metrics recorded in
+    #: a worker process never reach the registry of the polling one
+    decode_seconds: float
+    parse_seconds: float
+
+    def record_metrics(self, game: Game) -> None:
+        metrics.JSON_DECODE_SECONDS.observe(self.decode_seconds)
+        metrics.PARSE_SECONDS.labels(game.value).observe(self.parse_seconds)
+
+
+def parse_matches_content(
+    content: bytes,
+    game: Game,
+    url: str,
+    validate: bool,
+    collect_source_info_data: bool = False,
+    json_loads: Optional[jsonlib.Loads] = None,
+) -> ParsedMatches:
+    """
+    Decodes and checks matches response content and converts it into
+    matches. Depends on arguments only, so it may run in another process.
+    """
+    parser = BasePlayerAPI(
+        collect_source_info_data=collect_source_info_data,
+        json_loads=json_loads,
+    )
+    started = time.perf_counter()
+    body = parser._loads_body(content)
+    decoded = time.perf_counter()
+    body = parser._raise_if_body_error(body)
+    matches = parser._convert_matches(
+        body, game, url, validate, parser._logger
+    )
+    return ParsedMatches(
+        matches, decoded - started, time.perf_counter() - decoded
+    )
+
+
+class PlayerAPI(BasePlayerAPI, _PlayerAPI):
+    STREAM_CHUNK_SIZE = 64 * 1024
+
+    def __init__(
+        self,
+        authorized_session: Session,
+        base_api_url: Optional[str] = None,
+        collect_source_info_data: bool = False,
+        logger: Logger = logging.default,
+        rate_limiter: Optional[AdaptiveRateLimiter] = None,
+        fingerprint_cache: Optional[FingerprintCache] = None,
+        json_loads: Optional[jsonlib.Loads] = None,
+        validate_every: int = 1,
+        parse_executor: Optional[Executor] = None,
+    ):
+        super().__init__(
+            base_api_url,
+            collect_source_info_data,
+            logger,
+            rate_limiter,
+            fingerprint_cache,
+            json_loads,
+            validate_every,
+            parse_executor,
+        )
+        self._session = authorized_session
+
+    def _raise_if_resp_error(self, response: Response) -> dict[str, Any]:
+        self._raise_if_status_error(response.status_code)
+        return self._raise_if_body_error(self._decode_body(response.content))
+
+    def _parse_response(
+        self, response: Response, game: Game, url: str, log: Logger
+    ) -> list[PlayerMatch]:
+        try:
+            if self._parse_executor is not None:
+                self._raise_if_status_error(response.status_code)
+                parsed = self._parse_executor.submit(
+                    self._matches_parser(response.content, game, url)
+                ).result()
+                parsed.record_metrics(game)
+                return parsed.matches
+            body = self._raise_if_resp_error(response)
+        except FetchError:
+            log.warning('Error caused by content', content=response.content)
+            raise
+
+        return self._parse_matches(
+            body, game, url, self._should_validate(), log
+        )
+
+    def _send(
+        self, url: str, game: Game, log: Logger, **kwargs: Any
+    ) -> Response:
+        delay = self._rate_limit_delay()
+        if delay:
+            log.debug('Waiting for rate limit', delay=delay)
+            time.sleep(delay)
+
         log.debug('Requesting url', url=url)
         try:
-            response = self._session.get(url)
+            with metrics.API_REQUEST_SECONDS.labels(game.value).time():
+                response = self._session.get(url, **kwargs)
         except RequestException as exc:
             log.debug('Exception occurs', exc=exc)
             raise FetchError
 
+        try:
+            self._raise_if_throttled(response.status_code, response.headers)
+        except RateLimitedError as exc:
+            log.warning('Request throttled', retry_after=exc.retry_after)
+            raise
+        return response
+
+    def get_recent_matches(
+        self,
+        game: Game,
+        player_id: PlayerID,
+        from_: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> Sequence[PlayerMatch]:
+        url = self._match_history_url(game, player_id, from_, until)
+        log = self._logger.bind(game=game, player_id=player_id)
+        response = self._send(url, game, log, **self._request_kwargs(url))
+
+        if self._is_unchanged(
+            url, game, response.status_code, response.content
+        ):
+            log.debug('Response is unchanged since previous request')
+            return []
+        if response.status_code == 304:
+            log.debug('Fingerprint is evicted, repeating request')
+            response = self._send(url, game, log)
+
+        matches = self._parse_response(response, game, url, log)
+        self._remember_fingerprint(url, response.headers, response.content)
+        return matches
+
+    def get_matches_played(self, game: Game, player_id: PlayerID) -> int:
+        url = self._profile_url(game, player_id)
+        log = self._logger.bind(game=game, player_id=player_id)
+        response = self._send(url, game, log)
+
         try:
             body = self._raise_if_resp_error(response)
         except FetchError:
             log.warning('Error caused by content', content=response.content)
             raise
 
+        return self._parse_matches_played(body, game, log)
+
+    def iter_recent_matches(
+        self,
+        game: Game,
+        player_id: PlayerID,
+        from_: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> Iterator[PlayerMatch]:
+        """
+        Same as `get_recent_matches`, but decodes response while receiving
+        it and yields matches one by one, so only a single match is held
+        in memory. Requires `ijson` ("streaming" extra), the whole response
+        is decoded at once otherwise.
+
+        Fingerprint cache and parse executor are not used, errors may be
+        raised after some matches are yielded.
+        """
+        if ijson is None:
+            yield from self.get_recent_matches(game, player_id, from_, until)
+            return
+
+        url = self._match_history_url(game, player_id, from_, until)
+        log = self._logger.bind(game=game, player_id=player_id)
+        with self._send(url, game, log, stream=True) as response:
+            try:
+                self._raise_if_status_error(response.status_code)
+            except FetchError:
+                log.warning(
+                    'Error caused by content', content=response.content
+                )
+                raise
+
+            yield from self._iter_streamed_matches(
+                self._iter_json_events(response), game, url, log
+            )
+
+    def _iter_json_events(self, response: Response) -> Iterator[JSONEvent]:
+        events = ijson.sendable_list()
+        parser = ijson.parse_coro(events, use_float=True)
         try:
-            parsed_data = ResponseBody[MatchesDataResponse].parse_obj(body)
-        except ValidationError:
-            log.warning('Info decode failed', body=body)
-            raise FetchError('Player info decode error')
+            for chunk in response.iter_content(self.STREAM_CHUNK_SIZE):
+                parser.send(chunk)
+                yield from events
+                del events[:]
+            parser.close()
+            yield from events
+        except ijson.JSONError:
+            raise UnrecoverableFetchError(
+                'API response is not a JSON, '
+                'make sure url or other params are valid'
+            )
+        except RequestException:
+            raise FetchError
 
-        if self._collect_source_info_data:
-            add_args = (body, {'url': url})
+    def _iter_streamed_matches(
+        self, events: Iterable[JSONEvent], game: Game, url: str, log: Logger
+    ) -> Iterator[PlayerMatch]:
+        events = iter(events)
+        head = ijson.ObjectBuilder()
+        for prefix, event, value in events:
+            if prefix == 'data.matches' and event == 'start_array':
+                break
+            head.event(event, value)
         else:
-            add_args = ()
+            # Matches are absent, it's either an error or a broken response
+            body = self._raise_if_body_error(head.value)
+            yield from self._parse_matches(
+                body, game, url, self._should_validate(), log
+            )
+            return
 
-        return [
-            convert_api_resp_to_player_match(match, game, *add_args)
-            for match in parsed_data.data.matches
-        ]
+        self._raise_if_body_error(head.value)
+        validate = self._should_validate()
+        meta = {'url': url}
+        for raw_match in ijson.items(events, 'data.matches.item'):
+            yield self._convert_match(raw_match, game, validate, meta, log)
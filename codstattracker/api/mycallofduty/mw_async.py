@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import Executor
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Mapping, Optional, Sequence
+
+from aiohttp import ClientError, ClientSession
+from yarl import URL
+
+from codstattracker import logging, metrics
+from codstattracker.api import jsonlib
+from codstattracker.api.exceptions import FetchError, RateLimitedError
+from codstattracker.api.fingerprints import FingerprintCache
+from codstattracker.api.interfaces import AsyncPlayerAPI as _AsyncPlayerAPI
+from codstattracker.api.models import Game, PlayerID, PlayerMatch
+from codstattracker.api.mycallofduty.mw import BasePlayerAPI
+from codstattracker.api.ratelimit import AdaptiveRateLimiter
+
+if TYPE_CHECKING:
+    from loguru import Logger
+
+
+class PlayerAPI(BasePlayerAPI, _AsyncPlayerAPI):
+    def __init__(
+        self,
+        authorized_session: ClientSession,
+        base_api_url: Optional[str] = None,
+        collect_source_info_data: bool = False,
+        logger: Logger = logging.default,
+        rate_limiter: Optional[AdaptiveRateLimiter] = None,
+        fingerprint_cache: Optional[FingerprintCache] = None,
+        json_loads: Optional[jsonlib.Loads] = None,
+        validate_every: int = 1,
+        parse_executor: Optional[Executor] = None,
+    ):
+        super().__init__(
+            base_api_url,
+            collect_source_info_data,
+            logger,
+            rate_limiter,
+            fingerprint_cache,
+            json_loads,
+            validate_every,
+            parse_executor,
+        )
+        self._session = authorized_session
+
+    def _raise_if_resp_error(
+        self, status: int, content: bytes
+    ) -> dict[str, Any]:
+        self._raise_if_status_error(status)
+        return self._raise_if_body_error(self._decode_body(content))
+
+    async def _parse_response(
+        self, status: int, content: bytes, game: Game, url: str, log: Logger
+    ) -> list[PlayerMatch]:
+        try:
+            if self._parse_executor is not None:
+                self._raise_if_status_error(status)
+                parsed = await asyncio.get_running_loop().run_in_executor(
+                    self._parse_executor,
+                    self._matches_parser(content, game, url),
+                )
+                parsed.record_metrics(game)
+                return parsed.matches
+            body = self._raise_if_resp_error(status, content)
+        except FetchError:
+            log.warning('Error caused by content', content=content)
+            raise
+
+        return self._parse_matches(
+            body, game, url, self._should_validate(), log
+        )
+
+    async def _send(
+        self, url: str, game: Game, log: Logger, **kwargs: Any
+    ) -> tuple[int, Mapping[str, str], bytes]:
+        """Returns status code, headers and content of response."""
+        delay = self._rate_limit_delay()
+        if delay:
+            log.debug('Waiting for rate limit', delay=delay)
+            await asyncio.sleep(delay)
+
+        log.debug('Requesting url', url=url)
+        try:
+            with metrics.API_REQUEST_SECONDS.labels(game.value).time():
+                # Url is already quoted, prevent `aiohttp` from requoting it
+                async with self._session.get(
+                    URL(url, encoded=True), **kwargs
+                ) as response:
+                    content = await response.read()
+        except (ClientError, asyncio.TimeoutError) as exc:
+            log.debug('Exception occurs', exc=exc)
+            raise FetchError
+
+        try:
+            self._raise_if_throttled(response.status, response.headers)
+        except RateLimitedError as exc:
+            log.warning('Request throttled', retry_after=exc.retry_after)
+            raise
+        return response.status, response.headers, content
+
+    async def get_recent_matches(
+        self,
+        game: Game,
+        player_id: PlayerID,
+        from_: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> Sequence[PlayerMatch]:
+        url = self._match_history_url(game, player_id, from_, until)
+        log = self._logger.bind(game=game, player_id=player_id)
+        status, headers, content = await self._send(
+            url, game, log, **self._request_kwargs(url)
+        )
+
+        if self._is_unchanged(url, game, status, content):
+            log.debug('Response is unchanged since previous request')
+            return []
+        if status == 304:
+            log.debug('Fingerprint is evicted, repeating request')
+            status, headers, content = await self._send(url, game, log)
+
+        matches = await self._parse_response(status, content, game, url, log)
+        self._remember_fingerprint(url, headers, content)
+        return matches
+
+    async def get_matches_played(self, game: Game, player_id: PlayerID) -> int:
+        url = self._profile_url(game, player_id)
+        log = self._logger.bind(game=game, player_id=player_id)
+        status, _, content = await self._send(url, game, log)
+
+        try:
+            body = self._raise_if_resp_error(status, content)
+        except FetchError:
+            log.warning('Error caused by content', content=content)
+            raise
+
+        return self._parse_matches_played(body, game, log)
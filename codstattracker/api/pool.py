@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Awaitable,
+    Callable,
+    Generic,
+    Iterator,
+    Optional,
+    Sequence,
+    TypeVar,
+)
+
+from codstattracker import logging, metrics
+from codstattracker.api.exceptions import NotAuthenticatedError
+from codstattracker.api.interfaces import AsyncPlayerAPI, PlayerAPI
+from codstattracker.api.models import Game, PlayerID, PlayerMatch
+
+if TYPE_CHECKING:
+    from loguru import Logger
+
+_API = TypeVar('_API')
+_T = TypeVar('_T')
+
+
+@dataclass(eq=False)
+class _Credential(Generic[_API]):
+    #: Position of credential in pool, cookie values are never logged
+    index: int
+    api: _API
+    in_flight: int = 0
+    sent: int = 0
+
+
+class _BaseCredentialPool(Generic[_API]):
+    """
+    Routes every request to the credential with the fewest requests in
+    flight, ties go to the one which sent fewer requests. Requests waiting
+    for rate limit of their credential are counted as in flight, so a
+    throttled credential gets less traffic.
+
+    A credential rejected as not authenticated is evicted and the request
+    is retried with another one, `NotAuthenticatedError` is raised only
+    once the pool runs out of credentials.
+    """
+
+    def __init__(self, apis: Sequence[_API], logger: Logger = logging.default):
+        if not apis:
+            raise ValueError('Pool must hold at least one credential')
+
+        self._logger = logger
+        self._lock = threading.Lock()
+        self._credentials = [
+            _Credential(index, api) for index, api in enumerate(apis)
+        ]
+        metrics.API_CREDENTIALS.set(len(self._credentials))
+
+    def __len__(self) -> int:
+        return len(self._credentials)
+
+    def _acquire(self) -> _Credential[_API]:
+        with self._lock:
+            if not self._credentials:
+                raise NotAuthenticatedError('Every credential is evicted')
+            credential = min(
+                self._credentials, key=lambda c: (c.in_flight, c.sent)
+            )
+            credential.in_flight += 1
+            credential.sent += 1
+            return credential
+
+    def _release(self, credential: _Credential[_API]) -> None:
+        with self._lock:
+            credential.in_flight -= 1
+
+    def _evict(
+        self, credential: _Credential[_API], exc: NotAuthenticatedError
+    ) -> None:
+        with self._lock:
+            if credential not in self._credentials:
+                return
+            self._credentials.remove(credential)
+            left = len(self._credentials)
+        metrics.API_CREDENTIALS.set(left)
+        self._logger.warning(
+            'Credential is not authenticated, evicting it from pool',
+            credential=credential.index,
+            credentials_left=left,
+            exc=exc,
+        )
+
+
+class CredentialPool(_BaseCredentialPool[PlayerAPI], PlayerAPI):
+    """Thread-safe `PlayerAPI` spreading requests among credentials."""
+
+    def _call(self, func: Callable[[PlayerAPI], _T]) -> _T:
+        while True:
+            credential = self._acquire()
+            try:
+                return func(credential.api)
+            except NotAuthenticatedError as exc:
+                self._evict(credential, exc)
+            finally:
+                self._release(credential)
+
+    def get_recent_matches(
+        self,
+        game: Game,
+        player_id: PlayerID,
+        from_: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> Sequence[PlayerMatch]:
+        return self._call(
+            lambda api: api.get_recent_matches(game, player_id, from_, until)
+        )
+
+    def iter_recent_matches(
+        self,
+        game: Game,
+        player_id: PlayerID,
+        from_: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> Iterator[PlayerMatch]:
+        """
+        Request is retried with another credential only if nothing has
+        been yielded yet.
+        """
+        while True:
+            credential = self._acquire()
+            yielded = False
+            try:
+                for match in credential.api.iter_recent_matches(
+                    game, player_id, from_, until
+                ):
+                    yielded = True
+                    yield match
+                return
+            except NotAuthenticatedError as exc:
+                self._evict(credential, exc)
+                if yielded:
+                    raise
+            finally:
+                self._release(credential)
+
+    def get_matches_played(self, game: Game, player_id: PlayerID) -> int:
+        return self._call(lambda api: api.get_matches_played(game, player_id))
+
+
+class AsyncCredentialPool(_BaseCredentialPool[AsyncPlayerAPI], AsyncPlayerAPI):
+    """Asyncio counterpart of `CredentialPool`."""
+
+    async def _call(
+        self, func: Callable[[AsyncPlayerAPI], Awaitable[Any]]
+    ) -> Any:
+        while True:
+            credential = self._acquire()
+            try:
+                return await func(credential.api)
+            except NotAuthenticatedError as exc:
+                self._evict(credential, exc)
+            finally:
+                self._release(credential)
+
+    async def get_recent_matches(
+        self,
+        game: Game,
+        player_id: PlayerID,
+        from_: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> Sequence[PlayerMatch]:
+        return await self._call(
+            lambda api: api.get_recent_matches(game, player_id, from_, until)
+        )
+
+    async def get_matches_played(self, game: Game, player_id: PlayerID) -> int:
+        return await self._call(
+            lambda api: api.get_matches_played(game, player_id)
+        )
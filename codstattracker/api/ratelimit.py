@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Callable, Optional
+
+
+class AdaptiveRateLimiter:
+    """
+    Thread-safe token bucket which adapts its rate to upstream throttling.
+
+    Rate is multiplied by `decrease_factor` on every throttled response and
+    grows back by `increase_step` after every successful one, staying within
+    `[min_rate, max_rate]` (a tenth of initial rate and initial rate itself
+    by default). Callers reserve a token before each request and
+    wait for the returned delay themselves, so the limiter is usable from
+    both threads and asyncio.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int = 1,
+        min_rate: Optional[float] = None,
+        max_rate: Optional[float] = None,
+        decrease_factor: float = 0.5,
+        increase_step: float = 0.05,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        min_rate = rate / 10 if min_rate is None else min_rate
+        max_rate = rate if max_rate is None else max_rate
+        if not 0 < min_rate <= rate <= max_rate:
+            raise ValueError('Rates must satisfy 0 < min <= rate <= max')
+        if burst < 1:
+            raise ValueError('Burst must allow at least one request')
+        if not 0 < decrease_factor < 1:
+            raise ValueError('Decrease factor must be in (0, 1) range')
+
+        self._rate = rate
+        self._burst = burst
+        self._min_rate = min_rate
+        self._max_rate = max_rate
+        self._decrease_factor = decrease_factor
+        self._increase_step = increase_step
+        self._clock = clock
+
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        self._updated_at = clock()
+        self._blocked_until = 0.0
+
+    @property
+    def rate(self) -> float:
+        """Current rate, requests per second."""
+        return self._rate
+
+    def _refill(self, now: float) -> None:
+        elapsed = max(0.0, now - self._updated_at)
+        self._tokens = min(self._burst, self._tokens + elapsed * self._rate)
+        self._updated_at = now
+
+    def reserve(self) -> float:
+        """
+        Reserve a token for a single request, returns delay in seconds
+        the caller must wait before sending it.
+        """
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            # Tokens may go negative, it is a queue of already reserved
+            # requests waiting for refill
+            self._tokens -= 1
+            delay = -self._tokens / self._rate if self._tokens < 0 else 0.0
+            return max(delay, self._blocked_until - now)
+
+    def on_success(self) -> None:
+        with self._lock:
+            self._refill(self._clock())
+            self._rate = min(self._max_rate, self._rate + self._increase_step)
+
+    def on_throttled(self, retry_after: Optional[float] = None) -> None:
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            self._rate = max(
+                self._min_rate, self._rate * self._decrease_factor
+            )
+            if retry_after:
+                self._blocked_until = max(
+                    self._blocked_until, now + retry_after
+                )
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from datetime import datetime
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Hashable,
+    Iterator,
+    Optional,
+    Sequence,
+)
+
+from codstattracker.api.interfaces import AsyncPlayerAPI, PlayerAPI
+from codstattracker.api.models import Game, PlayerID, PlayerMatch
+
+
+class SingleFlightPlayerAPI(PlayerAPI):
+    """
+    Thread-safe `PlayerAPI` wrapper merging identical concurrent requests:
+    callers requesting what is already in flight wait for and share its
+    result or error instead of requesting it again.
+    """
+
+    def __init__(self, api: PlayerAPI):
+        self._api = api
+        self._lock = threading.Lock()
+        self._in_flight: dict[Hashable, Future] = {}
+
+    def _call(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        with self._lock:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if future is None:
+                future = self._in_flight[key] = Future()
+
+        if not leader:
+            return future.result()
+
+        try:
+            future.set_result(func())
+        except BaseException as exc:
+            future.set_exception(exc)
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+        return future.result()
+
+    def get_recent_matches(
+        self,
+        game: Game,
+        player_id: PlayerID,
+        from_: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> Sequence[PlayerMatch]:
+        return self._call(
+            ('matches', game, player_id, from_, until),
+            lambda: self._api.get_recent_matches(
+                game, player_id, from_, until
+            ),
+        )
+
+    def iter_recent_matches(
+        self,
+        game: Game,
+        player_id: PlayerID,
+        from_: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> Iterator[PlayerMatch]:
+        # Iterators can't be shared, so streamed requests are not merged
+        return self._api.iter_recent_matches(game, player_id, from_, until)
+
+    def get_matches_played(self, game: Game, player_id: PlayerID) -> int:
+        return self._call(
+            ('matches_played', game, player_id),
+            lambda: self._api.get_matches_played(game, player_id),
+        )
+
+
+class AsyncSingleFlightPlayerAPI(AsyncPlayerAPI):
+    """Asyncio counterpart of `SingleFlightPlayerAPI`."""
+
+    def __init__(self, api: AsyncPlayerAPI):
+        self._api = api
+        self._in_flight: dict[Hashable, asyncio.Future] = {}
+
+    async def _call(
+        self, key: Hashable, func: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        future = self._in_flight.get(key)
+        if future is None:
+            future = self._in_flight[key] = asyncio.ensure_future(func())
+            future.add_done_callback(lambda _: self._in_flight.pop(key))
+        # A cancelled waiter must not cancel the request of others
+        return await asyncio.shield(future)
+
+    async def get_recent_matches(
+        self,
+        game: Game,
+        player_id: PlayerID,
+        from_: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> Sequence[PlayerMatch]:
+        return await self._call(
+            ('matches', game, player_id, from_, until),
+            lambda: self._api.get_recent_matches(
+                game, player_id, from_, until
+            ),
+        )
+
+    async def get_matches_played(self, game: Game, player_id: PlayerID) -> int:
+        return await self._call(
+            ('matches_played', game, player_id),
+            lambda: self._api.get_matches_played(game, player_id),
+        )
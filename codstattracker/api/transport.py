@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Iterator,
+    Mapping,
+    Optional,
+    Sequence,
+    Union,
+)
+
+from requests import PreparedRequest, RequestException, Response, Session
+from requests.adapters import HTTPAdapter
+
+if TYPE_CHECKING:
+    import httpx
+
+
+@dataclass(frozen=True)
+class TransportOptions:
+    #: Max number of kept connections per host
+    pool_size: int = 10
+    #: Reuse connections between requests
+    keep_alive: bool = True
+    #: Seconds to establish connection, `None` waits forever
+    connect_timeout: Optional[float] = 5.0
+    #: Seconds to wait for response data, `None` waits forever
+    read_timeout: Optional[float] = 30.0
+    #: Accepted response content codings
+    accept_encoding: Sequence[str] = ('gzip', 'deflate')
+    #: Negotiate HTTP/2, `httpx` is required then
+    http2: bool = False
+
+    def __post_init__(self) -> None:
+        if self.pool_size < 1:
+            raise ValueError('Pool must hold at least one connection')
+        if 'br' in self.accept_encoding:
+            try:
+                import brotli  # noqa: F401
+            except ImportError:
+                raise ValueError('"br" encoding requires brotli package')
+
+    @property
+    def headers(self) -> dict[str, str]:
+        headers = {'Accept-Encoding': ', '.join(self.accept_encoding)}
+        if not self.keep_alive:
+            headers['Connection'] = 'close'
+        return headers
+
+
+class _TimeoutHTTPAdapter(HTTPAdapter):
+    """Applies default timeout to requests sent without explicit one."""
+
+    def __init__(self, timeout: tuple[Optional[float], ...], **kwargs: Any):
+        self._timeout = timeout
+        super().__init__(**kwargs)
+
+    def send(self, request: PreparedRequest, **kwargs: Any) -> Response:
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self._timeout
+        return super().send(request, **kwargs)
+
+
+class HTTP2Session:
+    """
+    Minimal `requests.Session` stand-in over `httpx` client, exposes just
+    what `PlayerAPI` uses and reraises transport errors as
+    `requests.RequestException`.
+    """
+
+    def __init__(self, client: httpx.Client):
+        self._client = client
+        self.cookies = client.cookies
+        self.headers = client.headers
+
+    def get(
+        self, url: str, stream: bool = False, **kwargs: Any
+    ) -> Union[httpx.Response, HTTP2StreamedResponse]:
+        """
+        :param stream: do not read response body, it is received through
+            `iter_content` of returned response then
+        """
+        import httpx
+
+        try:
+            if stream:
+                request = self._client.build_request('GET', url, **kwargs)
+                return HTTP2StreamedResponse(
+                    self._client.send(request, stream=True)
+                )
+            return self._client.get(url, **kwargs)
+        except httpx.HTTPError as exc:
+            raise RequestException(str(exc)) from exc
+
+    def close(self) -> None:
+        self._client.close()
+
+
+class HTTP2StreamedResponse:
+    """
+    Streamed `httpx` response exposing what `PlayerAPI` uses of streamed
+    `requests.Response`, must be closed once handled.
+    """
+
+    def __init__(self, response: httpx.Response):
+        self._response = response
+
+    @property
+    def status_code(self) -> int:
+        return self._response.status_code
+
+    @property
+    def headers(self) -> Mapping[str, str]:
+        return self._response.headers
+
+    @property
+    def content(self) -> bytes:
+        return self._response.read()
+
+    def iter_content(
+        self, chunk_size: Optional[int] = None
+    ) -> Iterator[bytes]:
+        """Chunks are sized as received, `chunk_size` is ignored."""
+        import httpx
+
+        try:
+            for chunk in self._response.iter_bytes():
+                # Unlike `requests`, `httpx` may yield empty chunks, which
+                # incremental decoders take as the end of data
+                if chunk:
+                    yield chunk
+        except httpx.HTTPError as exc:
+            raise RequestException(str(exc)) from exc
+
+    def close(self) -> None:
+        self._response.close()
+
+    def __enter__(self) -> HTTP2StreamedResponse:
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+def create_session(options: TransportOptions) -> Session:
+    if options.http2:
+        return _create_http2_session(options)
+
+    session = Session()
+    adapter = _TimeoutHTTPAdapter(
+        (options.connect_timeout, options.read_timeout),
+        pool_connections=1,
+        pool_maxsize=options.pool_size,
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update(options.headers)
+    return session
+
+
+def _create_http2_session(options: TransportOptions) -> Any:
+    try:
+        import httpx
+    except ImportError:
+        raise ValueError('HTTP/2 requires "http2" extra to be installed')
+
+    return HTTP2Session(
+        httpx.Client(
+            http2=True,
+            headers=options.headers,
+            timeout=httpx.Timeout(
+                None,
+                connect=options.connect_timeout,
+                read=options.read_timeout,
+            ),
+            limits=httpx.Limits(
+                max_connections=options.pool_size,
+                max_keepalive_connections=(
+                    options.pool_size if options.keep_alive else 0
+                ),
+            ),
+        )
+    )
+
+
+def aiohttp_session_kwargs(
+    options: TransportOptions, max_connections: int
+) -> dict[str, Any]:
+    """`aiohttp.ClientSession` arguments, HTTP/2 is not supported there."""
+    import aiohttp
+
+    if options.http2:
+        raise ValueError('HTTP/2 is not supported by asyncio transport')
+
+    connector = aiohttp.TCPConnector(
+        limit=max_connections,
+        limit_per_host=options.pool_size,
+        force_close=not options.keep_alive,
+    )
+    return {
+        'connector': connector,
+        'headers': options.headers,
+        'timeout': aiohttp.ClientTimeout(
+            sock_connect=options.connect_timeout,
+            sock_read=options.read_timeout,
+        ),
+    }
@@ -1,7 +1,16 @@
 from __future__ import annotations
 
 import dataclasses
-from typing import Any, Iterable, Optional, Protocol, Type, runtime_checkable
+from typing import (
+    Any,
+    Callable,
+    Iterable,
+    Optional,
+    Protocol,
+    Type,
+    TypeVar,
+    runtime_checkable,
+)
 
 
 @runtime_checkable
@@ -10,23 +19,61 @@ class TrackableEntity(Protocol):
         raise NotImplementedError
 
 
+def _collect_fields(cls: type) -> tuple[dataclasses.Field, ...]:
+    """Fields of every dataclass in MRO, the most derived definition wins."""
+    collected: dict[str, dataclasses.Field] = {}
+    for base in cls.__mro__:
+        try:
+            fields = dataclasses.fields(base)
+        except TypeError:
+            continue
+        for field in fields:
+            collected.setdefault(field.name, field)
+    return tuple(collected.values())
+
+
+def _compile_as_dict_flat(
+    names: Iterable[str],
+) -> Callable[[Any], dict[str, Any]]:
+    items = ', '.join(f'{name!r}: self.{name}' for name in names)
+    namespace: dict[str, Any] = {}
+    exec(f'def as_dict_flat(self):\n    return {{{items}}}\n', namespace)
+    return namespace['as_dict_flat']
+
+
 class Model:
+    # Keeps subclasses able to drop `__dict__`, see `slotted`
+    __slots__ = ()
+
+    # Field metadata is collected once per class at its creation
+    _fields: tuple[dataclasses.Field, ...] = ()
+    _field_names: frozenset[str] = frozenset()
+    _as_dict_flat: Callable[[Any], dict[str, Any]] = staticmethod(
+        lambda self: {}
+    )
+
     def __init_subclass__(
         cls,
         frozen: bool = False,
         unsafe_hash: bool = False,
         **kwargs,
     ):
-        dataclasses.dataclass(cls, frozen=frozen, unsafe_hash=unsafe_hash)
+        # Class recreated by `slotted` is a dataclass already
+        if '__dataclass_fields__' not in cls.__dict__:
+            dataclasses.dataclass(cls, frozen=frozen, unsafe_hash=unsafe_hash)
+        cls._fields = _collect_fields(cls)
+        cls._field_names = frozenset(field.name for field in cls._fields)
+        cls._as_dict_flat = staticmethod(
+            _compile_as_dict_flat(field.name for field in cls._fields)
+        )
 
     @classmethod
     def all_fields(cls) -> Iterable[dataclasses.Field]:
-        mro = cls.__mro__
-        for base in mro:
-            try:
-                yield from dataclasses.fields(base)
-            except TypeError:
-                pass
+        return cls._fields
+
+    @classmethod
+    def all_field_names(cls) -> frozenset[str]:
+        return cls._field_names
 
     def as_dict(self) -> dict[str, Any]:
         return dataclasses.asdict(self)
@@ -34,17 +81,47 @@ class Model:
     def as_dict_flat(
         self, as_parent: Optional[Type[Model]] = None
     ) -> dict[str, Any]:
-        if as_parent:
-            self_cls = type(self)
-            mro = set(self_cls.__mro__)
-            if as_parent not in mro:
-                raise TypeError(
-                    f'Given model {as_parent.__name__!r} is not '
-                    f'parent of current model {self_cls.__name__!r}'
-                )
-
-            all_fields = as_parent.all_fields()
-        else:
-            all_fields = self.all_fields()
-
-        return {field.name: getattr(self, field.name) for field in all_fields}
+        if as_parent is None:
+            return self._as_dict_flat(self)
+
+        if not isinstance(self, as_parent):
+            raise TypeError(
+                f'Given model {as_parent.__name__!r} is not '
+                f'parent of current model {type(self).__name__!r}'
+            )
+        return as_parent._as_dict_flat(self)
+
+
+_M = TypeVar('_M', bound=Type[Model])
+
+
+def slotted(cls: _M) -> _M:
+    """
+    Model class decorator storing its fields in `__slots__`, so instances
+    hold no `__dict__`. Every base but `Model` must be slotted as well.
+
+    Subclasses declaring no `__slots__`, like ORM models, get `__dict__`
+    back and keep working, but a class can't inherit two slotted models
+    with fields.
+    """
+    if cls.__dataclass_params__.frozen:  # type: ignore
+        raise TypeError('Frozen models can not be slotted')
+    for base in cls.__mro__[1:-1]:
+        if '__slots__' not in base.__dict__:
+            raise TypeError(f'Base {base.__name__!r} is not slotted')
+
+    own_fields = cls.__dict__.get('__annotations__', {})
+    names = tuple(
+        field.name
+        for field in dataclasses.fields(cls)
+        if field.name in own_fields
+    )
+    namespace = {
+        name: value
+        for name, value in cls.__dict__.items()
+        # Defaults are kept by generated `__init__`
+        if name not in names and name not in ('__dict__', '__weakref__')
+    }
+    namespace['__slots__'] = names
+    namespace['__qualname__'] = cls.__qualname__
+    return type(cls)(cls.__name__, cls.__bases__, namespace)
@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+
+from codstattracker.api.models import Game, PlayerID
+from codstattracker.api.mycallofduty.mw import PlayerAPI
+from codstattracker.api.transport import TransportOptions, create_session
+from codstattracker.bench.payloads import PayloadFactory
+from codstattracker.bench.server import ReplayServer, ServerStats
+from codstattracker.logging import create_empty_logger
+from codstattracker.poller.impl import Poller
+from codstattracker.poller.resilience import RetryPolicy
+from codstattracker.storage import sql
+from codstattracker.storage.sql.ext import Session as DBSession
+from codstattracker.storage.sql.models import Base, PlayerMatchModel
+
+
+@dataclass(frozen=True)
+class BenchmarkResult:
+    players: int
+    matches: int
+    elapsed: float
+    server_stats: ServerStats
+
+    @property
+    def players_per_second(self) -> float:
+        return self.players / self.elapsed
+
+    @property
+    def matches_per_second(self) -> float:
+        return self.matches / self.elapsed
+
+
+def _count_stored_matches(engine: Engine) -> int:
+    session = DBSession(engine)
+    try:
+        return session.query(PlayerMatchModel).count()
+    finally:
+        session.close()
+
+
+def run_benchmark(
+    server: ReplayServer,
+    db_uri: str,
+    num_of_players: int,
+    max_in_flight: int = 1,
+    game: Game = Game.mw_mp,
+) -> BenchmarkResult:
+    """Polls synthetic players once from a running `server`."""
+    engine = create_engine(db_uri)
+    Base.metadata.create_all(engine)
+
+    session = create_session(TransportOptions(pool_size=max_in_flight))
+    logger = create_empty_logger()
+    api = PlayerAPI(session, base_api_url=server.url, logger=logger)
+    players = [
+        (game, PlayerID('battle', f'bench{idx}', str(idx)))
+        for idx in range(num_of_players)
+    ]
+    poller = Poller(
+        sql.StorageContext(engine, sql.SaveStorage),
+        api,
+        players,
+        logger,
+        max_in_flight=max_in_flight,
+        retry_policy=RetryPolicy(max_attempts=5, base_delay=0.1),
+    )
+
+    stored_before = _count_stored_matches(engine)
+    started_at = time.perf_counter()
+    poller.regular_pool()
+    elapsed = time.perf_counter() - started_at
+
+    return BenchmarkResult(
+        num_of_players,
+        _count_stored_matches(engine) - stored_before,
+        elapsed,
+        server.stats,
+    )
+
+
+def main(*args: str) -> None:
+    parser = argparse.ArgumentParser(
+        'cst-bench',
+        description='Measure end-to-end polling throughput against a local '
+        'replay of my.callofduty.com API',
+    )
+    parser.add_argument('--players', type=int, default=100)
+    parser.add_argument('--max-in-flight', type=int, default=1)
+    parser.add_argument(
+        '--db-uri',
+        help='Storage to save matches into, temporary SQLite file '
+        'by default',
+    )
+    parser.add_argument('--matches-per-page', type=int, default=20)
+    parser.add_argument(
+        '--latency', type=float, default=0.05, help='Seconds per response'
+    )
+    parser.add_argument('--latency-jitter', type=float, default=0.0)
+    parser.add_argument(
+        '--error-rate',
+        type=float,
+        default=0.0,
+        help='Share of responses failed with recoverable error',
+    )
+    parser.add_argument(
+        '--rate-limit',
+        type=float,
+        help='Requests per second above which server throttles',
+    )
+    parser.add_argument(
+        '--payload',
+        type=Path,
+        action='append',
+        help='Recorded successful response used as matches template, '
+        'synthetic matches are generated if omitted',
+    )
+    parsed = parser.parse_args(args if args else None)
+
+    payloads = (
+        PayloadFactory.from_recorded(*parsed.payload)
+        if parsed.payload
+        else PayloadFactory()
+    )
+    server = ReplayServer(
+        payloads,
+        matches_per_page=parsed.matches_per_page,
+        latency=parsed.latency,
+        latency_jitter=parsed.latency_jitter,
+        error_rate=parsed.error_rate,
+        rate_limit=parsed.rate_limit,
+    )
+    with tempfile.TemporaryDirectory() as tmp_dir, server:
+        db_uri: Optional[str] = parsed.db_uri
+        if db_uri is None:
+            db_uri = f'sqlite:///{Path(tmp_dir) / "bench.db"}'
+        result = run_benchmark(
+            server, db_uri, parsed.players, parsed.max_in_flight
+        )
+
+    print(
+        f'players: {result.players}, matches: {result.matches}, '
+        f'elapsed: {result.elapsed:.2f}s'
+    )
+    print(f'players/sec: {result.players_per_second:.2f}')
+    print(f'matches/sec: {result.matches_per_second:.2f}')
+    print(
+        f'requests: {result.server_stats.requests}, '
+        f'throttled: {result.server_stats.throttled}, '
+        f'errors: {result.server_stats.errors}'
+    )
+
+
+if __name__ == '__main__':
+    main()
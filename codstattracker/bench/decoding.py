@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+from typing import Any
+
+from codstattracker.api import jsonlib
+from codstattracker.api.models import Game, PlayerID
+from codstattracker.api.mycallofduty.mw import PlayerAPI
+from codstattracker.bench.payloads import measure, synthetic_page
+from codstattracker.logging import create_empty_logger
+
+PLAYER_ID = PlayerID('battle', 'bench', '1')
+
+
+class _Response:
+    status_code = 200
+    headers: dict[str, str] = {}
+
+    def __init__(self, content: bytes):
+        self.content = content
+
+
+class _Session:
+    def __init__(self, content: bytes):
+        self._response = _Response(content)
+
+    def get(self, url: str, **kwargs: Any) -> _Response:
+        return self._response
+
+
+def measure_decode_share(
+    content: bytes, loads: jsonlib.Loads, repeat: int
+) -> tuple[float, float]:
+    """
+    Returns seconds per `get_recent_matches` call and per decoding of its
+    response with `loads`.
+    """
+    api = PlayerAPI(
+        _Session(content),  # type: ignore
+        'http://bench',
+        logger=create_empty_logger(),
+        json_loads=loads,
+    )
+    total = measure(
+        lambda: api.get_recent_matches(Game.mw_mp, PLAYER_ID), repeat
+    )
+    decode = measure(lambda: loads(content), repeat)
+    return total, decode
+
+
+def main(*args: str) -> None:
+    parser = argparse.ArgumentParser(
+        'python -m codstattracker.bench.decoding',
+        description='Measure JSON decoding share of match history '
+        'response handling with every available decoder',
+    )
+    parser.add_argument('--matches-per-page', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=100)
+    parser.add_argument(
+        '--payload',
+        type=Path,
+        help='Recorded response to measure, synthetic one if omitted',
+    )
+    parsed = parser.parse_args(args if args else None)
+
+    if parsed.payload:
+        content = parsed.payload.read_bytes()
+    else:
+        page = synthetic_page('mp', parsed.matches_per_page)
+        content = json.dumps(page).encode()
+
+    decoders: dict[str, jsonlib.Loads] = {'json': jsonlib.stdlib_loads}
+    if jsonlib.loads is not jsonlib.stdlib_loads:
+        decoders[jsonlib.loads.__module__ or 'fast'] = jsonlib.loads
+
+    print(f'response size: {len(content)} bytes')
+    for name, loads in decoders.items():
+        total, decode = measure_decode_share(content, loads, parsed.repeat)
+        print(
+            f'{name}: {total * 1e3:.3f} ms per call, '
+            f'decode {decode * 1e3:.3f} ms ({decode / total:.0%})'
+        )
+
+
+if __name__ == '__main__':
+    main()
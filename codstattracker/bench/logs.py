@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import argparse
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterable
+
+from codstattracker.bench.payloads import synthetic_page
+from codstattracker.storage import blobs
+
+
+@dataclass(frozen=True)
+class CompressionResult:
+    codec: str
+    sources: int
+    blobs: int
+    raw_size: int
+    stored_size: int
+
+    @property
+    def ratio(self) -> float:
+        return self.raw_size / self.stored_size
+
+
+def measure_compression(
+    sources: Iterable[Any], codec: str
+) -> CompressionResult:
+    """Sizes of sources as plain JSON and as stored log blobs."""
+    blobs.check_codec(codec)
+    num_of_sources = raw_size = 0
+    stored: dict[str, int] = {}
+    for source in sources:
+        data = blobs.encode_json(source)
+        num_of_sources += 1
+        raw_size += len(data)
+        digest = blobs.content_digest(data)
+        if digest not in stored:
+            stored[digest] = len(blobs.compress(data, codec))
+
+    return CompressionResult(
+        codec, num_of_sources, len(stored), raw_size, sum(stored.values())
+    )
+
+
+def _available_codecs() -> list[str]:
+    codecs = []
+    for codec in blobs.CODECS:
+        try:
+            blobs.check_codec(codec)
+        except ValueError:
+            continue
+        codecs.append(codec)
+    return codecs
+
+
+def main(*args: str) -> None:
+    parser = argparse.ArgumentParser(
+        'python -m codstattracker.bench.logs',
+        description='Measure compression ratio of matches log sources',
+    )
+    parser.add_argument('--pages', type=int, default=50)
+    parser.add_argument('--matches-per-page', type=int, default=20)
+    parser.add_argument(
+        '--payload',
+        type=Path,
+        action='append',
+        help='Recorded response whose matches are measured, synthetic '
+        'pages are generated if omitted',
+    )
+    parsed = parser.parse_args(args if args else None)
+
+    if parsed.payload:
+        pages = [json.loads(path.read_bytes()) for path in parsed.payload]
+    else:
+        pages = [
+            synthetic_page(
+                'wz' if idx % 2 else 'mp',
+                parsed.matches_per_page,
+                player=f'bench#{idx}',
+            )
+            for idx in range(parsed.pages)
+        ]
+    sources = [match for page in pages for match in page['data']['matches']]
+
+    for codec in _available_codecs():
+        result = measure_compression(sources, codec)
+        print(
+            f'{codec}: {result.sources} sources, {result.blobs} blobs, '
+            f'{result.raw_size} -> {result.stored_size} bytes, '
+            f'ratio {result.ratio:.1f}'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import argparse
+import gc
+import tracemalloc
+from dataclasses import dataclass
+from typing import Any, Callable, Sequence
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+
+from codstattracker.api.models import Game, PlayerID, PlayerMatch
+from codstattracker.bench.saving import create_matches
+from codstattracker.storage.sql import LoadStorage, SaveStorage
+from codstattracker.storage.sql.ext import Base, Session
+from codstattracker.storage.sql.models import PlayerMatchModel
+
+PLAYER_ID = PlayerID('battle', 'bench', '1')
+
+
+@dataclass(frozen=True)
+class MemoryResult:
+    matches: int
+    #: Bytes held by loaded matches, their stats and weapon stats
+    size: int
+
+    @property
+    def per_match(self) -> float:
+        return self.size / self.matches
+
+
+def create_database(num_of_matches: int, game: Game) -> Engine:
+    """In-memory database holding `num_of_matches` matches of a player."""
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    session = Session(engine)
+    SaveStorage(session).save_match_series(
+        PLAYER_ID, create_matches(num_of_matches, game)
+    )
+    session.commit()
+    session.close()
+    return engine
+
+
+def _measure_held(
+    load: Callable[[Session], Sequence[Any]], engine: Engine
+) -> MemoryResult:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        session = Session(engine)
+        matches = load(session)
+        session.close()
+        gc.collect()
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return MemoryResult(len(matches), size)
+
+
+def measure_load_memory(
+    engine: Engine, game: Game
+) -> tuple[MemoryResult, MemoryResult]:
+    """
+    Returns memory held by matches returned by `load_last_matches` and by
+    ORM instances of the same matches queried directly.
+    """
+
+    def load(session: Session) -> Sequence[PlayerMatch]:
+        return LoadStorage(session).load_last_matches(game, PLAYER_ID)
+
+    def query(session: Session) -> Sequence[PlayerMatchModel]:
+        return (
+            session.query(PlayerMatchModel)
+            .filter(
+                PlayerMatchModel.game == game,
+                PlayerMatchModel.player == PLAYER_ID,
+            )
+            .all()
+        )
+
+    return _measure_held(load, engine), _measure_held(query, engine)
+
+
+def main(*args: str) -> None:
+    parser = argparse.ArgumentParser(
+        'python -m codstattracker.bench.memory',
+        description='Measure memory held by matches loaded from database',
+    )
+    parser.add_argument('--matches', type=int, default=100_000)
+    parsed = parser.parse_args(args if args else None)
+
+    for game in Game:
+        engine = create_database(parsed.matches, game)
+        loaded, orm = measure_load_memory(engine, game)
+        print(
+            f'{game.value}: {loaded.matches} loaded matches hold '
+            f'{loaded.size / 2 ** 20:.1f} MiB, '
+            f'{loaded.per_match:.0f} bytes per match, '
+            f'ORM instances {orm.size / 2 ** 20:.1f} MiB'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import copy
+import json
+import random
+import timeit
+import zlib
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+_MAPS = ('mp_m_speed', 'mp_runner', 'mp_hackney_yard', 'mp_aniyah')
+_WEAPONS = (
+    'iw8_ar_mike4',
+    'iw8_sm_mpapa7',
+    'iw8_lm_kilo121',
+    'iw8_pi_papa320',
+)
+_KILLSTREAKS = ('uav', 'cruise_predator', 'airdrop', 'white_phosphorus')
+#: Fixed end of synthetic histories, so every run measures the same matches
+_UNTIL = 1_600_000_000
+
+
+def _synthetic_match(mode: str, rnd: random.Random) -> dict[str, Any]:
+    kills, deaths = rnd.randint(0, 40), rnd.randint(0, 30)
+    shots = rnd.randint(100, 900)
+    match = {
+        'map': rnd.choice(_MAPS),
+        'mode': 'br_brquads' if mode == 'wz' else 'war',
+        'gameType': mode,
+        'result': rnd.choice(('win', 'loss')),
+        'winningTeam': 'axis',
+        'player': {
+            'team': rnd.choice(('axis', 'allies')),
+            'username': 'bench',
+            'killstreakUsage': {
+                name: rnd.randint(1, 3)
+                for name in rnd.sample(_KILLSTREAKS, rnd.randint(0, 3))
+            },
+        },
+        'playerStats': {
+            'kills': kills,
+            'assists': rnd.randint(0, 15),
+            'deaths': deaths,
+            'kdRatio': kills / (deaths or 1),
+            'longestStreak': rnd.randint(0, kills or 1),
+            'suicides': rnd.randint(0, 2),
+            'executions': rnd.randint(0, 2),
+            'damageDone': rnd.randint(0, 6000),
+            'damageTaken': rnd.randint(0, 4000),
+            'percentTimeMoving': rnd.uniform(50, 100),
+            'shotsFired': shots,
+            'shotsLanded': shots // 3,
+            'shotsMissed': shots - shots // 3,
+            'headshots': rnd.randint(0, kills or 1),
+            'wallBangs': rnd.randint(0, 3),
+            'timePlayed': rnd.randint(300, 1800),
+            'distanceTraveled': rnd.uniform(1e4, 6e5),
+            'averageSpeedDuringMatch': rnd.uniform(100, 300),
+            'teamPlacement': rnd.randint(1, 40),
+        },
+        'weaponStats': {
+            name: {
+                'hits': rnd.randint(0, 200),
+                'shots': rnd.randint(200, 600),
+                'kills': rnd.randint(0, 20),
+                'deaths': rnd.randint(0, 20),
+                'headshots': rnd.randint(0, 10),
+                'loadoutIndex': idx,
+            }
+            for idx, name in enumerate(rnd.sample(_WEAPONS, 2))
+        },
+    }
+    if mode == 'wz':
+        match.update(playerCount=150, teamCount=38)
+    return match
+
+
+class PayloadFactory:
+    """
+    Builds match history responses, either from recorded matches used as
+    templates or from synthetic ones. Match ids and times are generated,
+    so every player gets its own distinct history.
+    """
+
+    def __init__(
+        self,
+        templates: Optional[list[dict[str, Any]]] = None,
+        seed: int = 0,
+    ):
+        self._templates = templates
+        self._seed = seed
+
+    @classmethod
+    def from_recorded(cls, *paths: Path) -> PayloadFactory:
+        """Use matches of recorded successful responses as templates."""
+        templates = [
+            match
+            for path in paths
+            for match in json.loads(path.read_text())['data']['matches']
+        ]
+        if not templates:
+            raise ValueError('Recorded responses contain no matches')
+        return cls(templates)
+
+    def _match(self, mode: str, rnd: random.Random) -> dict[str, Any]:
+        if not self._templates:
+            return _synthetic_match(mode, rnd)
+        match = copy.deepcopy(rnd.choice(self._templates))
+        match['gameType'] = mode
+        return match
+
+    def matches_page(
+        self, player: str, mode: str, until: int, size: int
+    ) -> dict[str, Any]:
+        """
+        Successful response body holding `size` matches of `player` which
+        ended before `until` timestamp, most recent first.
+        """
+        player_seed = zlib.crc32(f'{player}:{mode}'.encode())
+        rnd = random.Random(self._seed ^ player_seed ^ until)
+        matches = []
+        end = until
+        for _ in range(size):
+            match = self._match(mode, rnd)
+            duration = match['playerStats']['timePlayed'] = rnd.randint(
+                300, 1800
+            )
+            start = end - duration
+            match.update(
+                matchID=f'{player_seed}{start}',
+                utcStartSeconds=start,
+                utcEndSeconds=end,
+                duration=duration * 1000,
+            )
+            matches.append(match)
+            end = start - rnd.randint(30, 600)
+
+        return {
+            'status': 'success',
+            'data': {'summary': {}, 'matches': matches},
+        }
+
+
+def synthetic_page(
+    mode: str, size: int, player: str = 'bench#1'
+) -> dict[str, Any]:
+    """Response body holding `size` synthetic matches of `player`."""
+    return PayloadFactory().matches_page(player, mode, _UNTIL, size)
+
+
+def measure(func: Callable[[], Any], repeat: int) -> float:
+    """Best of 5 runs, seconds per call."""
+    return min(timeit.repeat(func, number=repeat, repeat=5)) / repeat
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import argparse
+import dataclasses
+from typing import Any, Sequence
+
+from codstattracker.api.models import Game, PlayerMatch
+from codstattracker.api.mycallofduty.models import (
+    convert_raw_match_to_player_match,
+)
+from codstattracker.base_model import Model
+from codstattracker.bench.payloads import measure, synthetic_page
+from codstattracker.storage import sql
+from codstattracker.storage.sql.models import PlayerModel
+
+
+def _walk_mro_as_dict_flat(model: Model) -> dict[str, Any]:
+    """Uncached field lookup, cached accessors are compared to it."""
+    fields = []
+    for base in type(model).__mro__:
+        try:
+            fields.extend(dataclasses.fields(base))
+        except TypeError:
+            pass
+    return {field.name: getattr(model, field.name) for field in fields}
+
+
+def create_matches(num_of_matches: int, game: Game) -> list[PlayerMatch]:
+    page = synthetic_page(game.mode, num_of_matches)
+    return [
+        convert_raw_match_to_player_match(raw_match, game)
+        for raw_match in page['data']['matches']
+    ]
+
+
+def measure_save_conversion(
+    matches: Sequence[PlayerMatch], repeat: int
+) -> tuple[float, float, float]:
+    """
+    Returns seconds per match spent converting it into database models
+    on save, flattening it with cached accessors and with MRO walking.
+    """
+    storage = sql.SaveStorage(None)  # type: ignore
+    player = PlayerModel('battle', 'bench', '1')
+
+    def to_db() -> None:
+        for match in matches:
+            storage._model_to_db(match, player)
+
+    def flatten(as_dict_flat: Any) -> Any:
+        def inner() -> None:
+            for match in matches:
+                as_dict_flat(match)
+                as_dict_flat(match.stats)
+                for stat in match.weapon_stats:
+                    as_dict_flat(stat)
+
+        return inner
+
+    return (
+        measure(to_db, repeat) / len(matches),
+        measure(flatten(Model.as_dict_flat), repeat) / len(matches),
+        measure(flatten(_walk_mro_as_dict_flat), repeat) / len(matches),
+    )
+
+
+def main(*args: str) -> None:
+    parser = argparse.ArgumentParser(
+        'python -m codstattracker.bench.saving',
+        description='Measure conversion of matches into database models '
+        'on save',
+    )
+    parser.add_argument('--matches', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=20)
+    parsed = parser.parse_args(args if args else None)
+
+    for game in Game:
+        to_db, cached, walked = measure_save_conversion(
+            create_matches(parsed.matches, game), parsed.repeat
+        )
+        print(
+            f'{game.value}: {to_db * 1e6:.1f} us per match to models, '
+            f'flattening {cached * 1e6:.1f} us cached, '
+            f'{walked * 1e6:.1f} us walking MRO'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import json
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Optional
+from urllib.parse import unquote
+
+from codstattracker.bench.payloads import PayloadFactory
+
+_MATCHES_PATH = re.compile(
+    r'/platform/(?P<platform>[^/]+)/gamer/(?P<user_name>[^/]+)/matches'
+    r'/(?P<mode>\w+)/start/(?P<start>\d+)/end/(?P<end>\d+)/details$'
+)
+
+
+@dataclass
+class ServerStats:
+    requests: int = 0
+    throttled: int = 0
+    errors: int = 0
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: _HTTPServer
+    protocol_version = 'HTTP/1.1'
+
+    def _reply(
+        self, status: int, body: Any, headers: Optional[dict] = None
+    ) -> None:
+        content = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(content)
+
+    def do_GET(self) -> None:
+        replay = self.server.replay
+        match = _MATCHES_PATH.match(self.path)
+        if match is None:
+            self._reply(404, {'status': 'error', 'data': {'message': ''}})
+            return
+
+        status, body, headers = replay.respond(
+            unquote(match['user_name']),
+            match['mode'],
+            int(match['end']),
+        )
+        self._reply(status, body, headers)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    replay: ReplayServer
+
+
+class ReplayServer:
+    """
+    Local stand-in of my.callofduty.com match history API.
+
+    Every request is answered after `latency` seconds (uniformly jittered
+    by `latency_jitter`), `error_rate` share of requests get recoverable
+    error response and requests above `rate_limit` per second are
+    throttled with 429 status. Usable as a context manager, API base url is
+    `url` then.
+    """
+
+    def __init__(
+        self,
+        payloads: Optional[PayloadFactory] = None,
+        matches_per_page: int = 20,
+        latency: float = 0.0,
+        latency_jitter: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit: Optional[float] = None,
+        host: str = '127.0.0.1',
+        port: int = 0,
+        seed: Optional[int] = None,
+    ):
+        self._payloads = payloads or PayloadFactory()
+        self._matches_per_page = matches_per_page
+        self._latency = latency
+        self._latency_jitter = latency_jitter
+        self._error_rate = error_rate
+        self._rate_limit = rate_limit
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._window_start = 0.0
+        self._window_requests = 0
+        self.stats = ServerStats()
+
+        self._server = _HTTPServer((host, port), _Handler)
+        self._server.replay = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def _throttled(self) -> bool:
+        if self._rate_limit is None:
+            return False
+        now = time.monotonic()
+        if now - self._window_start >= 1:
+            self._window_start = now
+            self._window_requests = 0
+        self._window_requests += 1
+        return self._window_requests > self._rate_limit
+
+    def respond(
+        self, user_name: str, mode: str, until: int
+    ) -> tuple[int, Any, dict[str, str]]:
+        with self._lock:
+            self.stats.requests += 1
+            throttled = self._throttled()
+            failed = self._random.random() < self._error_rate
+            latency = self._latency + self._random.uniform(
+                0, self._latency_jitter
+            )
+            if throttled:
+                self.stats.throttled += 1
+            elif failed:
+                self.stats.errors += 1
+
+        if latency:
+            time.sleep(latency)
+        if throttled:
+            return 429, {}, {'Retry-After': '1'}
+        if failed:
+            return (
+                200,
+                {'status': 'error', 'data': {'message': 'Replay failure'}},
+                {},
+            )
+
+        until = until or int(time.time())
+        return (
+            200,
+            self._payloads.matches_page(
+                user_name, mode, until, self._matches_per_page
+            ),
+            {},
+        )
+
+    def start(self) -> None:
+        self._thread = threading.Thread(
+            target=self._server.serve_forever,
+            name='cst-replay-server',
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> ReplayServer:
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
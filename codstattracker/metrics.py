@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Generator, Optional
+
+from prometheus_client import (
+    REGISTRY,
+    Counter,
+    Gauge,
+    Histogram,
+    start_http_server,
+    write_to_textfile,
+)
+
+_CYCLE_BUCKETS = (1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600, float('inf'))
+
+API_REQUEST_SECONDS = Histogram(
+    'cst_api_request_duration_seconds',
+    'Latency of API HTTP requests, until response body is received',
+    ['game'],
+)
+JSON_DECODE_SECONDS = Histogram(
+    'cst_api_json_decode_duration_seconds',
+    'Time spent decoding JSON of API responses',
+)
+PARSE_SECONDS = Histogram(
+    'cst_api_parse_duration_seconds',
+    'Time spent validating API responses and converting them into matches',
+    ['game'],
+)
+UNCHANGED_RESPONSES = Counter(
+    'cst_api_unchanged_responses',
+    'Number of API responses skipped as unchanged since previous request',
+    ['game'],
+)
+UNCHANGED_PROFILES = Counter(
+    'cst_poller_unchanged_profiles',
+    'Number of polls skipping matches request as profile counters '
+    'are unchanged',
+    ['game'],
+)
+API_CREDENTIALS = Gauge(
+    'cst_api_credentials',
+    'Number of API credentials left in pool, evicted ones are not counted',
+)
+SAVE_SECONDS = Histogram(
+    'cst_storage_save_duration_seconds',
+    'Duration of saving a single player match series',
+)
+POLL_CYCLE_SECONDS = Histogram(
+    'cst_poll_cycle_duration_seconds',
+    'Duration of polling a batch of players',
+    buckets=_CYCLE_BUCKETS,
+)
+MATCHES_INGESTED = Counter(
+    'cst_matches_ingested',
+    'Number of fetched matches saved, already stored ones are not counted',
+    ['game'],
+)
+FETCH_ERRORS = Counter(
+    'cst_fetch_errors',
+    'Number of failed fetch attempts per player',
+    ['game', 'player', 'error'],
+)
+
+
+def write_textfile(path: Path) -> None:
+    write_to_textfile(str(path), REGISTRY)
+
+
+@contextmanager
+def exposed(
+    port: Optional[int] = None,
+    textfile: Optional[Path] = None,
+    textfile_interval: float = 15,
+    addr: str = '127.0.0.1',
+) -> Generator[None, None, None]:
+    """
+    Serves metrics on `addr`:`port` and keeps `textfile` updated every
+    `textfile_interval` seconds and on exit.
+    """
+    if port is not None:
+        start_http_server(port, addr)
+    if textfile is None:
+        yield
+        return
+
+    stop = threading.Event()
+
+    def write_periodically() -> None:
+        while not stop.wait(textfile_interval):
+            write_textfile(textfile)
+
+    writer = threading.Thread(
+        target=write_periodically, name='cst-metrics', daemon=True
+    )
+    writer.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        writer.join()
+        write_textfile(textfile)
@@ -1,52 +1,488 @@
 from __future__ import annotations
 
 import argparse
+import asyncio
+import multiprocessing
+import signal
+import sys
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import (
+    AsyncExitStack,
+    asynccontextmanager,
+    contextmanager,
+)
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import TYPE_CHECKING
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Iterator,
+    Optional,
+    Union,
+)
 
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
 
+from codstattracker import metrics
 from codstattracker.api import mycallofduty
+from codstattracker.api.cassette import CassetteReader, CassetteWriter
+from codstattracker.api.fingerprints import FingerprintCache
+from codstattracker.api.interfaces import AsyncPlayerAPI, PlayerAPI
+from codstattracker.api.pool import AsyncCredentialPool, CredentialPool
+from codstattracker.api.ratelimit import AdaptiveRateLimiter
+from codstattracker.api.singleflight import (
+    AsyncSingleFlightPlayerAPI,
+    SingleFlightPlayerAPI,
+)
+from codstattracker.api.transport import TransportOptions
 from codstattracker.app import main_ctx
-from codstattracker.poller.impl import Poller
-from codstattracker.poller.settings import DB, Settings
+from codstattracker.poller.backfill import Backfiller
+from codstattracker.poller.impl import AsyncPoller, PlayerKey, Poller
+from codstattracker.poller.leases import LeaseCoordinator
+from codstattracker.poller.resilience import CircuitBreaker, RetryPolicy
+from codstattracker.poller.scheduler import AdaptiveScheduler
+from codstattracker.poller.settings import DB, Cassette, Settings
 from codstattracker.storage import sql
-from codstattracker.storage.interfaces import SaveStorage, StorageContext
+from codstattracker.storage.interfaces import (
+    LoadStorage,
+    SaveStorage,
+    StorageContext,
+)
 
 if TYPE_CHECKING:
     from loguru import Logger
 
 
 def _create_save_storage_ctx(
-    db_settings: DB,
+    engine: Engine, db_settings: DB
 ) -> StorageContext[SaveStorage]:
-    engine = create_engine(db_settings.uri)
-
     def storage_factory(session):
         return sql.SaveStorage(
-            session, save_matches_logs=db_settings.save_matches_log
+            session,
+            save_matches_logs=db_settings.save_matches_log,
+            logs_codec=db_settings.matches_log_codec,
         )
 
     return sql.StorageContext(engine, storage_factory)
 
 
-def _create_poller(settings: Settings, logger: Logger) -> Poller:
-    api = mycallofduty.api_factory(settings.api.auth_cookie, collect_meta=True)
+def _create_load_storage_ctx(
+    engine: Engine, settings: Settings
+) -> Optional[StorageContext[LoadStorage]]:
+    if not settings.polling.incremental:
+        return None
+    return sql.StorageContext(engine, sql.LoadStorage)
 
-    storage_ctx = _create_save_storage_ctx(settings.db)
-    return Poller(storage_ctx, api, settings.players_to_poll, logger)
 
+def _create_lease_coordinator(
+    engine: Engine, settings: Settings, logger: Logger
+) -> Optional[LeaseCoordinator]:
+    coordination = settings.polling.coordination
+    if coordination is None:
+        return None
+    return LeaseCoordinator(
+        sql.StorageContext(engine, sql.LeaseStorage),
+        coordination.poller_id,
+        coordination.lease_ttl,
+        logger,
+    )
 
-def main(*args: str) -> None:
-    parser = argparse.ArgumentParser(
-        'cst-poller',
+
+def _create_transport_options(settings: Settings) -> TransportOptions:
+    transport = settings.api.transport
+    return TransportOptions(
+        pool_size=transport.pool_size or settings.polling.max_in_flight,
+        keep_alive=transport.keep_alive,
+        connect_timeout=transport.connect_timeout,
+        read_timeout=transport.read_timeout,
+        accept_encoding=tuple(transport.accept_encoding),
+        http2=transport.http2,
     )
-    parser.add_argument('settings_path', type=Path)
-    parsed = parser.parse_args(args if args else None)
 
-    with main_ctx('poller', Settings, parsed.settings_path) as app:
-        poller = _create_poller(app.settings, app.logger)
+
+def _create_fingerprint_cache(
+    settings: Settings,
+) -> Optional[FingerprintCache]:
+    if not settings.api.fingerprint_cache_size:
+        return None
+    return FingerprintCache(settings.api.fingerprint_cache_size)
+
+
+def _create_rate_limiter(
+    settings: Settings,
+) -> Optional[AdaptiveRateLimiter]:
+    rate_limit = settings.api.rate_limit
+    if rate_limit is None:
+        return None
+    return AdaptiveRateLimiter(
+        rate_limit.requests_per_second,
+        burst=rate_limit.burst,
+        min_rate=rate_limit.min_requests_per_second,
+        max_rate=rate_limit.max_requests_per_second,
+        decrease_factor=rate_limit.decrease_factor,
+        increase_step=rate_limit.increase_step,
+    )
+
+
+@contextmanager
+def _open_cassette(
+    cassette: Optional[Cassette],
+) -> Iterator[Union[CassetteReader, CassetteWriter, None]]:
+    if cassette is None:
+        yield None
+    elif cassette.mode == 'replay':
+        with CassetteReader(cassette.path) as reader:
+            yield reader
+    else:
+        with CassetteWriter(cassette.path) as writer:
+            yield writer
+
+
+@contextmanager
+def _open_parse_executor(settings: Settings) -> Iterator[Optional[Executor]]:
+    if not settings.api.parse_processes:
+        yield None
+        return
+    # Workers start on the first submit, when polling threads are running
+    # already, forked ones could inherit locks held by them (e.g. logger's)
+    with ProcessPoolExecutor(
+        settings.api.parse_processes,
+        mp_context=multiprocessing.get_context('spawn'),
+    ) as executor:
+        yield executor
+
+
+def _create_api(
+    settings: Settings,
+    cassette: Union[CassetteReader, CassetteWriter, None],
+    fingerprint_cache: Optional[FingerprintCache] = None,
+    parse_executor: Optional[Executor] = None,
+) -> PlayerAPI:
+    if isinstance(cassette, CassetteReader):
+        api = mycallofduty.replay_api_factory(
+            cassette,
+            realtime=bool(
+                settings.api.cassette and settings.api.cassette.realtime
+            ),
+            collect_meta=True,
+            fingerprint_cache=fingerprint_cache,
+            validate_every=settings.api.validate_every,
+            parse_executor=parse_executor,
+        )
+    else:
+        api = CredentialPool(
+            [
+                mycallofduty.api_factory(
+                    cookie,
+                    collect_meta=True,
+                    rate_limiter=_create_rate_limiter(settings),
+                    transport=_create_transport_options(settings),
+                    fingerprint_cache=fingerprint_cache,
+                    validate_every=settings.api.validate_every,
+                    recorder=cassette,
+                    parse_executor=parse_executor,
+                )
+                for cookie in settings.api.credentials
+            ]
+        )
+    return SingleFlightPlayerAPI(api)
+
+
+def _create_retry_policy(settings: Settings) -> RetryPolicy:
+    retry = settings.polling.retry
+    return RetryPolicy(retry.max_attempts, retry.base_delay, retry.max_delay)
+
+
+def _resilience_kwargs(settings: Settings, daemon: bool) -> dict[str, Any]:
+    breaker = settings.polling.circuit_breaker
+    return {
+        'retry_policy': _create_retry_policy(settings),
+        # Breaker state lives in memory, a one-shot run records at most
+        # a single failure per player and never opens the circuit
+        'circuit_breaker': (
+            CircuitBreaker(breaker.failure_threshold, breaker.cooldown)
+            if breaker and daemon
+            else None
+        ),
+    }
+
+
+def _create_scheduler(settings: Settings) -> AdaptiveScheduler[PlayerKey]:
+    schedule = settings.polling.schedule
+    return AdaptiveScheduler(
+        settings.players_to_poll,
+        min_interval=schedule.min_interval,
+        max_interval=schedule.max_interval,
+        initial_interval=schedule.initial_interval,
+        speedup_factor=schedule.speedup_factor,
+        backoff_factor=schedule.backoff_factor,
+    )
+
+
+def _create_poller(
+    settings: Settings,
+    logger: Logger,
+    cassette: Union[CassetteReader, CassetteWriter, None],
+    parse_executor: Optional[Executor],
+    daemon: bool,
+) -> Poller:
+    api = _create_api(
+        settings,
+        cassette,
+        _create_fingerprint_cache(settings),
+        parse_executor,
+    )
+
+    engine = create_engine(settings.db.uri)
+    return Poller(
+        _create_save_storage_ctx(engine, settings.db),
+        api,
+        settings.players_to_poll,
+        logger,
+        max_in_flight=settings.polling.max_in_flight,
+        load_storage_ctx=_create_load_storage_ctx(engine, settings),
+        save_queue_size=settings.polling.save_queue_size,
+        lease_coordinator=_create_lease_coordinator(engine, settings, logger),
+        precheck_profile=settings.polling.precheck_profile,
+        **_resilience_kwargs(settings, daemon),
+    )
+
+
+def _run_poller(
+    settings: Settings,
+    logger: Logger,
+    daemon: bool,
+    cassette: Union[CassetteReader, CassetteWriter, None],
+    parse_executor: Optional[Executor],
+) -> None:
+    poller = _create_poller(settings, logger, cassette, parse_executor, daemon)
+    if not daemon:
         poller.regular_pool()
+        return
+
+    stop = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stop.set())
+
+    logger.info('Starting polling daemon')
+    poller.run_forever(_create_scheduler(settings), stop)
+    logger.info('Polling daemon stopped')
+
+
+@asynccontextmanager
+async def _create_async_api(
+    settings: Settings, parse_executor: Optional[Executor]
+) -> AsyncIterator[AsyncPlayerAPI]:
+    fingerprint_cache = _create_fingerprint_cache(settings)
+    async with AsyncExitStack() as stack:
+        apis = [
+            await stack.enter_async_context(
+                mycallofduty.async_api_factory(
+                    cookie,
+                    collect_meta=True,
+                    max_connections=settings.polling.max_in_flight,
+                    rate_limiter=_create_rate_limiter(settings),
+                    transport=_create_transport_options(settings),
+                    fingerprint_cache=fingerprint_cache,
+                    validate_every=settings.api.validate_every,
+                    parse_executor=parse_executor,
+                )
+            )
+            for cookie in settings.api.credentials
+        ]
+        yield AsyncSingleFlightPlayerAPI(AsyncCredentialPool(apis))
+
+
+async def _run_async_poller(
+    settings: Settings,
+    logger: Logger,
+    daemon: bool,
+    parse_executor: Optional[Executor],
+) -> None:
+    async with _create_async_api(settings, parse_executor) as api:
+        engine = create_engine(settings.db.uri)
+        poller = AsyncPoller(
+            _create_save_storage_ctx(engine, settings.db),
+            api,
+            settings.players_to_poll,
+            logger,
+            max_in_flight=settings.polling.max_in_flight,
+            load_storage_ctx=_create_load_storage_ctx(engine, settings),
+            save_queue_size=settings.polling.save_queue_size,
+            lease_coordinator=_create_lease_coordinator(
+                engine, settings, logger
+            ),
+            precheck_profile=settings.polling.precheck_profile,
+            **_resilience_kwargs(settings, daemon),
+        )
+        if not daemon:
+            await poller.regular_pool()
+            return
+
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, stop.set)
+
+        logger.info('Starting polling daemon')
+        await poller.run_forever(_create_scheduler(settings), stop)
+        logger.info('Polling daemon stopped')
+
+
+def _run_backfill(
+    settings: Settings,
+    logger: Logger,
+    since: Optional[datetime],
+    cassette: Union[CassetteReader, CassetteWriter, None],
+    parse_executor: Optional[Executor],
+) -> None:
+    backfill = settings.backfill
+    since = since or backfill.since
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+
+    api = _create_api(settings, cassette, parse_executor=parse_executor)
+    engine = create_engine(settings.db.uri)
+
+    def storage_factory(session):
+        return sql.BackfillStorage(
+            session,
+            save_matches_logs=settings.db.save_matches_log,
+            logs_codec=settings.db.matches_log_codec,
+        )
+
+    backfiller = Backfiller(
+        sql.StorageContext(engine, storage_factory),
+        api,
+        logger,
+        since=since,
+        window=timedelta(seconds=backfill.window),
+        page_size=backfill.page_size,
+        retry_policy=_create_retry_policy(settings),
+    )
+    logger.info('Starting history backfill', since=since)
+    backfiller.run(settings.players_to_poll)
+
+
+def _run_logs_migration(
+    settings: Settings, logger: Logger, batch_size: int
+) -> None:
+    if settings.db.matches_log_codec is None:
+        raise ValueError('"db.matches_log_codec" setting is required')
+
+    def storage_factory(session):
+        return sql.SaveStorage(
+            session, logs_codec=settings.db.matches_log_codec
+        )
+
+    storage_ctx = sql.StorageContext(
+        create_engine(settings.db.uri), storage_factory
+    )
+    num_of_logs = 0
+    while True:
+        # Every batch is committed separately, interrupted migration is
+        # continued by the next run
+        with storage_ctx() as storage:
+            migrated = storage.compress_matches_logs(batch_size)
+        if not migrated:
+            break
+        num_of_logs += migrated
+        logger.info('Matches logs migrated', num_of_logs=num_of_logs)
+
+    logger.info('Matches logs migration finished', num_of_logs=num_of_logs)
+
+
+def _create_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser('cst-poller')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    poll = commands.add_parser('poll', help='Poll recent matches (default)')
+    poll.add_argument('settings_path', type=Path)
+    poll.add_argument(
+        '--daemon',
+        action='store_true',
+        help='Keep polling players on adaptive per-player intervals '
+        'until SIGINT/SIGTERM instead of a single pass',
+    )
+
+    backfill = commands.add_parser(
+        'backfill',
+        help='Fetch history of players backwards, resuming from '
+        'checkpoints of previous runs',
+    )
+    backfill.add_argument('settings_path', type=Path)
+    backfill.add_argument(
+        '--since',
+        type=datetime.fromisoformat,
+        help='Moment history is backfilled down to, in ISO format',
+    )
+
+    migrate_logs = commands.add_parser(
+        'migrate-logs',
+        help='Compress saved matches log sources with "db.matches_log_codec"',
+    )
+    migrate_logs.add_argument('settings_path', type=Path)
+    migrate_logs.add_argument('--batch-size', type=int, default=500)
+    return parser
+
+
+def _run_command(
+    parsed: argparse.Namespace, settings: Settings, logger: Logger
+) -> None:
+    if parsed.command == 'migrate-logs':
+        _run_logs_migration(settings, logger, parsed.batch_size)
+        return
+
+    if parsed.command == 'poll' and settings.polling.use_asyncio:
+        if settings.api.cassette is not None:
+            raise ValueError('Cassettes are not supported with asyncio')
+        with _open_parse_executor(settings) as parse_executor:
+            asyncio.run(
+                _run_async_poller(
+                    settings, logger, parsed.daemon, parse_executor
+                )
+            )
+        return
+
+    with _open_cassette(
+        settings.api.cassette
+    ) as cassette, _open_parse_executor(settings) as parse_executor:
+        if parsed.command == 'backfill':
+            _run_backfill(
+                settings, logger, parsed.since, cassette, parse_executor
+            )
+        else:
+            _run_poller(
+                settings, logger, parsed.daemon, cassette, parse_executor
+            )
+
+
+def main(*args: str) -> None:
+    parser = _create_parser()
+    argv = list(args) if args else sys.argv[1:]
+    # Bare `cst-poller <settings_path>` still means polling
+    if argv and argv[0] not in (
+        'poll',
+        'backfill',
+        'migrate-logs',
+        '-h',
+        '--help',
+    ):
+        argv.insert(0, 'poll')
+    parsed = parser.parse_args(argv)
+
+    with main_ctx('poller', Settings, parsed.settings_path) as app:
+        metrics_settings = app.settings.metrics
+        with metrics.exposed(
+            metrics_settings.port,
+            metrics_settings.textfile,
+            metrics_settings.textfile_interval,
+            metrics_settings.addr,
+        ):
+            _run_command(parsed, app.settings, app.logger)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import itertools
+import time
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Callable, Optional, Sequence
+
+from codstattracker import metrics
+from codstattracker.api.exceptions import FetchError
+from codstattracker.api.interfaces import PlayerAPI
+from codstattracker.api.models import Game, PlayerID
+from codstattracker.poller.resilience import RetryPolicy
+from codstattracker.storage.interfaces import BackfillStorage, StorageContext
+
+if TYPE_CHECKING:
+    from loguru import Logger
+
+
+#: Number of streamed matches saved at once
+_SAVE_BATCH_SIZE = 100
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class Backfiller:
+    """
+    Walks history of players backwards, window by window, down to `since`.
+
+    Matches of every window are saved in a single transaction together
+    with the checkpoint, so interrupted backfill resumes right after
+    the last saved window. A window holding more matches than API returns
+    at once is continued from the oldest received match.
+    """
+
+    def __init__(
+        self,
+        storage_ctx: StorageContext[BackfillStorage],
+        api: PlayerAPI,
+        logger: Logger,
+        since: datetime,
+        window: timedelta,
+        page_size: int = 20,
+        retry_policy: Optional[RetryPolicy] = None,
+        clock: Callable[[], datetime] = _utcnow,
+    ):
+        if window <= timedelta(0):
+            raise ValueError('Window must be positive')
+
+        self._storage_ctx = storage_ctx
+        self._api = api
+        self._logger = logger
+        self._since = since
+        self._window = window
+        self._page_size = page_size
+        self._retry_policy = retry_policy
+        self._clock = clock
+
+    def _save_window(
+        self,
+        game: Game,
+        player_id: PlayerID,
+        from_: datetime,
+        until: datetime,
+    ) -> tuple[int, datetime]:
+        """
+        Saves matches of the window in batches as they are received, so
+        a wide window is never held in memory at once. Returns number of
+        received matches and the cursor saved along with them.
+        """
+        num_of_matches = saved = 0
+        oldest: Optional[datetime] = None
+        with self._storage_ctx() as storage:
+            matches = iter(
+                self._api.iter_recent_matches(
+                    game, player_id, from_=from_, until=until
+                )
+            )
+            while True:
+                batch = list(itertools.islice(matches, _SAVE_BATCH_SIZE))
+                if not batch:
+                    break
+                num_of_matches += len(batch)
+                batch_oldest = min(match.start for match in batch)
+                oldest = min(oldest, batch_oldest) if oldest else batch_oldest
+                with metrics.SAVE_SECONDS.time():
+                    saved += storage.save_match_series(player_id, batch)
+
+            cursor = self._next_cursor(num_of_matches, oldest, from_, until)
+            storage.save_backfill_cursor(game, player_id, cursor)
+
+        metrics.MATCHES_INGESTED.labels(game.value).inc(saved)
+        return num_of_matches, cursor
+
+    def _backfill_window(
+        self,
+        game: Game,
+        player_id: PlayerID,
+        from_: datetime,
+        until: datetime,
+        logger: Logger,
+    ) -> tuple[int, datetime]:
+        for attempt in itertools.count(1):
+            try:
+                result = self._save_window(game, player_id, from_, until)
+                break
+            except FetchError as exc:
+                delay = (
+                    self._retry_policy.delay(attempt, exc)
+                    if self._retry_policy
+                    else None
+                )
+                if delay is None:
+                    raise
+                # Transaction of failed window is rolled back, it is
+                # fetched again from the start
+                logger.warning(
+                    'Fetching window failed, retrying',
+                    attempt=attempt,
+                    delay=round(delay, 3),
+                    exc=exc,
+                )
+            time.sleep(delay)
+
+        return result
+
+    def _next_cursor(
+        self,
+        num_of_matches: int,
+        oldest: Optional[datetime],
+        from_: datetime,
+        until: datetime,
+    ) -> datetime:
+        if num_of_matches < self._page_size or oldest is None:
+            return from_
+
+        # Window is truncated, the oldest received match is requested
+        # again to not miss its neighbours, saving skips duplicates
+        return max(from_, min(oldest, until - timedelta(seconds=1)))
+
+    def backfill(self, game: Game, player_id: PlayerID) -> int:
+        """Returns number of fetched matches."""
+        logger = self._logger.bind(game=game, player_id=repr(player_id))
+        with self._storage_ctx() as storage:
+            until = storage.load_backfill_cursor(game, player_id)
+        if until is None:
+            until = self._clock()
+        elif until > self._since:
+            logger.info('Resuming backfill from checkpoint', cursor=until)
+
+        num_of_matches = 0
+        while until > self._since:
+            from_ = max(self._since, until - self._window)
+            window_matches, cursor = self._backfill_window(
+                game, player_id, from_, until, logger
+            )
+            logger.info(
+                'Window backfilled',
+                from_=from_,
+                until=until,
+                num_of_matches=window_matches,
+            )
+            num_of_matches += window_matches
+            until = cursor
+
+        return num_of_matches
+
+    def run(self, players: Sequence[tuple[Game, PlayerID]]) -> None:
+        """
+        Backfills players one by one, a player failed with recoverable
+        error is left to the next run.
+        """
+        for game, player_id in players:
+            try:
+                num_of_matches = self.backfill(game, player_id)
+            except FetchError as exc:
+                self._logger.exception(
+                    'Player backfill interrupted, it will be resumed by '
+                    'the next run',
+                    game=game,
+                    player_id=repr(player_id),
+                    exc=exc,
+                )
+                continue
+
+            self._logger.info(
+                'Player history backfilled',
+                game=game,
+                player_id=repr(player_id),
+                num_of_matches=num_of_matches,
+            )
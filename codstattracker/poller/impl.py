@@ -1,33 +1,112 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+import asyncio
+import itertools
+import threading
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ThreadPoolExecutor,
+    wait,
+)
+from contextlib import contextmanager
+from datetime import datetime
+from itertools import islice
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Generator,
+    Generic,
+    Optional,
+    Sequence,
+    TypeVar,
+)
 
-from codstattracker.api.exceptions import FetchError, UnrecoverableFetchError
-from codstattracker.api.interfaces import PlayerAPI
+from codstattracker import metrics
+from codstattracker.api.exceptions import (
+    FetchError,
+    RateLimitedError,
+    UnrecoverableFetchError,
+)
+from codstattracker.api.interfaces import AsyncPlayerAPI, PlayerAPI
 from codstattracker.api.models import Game, PlayerID, PlayerMatch
+from codstattracker.poller.leases import LeaseCoordinator
+from codstattracker.poller.resilience import CircuitBreaker, RetryPolicy
+from codstattracker.poller.scheduler import AdaptiveScheduler
 from codstattracker.storage.exceptions import StorageIOError
-from codstattracker.storage.interfaces import SaveStorage, StorageContext
+from codstattracker.storage.interfaces import (
+    LoadStorage,
+    SaveStorage,
+    StorageContext,
+)
 
 if TYPE_CHECKING:
     from loguru import Logger
 
+API = TypeVar('API', PlayerAPI, AsyncPlayerAPI)
+T = TypeVar('T')
 
-class Poller:
+PlayerKey = tuple[Game, PlayerID]
+PlayerMatches = tuple[Game, PlayerID, list[PlayerMatch]]
+
+
+class _BasePoller(Generic[API]):
     def __init__(
         self,
         storage_ctx: StorageContext[SaveStorage],
-        api: PlayerAPI,
-        player_ids: list[tuple[Game, PlayerID]],
+        api: API,
+        player_ids: list[PlayerKey],
         logger: Logger,
+        max_in_flight: int = 1,
+        load_storage_ctx: Optional[StorageContext[LoadStorage]] = None,
+        save_queue_size: int = 10,
+        retry_policy: Optional[RetryPolicy] = None,
+        circuit_breaker: Optional[CircuitBreaker[PlayerKey]] = None,
+        lease_coordinator: Optional[LeaseCoordinator] = None,
+        precheck_profile: bool = False,
     ):
+        """
+        :param load_storage_ctx: enables incremental polling, only matches
+            started since the latest stored one are requested then
+        :param save_queue_size: max number of fetched player series waiting
+            to be saved, fetching is paused when it is reached
+        :param retry_policy: retries failed player fetches, no retries if
+            not given
+        :param circuit_breaker: suspends polling of players which keep
+            failing
+        :param lease_coordinator: shards players among several pollers,
+            only players leased to this one are polled
+        :param precheck_profile: request cheap player profile first, and
+            request matches only once its played matches counter changed
+        """
+        if max_in_flight < 1:
+            raise ValueError('At least one request must be allowed in flight')
+
         self._storage_ctx = storage_ctx
         self._api = api
         self._player_ids = player_ids
         self._logger = logger
+        self._max_in_flight = max_in_flight
+        self._save_queue_size = save_queue_size
+        self._retry_policy = retry_policy
+        self._circuit_breaker = circuit_breaker
+        self._lease_coordinator = lease_coordinator
+        self._load_storage_ctx = load_storage_ctx
+        # Latest known match start of every player, is tracked even when
+        # incremental polling is disabled to tell idle players from active
+        self._high_water_marks: dict[PlayerKey, datetime] = {}
+        self._high_water_marks_loaded = False
+        # Last played matches counter of every player
+        self._matches_played: Optional[dict[PlayerKey, int]] = (
+            {} if precheck_profile else None
+        )
 
-    def regular_pool(self) -> None:
+    @contextmanager
+    def _log_fatal_errors(self) -> Generator[None, None, None]:
         try:
-            self._regular_pool()
+            yield
         except UnrecoverableFetchError as exc:
             self._logger.error(
                 'Unrecoverable fetch error occurs, starting shutdown ...',
@@ -40,28 +119,459 @@ class Poller:
             )
             raise
 
-    def _regular_pool(self) -> None:
-        players_matches: dict[PlayerID, list[PlayerMatch]] = {}
+    def _load_high_water_marks(self) -> None:
+        if self._load_storage_ctx is None or self._high_water_marks_loaded:
+            return
+
+        with self._load_storage_ctx() as load_storage:
+            self._high_water_marks.update(
+                load_storage.load_last_match_starts()
+            )
+        self._high_water_marks_loaded = True
+        self._logger.info(
+            'Latest stored matches loaded',
+            num_of_players=len(self._high_water_marks),
+        )
+
+    def _renew_leases(self) -> None:
+        if self._lease_coordinator is not None:
+            self._lease_coordinator.renew(self._player_ids)
+
+    def _release_leases(self) -> None:
+        if self._lease_coordinator is not None:
+            self._lease_coordinator.release()
+
+    def _leased_players(self) -> list[PlayerKey]:
+        if self._lease_coordinator is None:
+            return self._player_ids
+        return [
+            key
+            for key in self._player_ids
+            if self._lease_coordinator.owns(key)
+        ]
+
+    def _pop_due_leased(
+        self, scheduler: AdaptiveScheduler[PlayerKey]
+    ) -> list[PlayerKey]:
+        due = scheduler.pop_due()
+        if self._lease_coordinator is None:
+            return due
+
+        leased = []
+        for key in due:
+            if self._lease_coordinator.owns(key):
+                leased.append(key)
+            else:
+                # Keep it scheduled in case its lease is taken over later
+                scheduler.postpone(key)
+        return leased
+
+    def _wait_timeout(
+        self, scheduler: AdaptiveScheduler[PlayerKey]
+    ) -> Optional[float]:
+        timeout = scheduler.next_due_in()
+        if self._lease_coordinator is None:
+            return timeout
+
+        renew_in = self._lease_coordinator.renew_in()
+        return renew_in if timeout is None else min(timeout, renew_in)
+
+    def _fetch_since(
+        self, game: Game, player_id: PlayerID
+    ) -> Optional[datetime]:
+        if self._load_storage_ctx is None:
+            return None
+        return self._high_water_marks.get((game, player_id))
+
+    def _fetch_allowed(self, key: PlayerKey, logger: Logger) -> bool:
+        if self._circuit_breaker is None or self._circuit_breaker.allows(key):
+            return True
+
+        logger.info('Skipping player due to repeated failures')
+        return False
+
+    def _on_fetch_error(
+        self, key: PlayerKey, attempt: int, exc: FetchError, logger: Logger
+    ) -> Optional[float]:
+        """
+        Must be called from an exception handler, returns delay before
+        next attempt or `None` if the player should be skipped.
+        """
+        game, player_id = key
+        metrics.FETCH_ERRORS.labels(
+            game.value, repr(player_id), type(exc).__name__
+        ).inc()
+        if self._retry_policy:
+            delay = self._retry_policy.delay(attempt, exc)
+            if delay is not None:
+                logger.warning(
+                    'Fetching player stats failed, retrying',
+                    attempt=attempt,
+                    delay=round(delay, 3),
+                    exc=exc,
+                )
+                return delay
+
+        logger.exception('Skipping player stats due to error', exc=exc)
+        # Throttling is not a fault of the player
+        if self._circuit_breaker and not isinstance(exc, RateLimitedError):
+            if self._circuit_breaker.record_failure(key):
+                logger.warning('Player polling suspended for a while')
+        return None
+
+    def _profile_unchanged(
+        self, key: PlayerKey, matches_played: int, logger: Logger
+    ) -> bool:
+        if (
+            self._matches_played is None
+            or self._matches_played.get(key) != matches_played
+        ):
+            return False
+
+        game, _ = key
+        metrics.UNCHANGED_PROFILES.labels(game.value).inc()
+        logger.info('Player profile is unchanged, skipping matches')
+        return True
+
+    def _remember_matches_played(
+        self,
+        key: PlayerKey,
+        matches_played: Optional[int],
+        matches: Sequence[PlayerMatch],
+    ) -> None:
+        """
+        Counter change is remembered only once fetched matches reflect it,
+        since match history may lag behind counters.
+        """
+        if self._matches_played is None or matches_played is None:
+            return
+
+        if key in self._matches_played:
+            latest = self._high_water_marks.get(key)
+            if not any(
+                latest is None or match.start > latest for match in matches
+            ):
+                return
+        self._matches_played[key] = matches_played
+
+    def _on_fetch_success(self, key: PlayerKey) -> None:
+        if self._circuit_breaker:
+            self._circuit_breaker.record_success(key)
+
+    def _advance_high_water_mark(
+        self, game: Game, player_id: PlayerID, matches: list[PlayerMatch]
+    ) -> int:
+        """Returns number of matches newer than previous high-water mark."""
+        key = (game, player_id)
+        current = self._high_water_marks.get(key)
+        new_starts = [
+            match.start
+            for match in matches
+            if current is None or match.start > current
+        ]
+        if new_starts:
+            self._high_water_marks[key] = max(new_starts)
+        return len(new_starts)
+
+    def _save_player_matches(
+        self, game: Game, player_id: PlayerID, matches: list[PlayerMatch]
+    ) -> int:
+        """
+        Saves player matches in a separate transaction, returns number of
+        new matches.
+        """
+        if not matches:
+            return 0
+
+        self._logger.info(
+            'Saving player stats',
+            game=game,
+            player_id=repr(player_id),
+            num_matches=len(matches),
+        )
+        with metrics.SAVE_SECONDS.time(), self._storage_ctx() as save_storage:
+            saved = save_storage.save_match_series(player_id, matches)
+        metrics.MATCHES_INGESTED.labels(game.value).inc(saved)
+        return self._advance_high_water_mark(game, player_id, matches)
+
+    def _reschedule(
+        self,
+        scheduler: AdaptiveScheduler[PlayerKey],
+        polled: list[PlayerKey],
+        new_matches: dict[PlayerKey, int],
+    ) -> None:
+        # Failed polls are treated as idle ones, so broken players back off
+        for game, player_id in polled:
+            num_new = new_matches.get((game, player_id), 0)
+            interval = scheduler.report((game, player_id), num_new > 0)
+            self._logger.debug(
+                'Player rescheduled',
+                game=game,
+                player_id=repr(player_id),
+                new_matches=num_new,
+                interval=interval,
+            )
+
+
+class Poller(_BasePoller[PlayerAPI]):
+    def regular_pool(self) -> None:
+        with self._log_fatal_errors(), self._executor() as executor:
+            self._load_high_water_marks()
+            self._renew_leases()
+            self._poll(executor, self._leased_players())
 
-        self._logger.info('Starting fetching player stats')
-        for game, player_id in self._player_ids:
-            logger = self._logger.bind(game=game, player_id=repr(player_id))
-            logger.info('Fetching player stats')
+    def run_forever(
+        self,
+        scheduler: AdaptiveScheduler[PlayerKey],
+        stop: threading.Event,
+    ) -> None:
+        """Poll players as they become due until `stop` is set."""
+        with self._log_fatal_errors(), self._executor() as executor:
+            self._load_high_water_marks()
             try:
-                matches = self._api.get_recent_matches(game, player_id)
+                while not stop.is_set():
+                    self._renew_leases()
+                    due = self._pop_due_leased(scheduler)
+                    if not due:
+                        stop.wait(self._wait_timeout(scheduler))
+                        continue
+
+                    new_matches = self._poll(executor, due)
+                    self._reschedule(scheduler, due, new_matches)
+            finally:
+                self._release_leases()
+
+    def _executor(self) -> ThreadPoolExecutor:
+        return ThreadPoolExecutor(
+            max_workers=self._max_in_flight,
+            thread_name_prefix='cst-poller',
+        )
+
+    def _fetch_player_matches(
+        self, game: Game, player_id: PlayerID
+    ) -> Optional[PlayerMatches]:
+        key = (game, player_id)
+        logger = self._logger.bind(game=game, player_id=repr(player_id))
+        if not self._fetch_allowed(key, logger):
+            return None
+
+        since = self._fetch_since(game, player_id)
+        logger.info('Fetching player stats', since=since)
+        matches_played = None
+        for attempt in itertools.count(1):
+            try:
+                if self._matches_played is not None:
+                    matches_played = self._api.get_matches_played(
+                        game, player_id
+                    )
+                    if self._profile_unchanged(key, matches_played, logger):
+                        self._on_fetch_success(key)
+                        return game, player_id, []
+
+                matches = self._api.get_recent_matches(
+                    game, player_id, from_=since
+                )
+                break
             except FetchError as exc:
-                logger.exception('Skipping player stats due to error', exc=exc)
-                continue
-
-            logger.info('Matches info received', num_of_matches=len(matches))
-            players_matches[player_id] = list(matches)
-
-        self._logger.info('Saving players stats')
-        with self._storage_ctx() as save_storage:
-            for player_id, matches in players_matches.items():
-                self._logger.info(
-                    'Saving player stats',
-                    player_id=repr(player_id),
-                    num_matches=len(matches),
+                delay = self._on_fetch_error(key, attempt, exc, logger)
+                if delay is None:
+                    return None
+            time.sleep(delay)
+
+        self._on_fetch_success(key)
+        self._remember_matches_played(key, matches_played, matches)
+        logger.info('Matches info received', num_of_matches=len(matches))
+        return game, player_id, list(matches)
+
+    def _poll(
+        self, executor: ThreadPoolExecutor, players: list[PlayerKey]
+    ) -> dict[PlayerKey, int]:
+        """
+        Fetches players concurrently and saves every fetched series as soon
+        as it is ready, while other fetches are still in progress.
+        Returns number of new matches of every successfully polled player.
+        """
+        self._logger.info(
+            'Starting polling player stats',
+            num_of_players=len(players),
+            max_in_flight=self._max_in_flight,
+        )
+        with metrics.POLL_CYCLE_SECONDS.time():
+            return self._poll_pipeline(executor, players)
+
+    def _poll_pipeline(
+        self, executor: ThreadPoolExecutor, players: list[PlayerKey]
+    ) -> dict[PlayerKey, int]:
+        new_matches = {}
+        players_left = iter(players)
+        # Fetched but not saved series are bounded by submission window
+        window = self._max_in_flight + self._save_queue_size
+        pending: set[Future[Optional[PlayerMatches]]] = set()
+        try:
+            while True:
+                for game, player_id in islice(
+                    players_left, window - len(pending)
+                ):
+                    pending.add(
+                        executor.submit(
+                            self._fetch_player_matches, game, player_id
+                        )
+                    )
+                if not pending:
+                    break
+
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    fetched = future.result()
+                    if fetched is None:
+                        continue
+                    game, player_id, _ = fetched
+                    new_matches[game, player_id] = self._save_player_matches(
+                        *fetched
+                    )
+        except BaseException:
+            # Do not let queued fetches run after unrecoverable error
+            for future in pending:
+                future.cancel()
+            raise
+
+        return new_matches
+
+
+class AsyncPoller(_BasePoller[AsyncPlayerAPI]):
+    """
+    Asyncio counterpart of `Poller`: all fetches run on a single event loop,
+    `max_in_flight` bounds the number of concurrent requests.
+    Storage is synchronous, so saving is offloaded to the default executor.
+    """
+
+    async def regular_pool(self) -> None:
+        with self._log_fatal_errors():
+            await self._run_in_executor(self._load_high_water_marks)
+            await self._run_in_executor(self._renew_leases)
+            await self._poll(self._leased_players())
+
+    async def run_forever(
+        self,
+        scheduler: AdaptiveScheduler[PlayerKey],
+        stop: asyncio.Event,
+    ) -> None:
+        """Poll players as they become due until `stop` is set."""
+        with self._log_fatal_errors():
+            await self._run_in_executor(self._load_high_water_marks)
+            try:
+                while not stop.is_set():
+                    await self._run_in_executor(self._renew_leases)
+                    due = self._pop_due_leased(scheduler)
+                    if not due:
+                        try:
+                            await asyncio.wait_for(
+                                stop.wait(), self._wait_timeout(scheduler)
+                            )
+                        except asyncio.TimeoutError:
+                            pass
+                        continue
+
+                    new_matches = await self._poll(due)
+                    self._reschedule(scheduler, due, new_matches)
+            finally:
+                await self._run_in_executor(self._release_leases)
+
+    @staticmethod
+    async def _run_in_executor(func: Callable[..., T], *args: Any) -> T:
+        return await asyncio.get_running_loop().run_in_executor(
+            None, func, *args
+        )
+
+    async def _fetch_player_matches(
+        self, in_flight: asyncio.Semaphore, game: Game, player_id: PlayerID
+    ) -> Optional[PlayerMatches]:
+        key = (game, player_id)
+        logger = self._logger.bind(game=game, player_id=repr(player_id))
+        if not self._fetch_allowed(key, logger):
+            return None
+
+        async with in_flight:
+            since = self._fetch_since(game, player_id)
+            logger.info('Fetching player stats', since=since)
+            matches_played = None
+            for attempt in itertools.count(1):
+                try:
+                    if self._matches_played is not None:
+                        matches_played = await self._api.get_matches_played(
+                            game, player_id
+                        )
+                        if self._profile_unchanged(
+                            key, matches_played, logger
+                        ):
+                            self._on_fetch_success(key)
+                            return game, player_id, []
+
+                    matches = await self._api.get_recent_matches(
+                        game, player_id, from_=since
+                    )
+                    break
+                except FetchError as exc:
+                    delay = self._on_fetch_error(key, attempt, exc, logger)
+                    if delay is None:
+                        return None
+                await asyncio.sleep(delay)
+
+        self._on_fetch_success(key)
+        self._remember_matches_played(key, matches_played, matches)
+        logger.info('Matches info received', num_of_matches=len(matches))
+        return game, player_id, list(matches)
+
+    async def _poll(self, players: list[PlayerKey]) -> dict[PlayerKey, int]:
+        """
+        Same pipeline as `Poller._poll`: series are saved in executor as soon
+        as they are fetched, while other fetches go on in the event loop.
+        """
+        self._logger.info(
+            'Starting polling player stats',
+            num_of_players=len(players),
+            max_in_flight=self._max_in_flight,
+        )
+        with metrics.POLL_CYCLE_SECONDS.time():
+            return await self._poll_pipeline(players)
+
+    async def _poll_pipeline(
+        self, players: list[PlayerKey]
+    ) -> dict[PlayerKey, int]:
+        new_matches = {}
+        in_flight = asyncio.Semaphore(self._max_in_flight)
+        players_left = iter(players)
+        window = self._max_in_flight + self._save_queue_size
+        pending: set[asyncio.Task[Optional[PlayerMatches]]] = set()
+        try:
+            while True:
+                for game, player_id in islice(
+                    players_left, window - len(pending)
+                ):
+                    pending.add(
+                        asyncio.ensure_future(
+                            self._fetch_player_matches(
+                                in_flight, game, player_id
+                            )
+                        )
+                    )
+                if not pending:
+                    break
+
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
                 )
-                save_storage.save_match_series(player_id, matches)
+                for task in done:
+                    fetched = task.result()
+                    if fetched is None:
+                        continue
+                    game, player_id, _ = fetched
+                    new_matches[game, player_id] = await self._run_in_executor(
+                        self._save_player_matches, *fetched
+                    )
+        except BaseException:
+            for task in pending:
+                task.cancel()
+            raise
+
+        return new_matches
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import time
+from datetime import timedelta
+from typing import TYPE_CHECKING, Callable, Optional, Sequence
+
+from codstattracker.api.models import Game, PlayerID
+from codstattracker.storage.interfaces import LeaseStorage, StorageContext
+
+if TYPE_CHECKING:
+    from loguru import Logger
+
+PlayerKey = tuple[Game, PlayerID]
+
+
+class LeaseCoordinator:
+    """
+    Shards players among poller processes sharing the same storage.
+
+    Every poller polls only players it holds leases on. Leases are renewed
+    every `renew_interval` seconds (a third of `ttl` by default), so
+    players of a poller which stopped renewing are taken over by others
+    once `ttl` passes, and a joined poller gets its fair share within
+    a couple of renewals.
+    """
+
+    def __init__(
+        self,
+        storage_ctx: StorageContext[LeaseStorage],
+        owner: str,
+        ttl: float,
+        logger: Logger,
+        renew_interval: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        renew_interval = ttl / 3 if renew_interval is None else renew_interval
+        if not 0 < renew_interval < ttl:
+            raise ValueError('Leases must be renewed before they expire')
+
+        self._storage_ctx = storage_ctx
+        self._owner = owner
+        self._ttl = timedelta(seconds=ttl)
+        self._logger = logger.bind(poller_id=owner)
+        self._renew_interval = renew_interval
+        self._clock = clock
+        self._leased: frozenset[PlayerKey] = frozenset()
+        self._renew_at: Optional[float] = None
+
+    def renew_in(self) -> float:
+        """Seconds until leases should be renewed."""
+        if self._renew_at is None:
+            return 0.0
+        return max(0.0, self._renew_at - self._clock())
+
+    def renew(self, players: Sequence[PlayerKey]) -> None:
+        """Renew and rebalance leases if it is time to."""
+        if self.renew_in() > 0:
+            return
+
+        with self._storage_ctx() as lease_storage:
+            leased = lease_storage.claim_leases(
+                self._owner, players, self._ttl
+            )
+        self._leased = frozenset(leased)
+        self._renew_at = self._clock() + self._renew_interval
+        self._logger.info(
+            'Player leases renewed',
+            num_of_leased=len(self._leased),
+            num_of_players=len(players),
+        )
+
+    def owns(self, key: PlayerKey) -> bool:
+        return key in self._leased
+
+    def release(self) -> None:
+        with self._storage_ctx() as lease_storage:
+            lease_storage.release_leases(self._owner)
+        self._leased = frozenset()
+        self._renew_at = None
+        self._logger.info('Player leases released')
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import random
+import threading
+import time
+from typing import Callable, Generic, Hashable, Optional, TypeVar
+
+from codstattracker.api.exceptions import (
+    FetchError,
+    PlayerNotFoundError,
+    RateLimitedError,
+)
+
+K = TypeVar('K', bound=Hashable)
+
+
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter for recoverable fetch errors.
+
+    Missing players are never retried, throttled requests wait at least
+    as long as upstream asked to.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 1.0,
+        max_delay: float = 30.0,
+        jitter: Callable[[], float] = random.random,
+    ):
+        if max_attempts < 1:
+            raise ValueError('At least one attempt must be allowed')
+
+        self._max_attempts = max_attempts
+        self._base_delay = base_delay
+        self._max_delay = max_delay
+        self._jitter = jitter
+
+    def delay(self, attempt: int, exc: FetchError) -> Optional[float]:
+        """
+        Delay before next attempt after `attempt` (starting from 1) failed
+        with `exc`, `None` means no more attempts should be made.
+        """
+        if attempt >= self._max_attempts:
+            return None
+        if isinstance(exc, PlayerNotFoundError):
+            return None
+
+        backoff = min(self._max_delay, self._base_delay * 2 ** (attempt - 1))
+        delay = backoff * self._jitter()
+        if isinstance(exc, RateLimitedError) and exc.retry_after:
+            delay = max(delay, exc.retry_after)
+        return delay
+
+
+class CircuitBreaker(Generic[K]):
+    """
+    Per-key circuit breaker.
+
+    After `failure_threshold` consecutive failures the key is not allowed
+    for `cooldown` seconds. Once cooldown passes a single trial is allowed,
+    its failure opens the circuit again right away.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        cooldown: float = 3600,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if failure_threshold < 1:
+            raise ValueError('Failure threshold must be positive')
+
+        self._failure_threshold = failure_threshold
+        self._cooldown = cooldown
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._failures: dict[K, int] = {}
+        self._open_until: dict[K, float] = {}
+
+    def allows(self, key: K) -> bool:
+        with self._lock:
+            open_until = self._open_until.get(key)
+            return open_until is None or open_until <= self._clock()
+
+    def record_success(self, key: K) -> None:
+        with self._lock:
+            self._failures.pop(key, None)
+            self._open_until.pop(key, None)
+
+    def record_failure(self, key: K) -> bool:
+        """Returns `True` if the circuit of the key is opened."""
+        with self._lock:
+            failures = self._failures.get(key, 0) + 1
+            self._failures[key] = failures
+            if failures < self._failure_threshold:
+                return False
+
+            self._open_until[key] = self._clock() + self._cooldown
+            return True
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import heapq
+import itertools
+import time
+from typing import Callable, Generic, Hashable, Iterable, Optional, TypeVar
+
+K = TypeVar('K', bound=Hashable)
+
+
+class AdaptiveScheduler(Generic[K]):
+    """
+    Keeps every key (player) on its own polling interval.
+
+    Interval of a key which just produced new data is multiplied by
+    `speedup_factor`, interval of an idle key is multiplied by
+    `backoff_factor`, both clamped into `[min_interval, max_interval]`.
+    Popped keys are not scheduled again until their poll is reported.
+    """
+
+    def __init__(
+        self,
+        keys: Iterable[K],
+        min_interval: float,
+        max_interval: float,
+        initial_interval: Optional[float] = None,
+        speedup_factor: float = 0.5,
+        backoff_factor: float = 2.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if not 0 < min_interval <= max_interval:
+            raise ValueError('Intervals must satisfy 0 < min <= max')
+        if not 0 < speedup_factor <= 1 <= backoff_factor:
+            raise ValueError(
+                'Factors must satisfy 0 < speedup_factor <= 1 <= '
+                'backoff_factor'
+            )
+
+        self._min_interval = min_interval
+        self._max_interval = max_interval
+        self._speedup_factor = speedup_factor
+        self._backoff_factor = backoff_factor
+        self._clock = clock
+
+        initial_interval = self._clamp(
+            initial_interval if initial_interval is not None else min_interval
+        )
+        self._intervals: dict[K, float] = {}
+        self._queue: list[tuple[float, int, K]] = []
+        self._seq = itertools.count()
+
+        now = clock()
+        for key in keys:
+            if key in self._intervals:
+                continue
+            self._intervals[key] = initial_interval
+            self._push(now, key)
+
+    def _clamp(self, interval: float) -> float:
+        return max(self._min_interval, min(self._max_interval, interval))
+
+    def _push(self, due: float, key: K) -> None:
+        heapq.heappush(self._queue, (due, next(self._seq), key))
+
+    def interval(self, key: K) -> float:
+        return self._intervals[key]
+
+    def pop_due(self) -> list[K]:
+        """Pop keys which should be polled now."""
+        now = self._clock()
+        due = []
+        while self._queue and self._queue[0][0] <= now:
+            _, _, key = heapq.heappop(self._queue)
+            due.append(key)
+        return due
+
+    def next_due_in(self) -> Optional[float]:
+        """
+        Seconds until the nearest scheduled poll, `None` if nothing
+        is scheduled.
+        """
+        if not self._queue:
+            return None
+        return max(0.0, self._queue[0][0] - self._clock())
+
+    def report(self, key: K, has_new_data: bool) -> float:
+        """Reschedule polled key, returns its new interval."""
+        factor = self._speedup_factor if has_new_data else self._backoff_factor
+        interval = self._clamp(self._intervals[key] * factor)
+        self._intervals[key] = interval
+        self._push(self._clock() + interval, key)
+        return interval
+
+    def postpone(self, key: K) -> None:
+        """Reschedule popped key which was not polled, keeping interval."""
+        self._push(self._clock() + self._intervals[key], key)
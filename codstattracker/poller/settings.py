@@ -1,7 +1,18 @@
 import re
-from typing import Callable, Iterable, List, Pattern, Tuple, Type
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import (
+    Callable,
+    Iterable,
+    List,
+    Literal,
+    Optional,
+    Pattern,
+    Tuple,
+    Type,
+)
 
-from pydantic import BaseModel
+from pydantic import BaseModel, root_validator, validator
 from pydantic.validators import str_validator
 
 from codstattracker.api.models import Game
@@ -30,9 +41,107 @@ class PlayerID(_PlayerID):
         yield from _create_validators(_PlayerID, cls.pattern)
 
 
+class RateLimit(BaseModel):
+    #: Initial requests rate, requests per second
+    requests_per_second: float = 2.0
+
+    #: Number of requests which may be sent at once after idle period
+    burst: int = 5
+
+    #: Lowest rate throttling responses may slow requests down to
+    min_requests_per_second: float = 0.1
+
+    #: Highest rate requests may speed up to while upstream does not
+    #: throttle, rate is probed upwards till throttling responses tell
+    #: where upstream limit is
+    max_requests_per_second: float = 10.0
+
+    #: Rate multiplier applied on every throttled response
+    decrease_factor: float = 0.5
+
+    #: Rate increase after every successful response, requests per second
+    increase_step: float = 0.05
+
+
+class Transport(BaseModel):
+    #: Max number of kept connections to API host, defaults to
+    #: `polling.max_in_flight`
+    pool_size: Optional[int] = None
+
+    #: Reuse connections between requests, saves TLS handshakes
+    keep_alive: bool = True
+
+    #: Timeout of establishing connection, seconds
+    connect_timeout: Optional[float] = 5.0
+
+    #: Timeout of waiting for response data, seconds
+    read_timeout: Optional[float] = 30.0
+
+    #: Accepted response compression, "br" requires brotli package
+    accept_encoding: List[str] = ['gzip', 'deflate']
+
+    #: Negotiate HTTP/2, requires "http2" extra to be installed and is not
+    #: supported with `polling.use_asyncio`
+    http2: bool = False
+
+
+class Cassette(BaseModel):
+    #: Archive responses are recorded into or replayed from
+    path: Path
+
+    #: "record" every received response, or "replay" recorded responses
+    #: without requesting my.callofduty.com
+    mode: Literal['record', 'replay']
+
+    #: Replay responses with recorded latency instead of immediately
+    realtime: bool = False
+
+
 class API(BaseModel):
     #: my.callofduty.com auth cookie value (named "ACT_SSO_COOKIE")
-    auth_cookie: str
+    auth_cookie: Optional[str] = None
+
+    #: More auth cookies of other accounts, requests are spread among all
+    #: of them and every one has its own rate limit, a cookie which is
+    #: not authenticated anymore is no longer used
+    auth_cookies: List[str] = []
+
+    #: Client-side rate limiting of API requests, requests are limited by
+    #: `polling.max_in_flight` only if omitted
+    rate_limit: Optional[RateLimit] = None
+
+    #: HTTP connections parameters
+    transport: Transport = Transport()
+
+    #: Number of remembered response fingerprints, polls receiving
+    #: a response unchanged since the previous poll skip decoding and
+    #: saving it, `0` disables
+    fingerprint_cache_size: int = 10_000
+
+    #: Every Nth matches response is validated against the full schema to
+    #: catch upstream changes, the rest are converted straight from
+    #: decoded JSON, `1` validates every response
+    validate_every: int = 20
+
+    #: Number of worker processes matches responses are decoded, validated
+    #: and converted in, lets parsing use more than one core once network
+    #: is no longer the bottleneck, `0` parses in the polling process
+    parse_processes: int = 0
+
+    #: Record or replay API responses, not supported with
+    #: `polling.use_asyncio`
+    cassette: Optional[Cassette] = None
+
+    @property
+    def credentials(self) -> List[str]:
+        cookies = [self.auth_cookie] if self.auth_cookie else []
+        return list(dict.fromkeys(cookies + self.auth_cookies))
+
+    @root_validator(skip_on_failure=True)
+    def _require_credentials(cls, values: dict) -> dict:
+        if not values.get('auth_cookie') and not values.get('auth_cookies'):
+            raise ValueError('At least one auth cookie is required')
+        return values
 
 
 class DB(BaseModel):
@@ -42,6 +151,121 @@ class DB(BaseModel):
     #: Save matches log
     save_matches_log: bool
 
+    #: Compress matches log sources with "gzip" or "zstd" (requires "zstd"
+    #: extra), identical sources are stored once, `null` saves plain JSON
+    matches_log_codec: Optional[str] = None
+
+
+class Schedule(BaseModel):
+    #: Polling interval of every player at daemon startup, seconds
+    initial_interval: float = 900
+
+    #: Shortest polling interval of an active player, seconds
+    min_interval: float = 300
+
+    #: Longest polling interval of an idle player, seconds
+    max_interval: float = 6 * 60 * 60
+
+    #: Interval multiplier applied after a poll brought new matches
+    speedup_factor: float = 0.5
+
+    #: Interval multiplier applied after a poll without new matches
+    backoff_factor: float = 1.5
+
+
+class Retry(BaseModel):
+    #: Max number of attempts to fetch player stats, `1` disables retries
+    max_attempts: int = 3
+
+    #: Backoff delay before the first retry, doubled for every next one,
+    #: actual delay is randomly jittered below it, seconds
+    base_delay: float = 1.0
+
+    #: Upper bound of backoff delay, seconds
+    max_delay: float = 30.0
+
+
+class CircuitBreaker(BaseModel):
+    #: Number of consecutive failed polls which suspends player polling
+    failure_threshold: int = 5
+
+    #: For how long polling of a failing player is suspended, seconds
+    cooldown: float = 6 * 60 * 60
+
+
+class Coordination(BaseModel):
+    #: Name of this poller, must be unique among pollers sharing
+    #: the database and stable across restarts of one-shot runs
+    poller_id: str
+
+    #: For how long a player stays leased to a poller without renewal,
+    #: must exceed the longest polling pass (and the period between
+    #: one-shot runs), seconds
+    lease_ttl: float = 30 * 60
+
+
+class Polling(BaseModel):
+    #: Max number of players fetched concurrently, `1` means sequential
+    max_in_flight: int = 1
+
+    #: Max number of fetched player series waiting to be saved, fetching
+    #: pauses when storage lags behind
+    save_queue_size: int = 10
+
+    #: Poll players from a single asyncio event loop instead of threads,
+    #: requires "async" extra to be installed
+    use_asyncio: bool = False
+
+    #: Request only matches started since the latest stored one
+    incremental: bool = True
+
+    #: Request player profile first and skip requesting matches while its
+    #: played matches counter is unchanged, profile is much lighter
+    precheck_profile: bool = False
+
+    #: Per-player polling intervals of daemon mode
+    schedule: Schedule = Schedule()
+
+    #: Retries of recoverable fetch errors
+    retry: Retry = Retry()
+
+    #: Suspension of players which keep failing in daemon mode, disabled
+    #: if omitted, one-shot runs don't keep failures between runs and
+    #: never suspend players
+    circuit_breaker: Optional[CircuitBreaker] = CircuitBreaker()
+
+    #: Shards players among several pollers through leases stored in
+    #: the database, every poller polls all players if omitted
+    coordination: Optional[Coordination] = None
+
+
+class Backfill(BaseModel):
+    #: Moment history is backfilled down to, defaults to the release date
+    #: of Modern Warfare (2019)
+    since: datetime = datetime(2019, 10, 25, tzinfo=timezone.utc)
+
+    #: Period of history requested at once, seconds
+    window: float = 7 * 24 * 60 * 60
+
+    #: Max number of matches API returns for a single request
+    page_size: int = 20
+
+
+class Metrics(BaseModel):
+    #: Local port metrics are served on in Prometheus text format
+    port: Optional[int] = None
+
+    #: Address metrics are served on, metrics carry player names, so they
+    #: are served to local host only unless explicitly exposed
+    addr: str = '127.0.0.1'
+
+    #: File metrics are written into in Prometheus text format, suitable
+    #: for node exporter textfile collector
+    textfile: Optional[Path] = None
+
+    #: How often metrics textfile is rewritten, seconds
+    textfile_interval: float = 15
+
 
 class Settings(BaseAppSettings):
     #: Database connection parameters
@@ -50,5 +274,20 @@ class Settings(BaseAppSettings):
     #: API-settings
     api: API
 
-    #: list of processed players with mode
+    #: list of processed players with mode, duplicates are polled once
     players_to_poll: List[Tuple[Game, PlayerID]]
+
+    #: Polling parameters
+    polling: Polling = Polling()
+
+    #: Historical backfill parameters
+    backfill: Backfill = Backfill()
+
+    #: Metrics exposition, disabled by default
+    metrics: Metrics = Metrics()
+
+    @validator('players_to_poll')
+    def _drop_duplicate_players(
+        cls, players: List[Tuple[Game, PlayerID]]
+    ) -> List[Tuple[Game, PlayerID]]:
+        return list(dict.fromkeys(players))
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+from typing import Any
+
+CODECS = ('gzip', 'zstd')
+
+
+def encode_json(value: Any) -> bytes:
+    """Canonical encoding, so equal values have equal digests."""
+    return json.dumps(
+        value, sort_keys=True, separators=(',', ':'), ensure_ascii=False
+    ).encode()
+
+
+def content_digest(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def check_codec(codec: str) -> None:
+    if codec not in CODECS:
+        raise ValueError(
+            f'Unknown codec {codec!r}, expected one of {", ".join(CODECS)}'
+        )
+    if codec == 'zstd':
+        try:
+            import zstandard  # noqa: F401
+        except ImportError:
+            raise ValueError('"zstd" codec requires "zstd" extra')
+
+
+def compress(data: bytes, codec: str) -> bytes:
+    if codec == 'zstd':
+        import zstandard
+
+        return zstandard.ZstdCompressor().compress(data)
+    return gzip.compress(data)
+
+
+def decompress(data: bytes, codec: str) -> bytes:
+    if codec == 'zstd':
+        import zstandard
+
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
@@ -1,4 +1,6 @@
-from datetime import datetime
+from __future__ import annotations
+
+from datetime import datetime, timedelta
 from typing import (
     Callable,
     ContextManager,
@@ -19,7 +21,8 @@ StorageContext = Callable[[], ContextManager[SC]]
 class SaveStorage(Protocol):
     def save_match_series(
         self, player_id: PlayerID, match_series: Sequence[PlayerMatch]
-    ) -> None:
+    ) -> int:
+        """Returns number of saved matches, stored ones are skipped."""
         raise NotImplementedError
 
 
@@ -32,3 +35,46 @@ class LoadStorage(Protocol):
         until: Optional[datetime] = None,
     ) -> Sequence[PlayerMatch]:
         raise NotImplementedError
+
+    def load_last_match_starts(
+        self,
+    ) -> dict[tuple[Game, PlayerID], datetime]:
+        """
+        Start time (timezone-aware, UTC) of the latest stored match of every
+        known player per game.
+        """
+        raise NotImplementedError
+
+
+class BackfillStorage(SaveStorage, Protocol):
+    def load_backfill_cursor(
+        self, game: Game, player_id: PlayerID
+    ) -> Optional[datetime]:
+        """
+        Moment (timezone-aware, UTC) player history is already backfilled
+        down to, `None` if backfill has never started.
+        """
+        raise NotImplementedError
+
+    def save_backfill_cursor(
+        self, game: Game, player_id: PlayerID, cursor: datetime
+    ) -> None:
+        raise NotImplementedError
+
+
+class LeaseStorage(Protocol):
+    def claim_leases(
+        self,
+        owner: str,
+        players: Sequence[tuple[Game, PlayerID]],
+        ttl: timedelta,
+    ) -> list[tuple[Game, PlayerID]]:
+        """
+        Renews leases of `owner` and claims free or expired ones up to a fair
+        share of `players` among live owners, leases above the share are
+        released. Returns players leased to `owner` for `ttl` from now.
+        """
+        raise NotImplementedError
+
+    def release_leases(self, owner: str) -> None:
+        raise NotImplementedError
@@ -1,4 +1,6 @@
 from codstattracker.storage.sql.storages import (  # noqa: F401
+    BackfillStorage,
+    LeaseStorage,
     LoadStorage,
     SaveStorage,
     StorageContext,
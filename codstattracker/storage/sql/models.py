@@ -1,10 +1,24 @@
 from __future__ import annotations
 
-from typing import Any, Optional
+import json
+from typing import Any, Optional, Type
 
-from sqlalchemy import JSON, Boolean, Column, DateTime
+from sqlalchemy import (
+    JSON,
+    Boolean,
+    Column,
+    DateTime,
+)
 from sqlalchemy import Enum as SEnum
-from sqlalchemy import Float, ForeignKey, Integer, Interval, String, and_
+from sqlalchemy import (
+    Float,
+    ForeignKey,
+    Integer,
+    Interval,
+    LargeBinary,
+    String,
+    and_,
+)
 from sqlalchemy.orm import RelationshipProperty, relationship
 from sqlalchemy.schema import UniqueConstraint
 
@@ -17,11 +31,12 @@ from codstattracker.api.models import (
     WeaponStats,
 )
 from codstattracker.base_model import Model
+from codstattracker.storage import blobs
 from codstattracker.storage.sql.ext import Base
 
 
-def _select_model_fields(model: Model, **fields: Any) -> dict[str, Any]:
-    model_fields = {field.name for field in model.all_fields()}
+def _select_model_fields(model: Type[Model], **fields: Any) -> dict[str, Any]:
+    model_fields = model.all_field_names()
     return {
         name: value for name, value in fields.items() if name in model_fields
     }
@@ -164,11 +179,81 @@ class PlayerMatchModel(PlayerMatch, MatchStats, Base):
         self.game = game
 
 
+class PlayerMatchRequestModel(Base):
+    db_id = Column(Integer, primary_key=True)
+    meta = Column(JSON, nullable=False)
+
+    __tablename__ = 'player_matches_requests'
+
+
+class LogBlobModel(Base):
+    digest = Column(String, primary_key=True)
+    codec = Column(String, nullable=False)
+    data = Column(LargeBinary, nullable=False)
+
+    __tablename__ = 'log_blobs'
+
+    def load(self) -> Any:
+        return json.loads(blobs.decompress(self.data, self.codec))
+
+
 class PlayerMatchLogModel(Base):
     match_id = Column(
         String, ForeignKey(PlayerMatchModel.id), primary_key=True
     )
-    source = Column(JSON, nullable=False)
-    meta = Column(JSON, nullable=False)
+    #: Source saved uncompressed
+    plain_source = Column('source', JSON(none_as_null=True), nullable=True)
+    source_digest = Column(
+        String, ForeignKey(LogBlobModel.digest), nullable=True
+    )
+    #: Request meta of logs saved before it was shared by matches
+    meta = Column(JSON, nullable=True)
+    request_id = Column(
+        Integer, ForeignKey(PlayerMatchRequestModel.db_id), nullable=True
+    )
+
+    request = relationship(PlayerMatchRequestModel, uselist=False)
+    source_blob = relationship(LogBlobModel, uselist=False)
 
     __tablename__ = 'player_matches_logs'
+
+    @property
+    def source(self) -> Any:
+        if self.source_blob is not None:
+            return self.source_blob.load()
+        return self.plain_source
+
+    @source.setter
+    def source(self, value: Any) -> None:
+        self.plain_source = value
+
+
+class PollerMemberModel(Base):
+    owner = Column(String, primary_key=True)
+    expires_at = Column(DateTime, nullable=False)
+
+    __tablename__ = 'poller_members'
+
+
+class PlayerLeaseModel(Base):
+    game = Column(SEnum(Game), primary_key=True)
+    platform = Column(String, primary_key=True)
+    nickname = Column(String, primary_key=True)
+    id = Column(String, primary_key=True)
+    owner = Column(String, nullable=True)
+    expires_at = Column(DateTime, nullable=True)
+
+    __tablename__ = 'player_leases'
+
+    def player_key(self) -> tuple[Game, PlayerID]:
+        return self.game, PlayerID(self.platform, self.nickname, self.id)
+
+
+class BackfillCheckpointModel(Base):
+    game = Column(SEnum(Game), primary_key=True)
+    platform = Column(String, primary_key=True)
+    nickname = Column(String, primary_key=True)
+    id = Column(String, primary_key=True)
+    cursor = Column(DateTime, nullable=False)
+
+    __tablename__ = 'backfill_checkpoints'
@@ -1,5 +1,7 @@
+import math
+from collections import defaultdict
 from contextlib import contextmanager
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from functools import wraps
 from typing import (
     Any,
@@ -9,29 +11,43 @@ from typing import (
     Iterable,
     Optional,
     Sequence,
+    Type,
     TypeVar,
     cast,
 )
 
+from sqlalchemy import and_, func, or_
 from sqlalchemy.engine import Engine
-from sqlalchemy.exc import DisconnectionError
+from sqlalchemy.exc import DisconnectionError, IntegrityError
 
 from codstattracker.api.models import (
+    BattleRoyaleStats,
     Game,
     MatchStats,
     PlayerID,
     PlayerMatch,
     WeaponStats,
 )
-from codstattracker.base_model import TrackableEntity
+from codstattracker.base_model import Model, TrackableEntity
+from codstattracker.storage import blobs
 from codstattracker.storage.exceptions import StorageIOError
+from codstattracker.storage.interfaces import (
+    BackfillStorage as _BackfillStorage,
+)
+from codstattracker.storage.interfaces import LeaseStorage as _LeaseStorage
 from codstattracker.storage.interfaces import LoadStorage as _LoadStorage
 from codstattracker.storage.interfaces import SaveStorage as _SaveStorage
-from codstattracker.storage.sql.ext import Session
+from codstattracker.storage.sql.ext import Base, Session
 from codstattracker.storage.sql.models import (
+    BackfillCheckpointModel,
+    BrStatsModel,
+    LogBlobModel,
+    PlayerLeaseModel,
     PlayerMatchLogModel,
     PlayerMatchModel,
+    PlayerMatchRequestModel,
     PlayerModel,
+    PollerMemberModel,
     WeaponStatsModel,
 )
 
@@ -69,6 +85,11 @@ def _reraise_disconnection_error(func: C) -> C:
     return cast(C, wrapper)
 
 
+def _model_columns(db_model: Type[Base], model: Type[Model]) -> list[Any]:
+    """Columns of `db_model` in order of `model` fields."""
+    return [getattr(db_model, field.name) for field in model.all_fields()]
+
+
 class LoadStorage(_LoadStorage):
     def __init__(self, session: Session):
         self._session = session
@@ -81,21 +102,127 @@ class LoadStorage(_LoadStorage):
         from_: Optional[datetime] = None,
         until: Optional[datetime] = None,
     ) -> Sequence[PlayerMatch]:
-        query = self._session.query(PlayerMatchModel).filter(
-            PlayerMatchModel.game == game, PlayerMatchModel.player == player_id
-        )
+        """
+        Matches are built from selected columns as plain models, ORM
+        instances would keep their loaded state and session bookkeeping
+        alive for as long as the result is held.
+        """
+        filters = [
+            PlayerMatchModel.game == game,
+            PlayerMatchModel.player == player_id,
+        ]
         if from_:
-            query = query.filter(PlayerMatchModel.start >= from_)
+            filters.append(PlayerMatchModel.start >= from_)
         if until:
-            query = query.filter(PlayerMatchModel.start <= until)
+            filters.append(PlayerMatchModel.start <= until)
+
+        weapon_stats: dict[str, list[WeaponStats]] = defaultdict(list)
+        for match_id, *values in self._query_columns(
+            WeaponStatsModel, WeaponStats, filters
+        ):
+            weapon_stats[match_id].append(WeaponStats(*values))
+        br_stats = {
+            match_id: BattleRoyaleStats(*values)
+            for match_id, *values in self._query_columns(
+                BrStatsModel, BattleRoyaleStats, filters
+            )
+        }
+
+        stats_columns = _model_columns(PlayerMatchModel, MatchStats)
+        matches = []
+        for id_, start, end, map_, is_win, *values in (
+            self._session.query(
+                PlayerMatchModel.id,
+                PlayerMatchModel.start,
+                PlayerMatchModel.end,
+                PlayerMatchModel.map,
+                PlayerMatchModel.is_win,
+                *stats_columns,
+            )
+            .filter(*filters)
+            .order_by(PlayerMatchModel.start)
+        ):
+            matches.append(
+                PlayerMatch(
+                    id=id_,
+                    game=game,
+                    start=start,
+                    end=end,
+                    map=map_,
+                    is_win=is_win,
+                    stats=MatchStats(*values),
+                    weapon_stats=weapon_stats.pop(id_, []),
+                    br_stats=br_stats.pop(id_, None),
+                )
+            )
+        return matches
+
+    def _query_columns(
+        self,
+        db_model: Type[Base],
+        model: Type[Model],
+        match_filters: Sequence[Any],
+    ) -> Iterable[tuple[Any, ...]]:
+        """Match id and `model` fields of stats related to filtered matches."""
+        return (
+            self._session.query(
+                db_model.match_id,  # type: ignore
+                *_model_columns(db_model, model),
+            )
+            .join(PlayerMatchModel)
+            .filter(*match_filters)
+            .order_by(db_model.id)  # type: ignore
+        )
 
-        return query.order_by(PlayerMatchModel.start).all()
+    @_reraise_disconnection_error
+    def load_last_match_starts(
+        self,
+    ) -> dict[tuple[Game, PlayerID], datetime]:
+        query = (
+            self._session.query(
+                PlayerMatchModel.game,
+                PlayerModel.platform,
+                PlayerModel.nickname,
+                PlayerModel.id,
+                func.max(PlayerMatchModel.start),
+            )
+            .join(PlayerMatchModel.player)
+            .group_by(
+                PlayerMatchModel.game,
+                PlayerModel.platform,
+                PlayerModel.nickname,
+                PlayerModel.id,
+            )
+        )
+        return {
+            (game, PlayerID(platform, nickname, id_)): (
+                # Timezone is not preserved by some backends, while matches
+                # are always saved in UTC
+                last_start.replace(tzinfo=timezone.utc)
+                if last_start.tzinfo is None
+                else last_start
+            )
+            for game, platform, nickname, id_, last_start in query.all()
+        }
 
 
 class SaveStorage(_SaveStorage):
-    def __init__(self, session: Session, save_matches_logs: bool = False):
+    def __init__(
+        self,
+        session: Session,
+        save_matches_logs: bool = False,
+        logs_codec: Optional[str] = None,
+    ):
+        """
+        :param logs_codec: matches log sources are saved compressed with
+            given codec, keyed by content digest, so identical sources are
+            stored once
+        """
+        if logs_codec is not None:
+            blobs.check_codec(logs_codec)
         self._session = session
         self._save_matches_logs = save_matches_logs
+        self._logs_codec = logs_codec
 
     def _model_to_db(
         self, match: PlayerMatch, player: PlayerModel
@@ -119,24 +246,74 @@ class SaveStorage(_SaveStorage):
 
         return inner(**match.as_dict_flat(PlayerMatch))
 
-    @staticmethod
+    def _compress_sources(
+        self, sources: Iterable[Any], codec: str
+    ) -> list[str]:
+        """Saves missing blobs, returns digests of given sources."""
+        encoded = [blobs.encode_json(source) for source in sources]
+        digests = [blobs.content_digest(data) for data in encoded]
+        if not digests:
+            return digests
+
+        saved_digests = set(
+            digest
+            for digest, in self._session.query(LogBlobModel.digest)
+            .filter(LogBlobModel.digest.in_(set(digests)))
+            .all()
+        )
+        for digest, data in zip(digests, encoded):
+            if digest in saved_digests:
+                continue
+            saved_digests.add(digest)
+            self._session.add(
+                LogBlobModel(
+                    digest=digest,
+                    codec=codec,
+                    data=blobs.compress(data, codec),
+                )
+            )
+        # Blobs are referenced by key only
+        self._session.flush()
+        return digests
+
     def _create_matches_logs(
+        self,
         matches: Sequence[PlayerMatch],
-    ) -> Iterable[PlayerMatchLogModel]:
+    ) -> list[PlayerMatchLogModel]:
+        # Matches of the same response share the same meta object, which
+        # is saved once for all of them
+        requests: dict[int, PlayerMatchRequestModel] = {}
+        logs = []
+        sources = []
         for match in matches:
             if not isinstance(match, TrackableEntity):
                 continue
             source, meta = match.get_entity_info()
-            yield PlayerMatchLogModel(
-                match_id=match.id, source=source, meta=meta
+            request = requests.get(id(meta))
+            if request is None:
+                request = requests[id(meta)] = PlayerMatchRequestModel(
+                    meta=meta
+                )
+            logs.append(
+                PlayerMatchLogModel(match_id=match.id, request=request)
             )
+            sources.append(source)
+
+        if self._logs_codec is None:
+            for log, source in zip(logs, sources):
+                log.plain_source = source
+        else:
+            digests = self._compress_sources(sources, self._logs_codec)
+            for log, digest in zip(logs, digests):
+                log.source_digest = digest
+        return logs
 
     @_reraise_disconnection_error
     def save_match_series(
         self,
         player_id: PlayerID,
         match_series: Sequence[PlayerMatch],
-    ) -> None:
+    ) -> int:
         player = self._session.upsert(PlayerModel, **player_id.as_dict_flat())
 
         matches_exists_ids = set(
@@ -147,19 +324,225 @@ class SaveStorage(_SaveStorage):
             )
             .all()
         )
-        matches_to_add = [
-            self._model_to_db(match, player)
+        new_matches = [
+            match
             for match in match_series
             if match.id not in matches_exists_ids
         ]
-        if not matches_to_add:
-            return
+        if not new_matches:
+            return 0
 
-        self._session.add_all(matches_to_add)
+        self._session.add_all(
+            self._model_to_db(match, player) for match in new_matches
+        )
         if self._save_matches_logs:
             # sqlalchemy unit of work can't order inserts when model
             # relations are not explicit
             self._session.flush()
-            self._session.add_all(self._create_matches_logs(match_series))
+            self._session.add_all(self._create_matches_logs(new_matches))
 
         self._session.flush()
+        return len(new_matches)
+
+    @_reraise_disconnection_error
+    def compress_matches_logs(self, batch_size: int = 500) -> int:
+        """
+        Moves a batch of uncompressed log sources into blobs, returns
+        number of moved sources, `0` once there are none left.
+        """
+        if self._logs_codec is None:
+            raise ValueError('Logs codec is not set')
+
+        logs = (
+            self._session.query(PlayerMatchLogModel)
+            .filter(PlayerMatchLogModel.plain_source.isnot(None))
+            .limit(batch_size)
+            .all()
+        )
+        digests = self._compress_sources(
+            (log.plain_source for log in logs), self._logs_codec
+        )
+        for log, digest in zip(logs, digests):
+            log.source_digest = digest
+            log.plain_source = None
+        self._session.flush()
+        return len(logs)
+
+
+class BackfillStorage(SaveStorage, _BackfillStorage):
+    @_reraise_disconnection_error
+    def load_backfill_cursor(
+        self, game: Game, player_id: PlayerID
+    ) -> Optional[datetime]:
+        checkpoint = self._session.query(BackfillCheckpointModel).get(
+            (game, player_id.platform, player_id.nickname, player_id.id)
+        )
+        if checkpoint is None:
+            return None
+        return checkpoint.cursor.replace(tzinfo=timezone.utc)
+
+    @_reraise_disconnection_error
+    def save_backfill_cursor(
+        self, game: Game, player_id: PlayerID, cursor: datetime
+    ) -> None:
+        self._session.merge(
+            BackfillCheckpointModel(
+                game=game,
+                cursor=cursor.astimezone(timezone.utc).replace(tzinfo=None),
+                **player_id.as_dict_flat(),
+            )
+        )
+        self._session.flush()
+
+
+class LeaseStorage(_LeaseStorage):
+    """
+    Leases are claimed and renewed by conditional updates of single rows,
+    so concurrent pollers never own the same player at once. Expiration
+    is checked against local clocks, which must be roughly in sync.
+    """
+
+    def __init__(
+        self,
+        session: Session,
+        clock: Callable[[], datetime] = datetime.utcnow,
+    ):
+        self._session = session
+        self._clock = clock
+
+    @staticmethod
+    def _lease_key(lease: PlayerLeaseModel) -> Any:
+        return and_(
+            PlayerLeaseModel.game == lease.game,
+            PlayerLeaseModel.platform == lease.platform,
+            PlayerLeaseModel.nickname == lease.nickname,
+            PlayerLeaseModel.id == lease.id,
+        )
+
+    def _update_lease(
+        self, lease: PlayerLeaseModel, condition: Any, **values: Any
+    ) -> bool:
+        updated = (
+            self._session.query(PlayerLeaseModel)
+            .filter(self._lease_key(lease), condition)
+            .update(values, synchronize_session=False)
+        )
+        return updated == 1
+
+    def _add_missing_leases(
+        self, players: Sequence[tuple[Game, PlayerID]]
+    ) -> None:
+        known = {
+            (game, PlayerID(platform, nickname, id_))
+            for game, platform, nickname, id_ in self._session.query(
+                PlayerLeaseModel.game,
+                PlayerLeaseModel.platform,
+                PlayerLeaseModel.nickname,
+                PlayerLeaseModel.id,
+            )
+        }
+        missing = [key for key in players if key not in known]
+        if not missing:
+            return
+
+        self._session.add_all(
+            PlayerLeaseModel(game=game, **player_id.as_dict_flat())
+            for game, player_id in missing
+        )
+        try:
+            self._session.flush()
+        except IntegrityError:
+            # Inserted concurrently by another poller, nothing else has been
+            # done within the transaction yet
+            self._session.rollback()
+
+    def _heartbeat(
+        self, owner: str, now: datetime, expires_at: datetime
+    ) -> set[str]:
+        """Prolongs membership of `owner`, returns all live owners."""
+        members = self._session.query(PollerMemberModel)
+        updated = members.filter(PollerMemberModel.owner == owner).update(
+            {PollerMemberModel.expires_at: expires_at},
+            synchronize_session=False,
+        )
+        if not updated:
+            self._session.add(
+                PollerMemberModel(owner=owner, expires_at=expires_at)
+            )
+            self._session.flush()
+        members.filter(PollerMemberModel.expires_at <= now).delete(
+            synchronize_session=False
+        )
+        return {
+            member for member, in self._session.query(PollerMemberModel.owner)
+        }
+
+    @_reraise_disconnection_error
+    def claim_leases(
+        self,
+        owner: str,
+        players: Sequence[tuple[Game, PlayerID]],
+        ttl: timedelta,
+    ) -> list[tuple[Game, PlayerID]]:
+        players = list(dict.fromkeys(players))
+        if not players:
+            return []
+
+        now = self._clock()
+        expires_at = now + ttl
+        self._add_missing_leases(players)
+        fair_share = math.ceil(
+            len(players) / len(self._heartbeat(owner, now, expires_at))
+        )
+
+        order = {key: idx for idx, key in enumerate(players)}
+        leases = sorted(
+            (
+                lease
+                for lease in self._session.query(PlayerLeaseModel)
+                if lease.player_key() in order
+            ),
+            key=lambda lease: order[lease.player_key()],
+        )
+        owned_by_me = PlayerLeaseModel.owner == owner
+        claimed = []
+        for lease in leases:
+            if lease.owner != owner:
+                continue
+            if len(claimed) >= fair_share:
+                # Let other pollers take over the excess
+                self._update_lease(
+                    lease, owned_by_me, owner=None, expires_at=None
+                )
+            elif self._update_lease(lease, owned_by_me, expires_at=expires_at):
+                claimed.append(lease.player_key())
+
+        is_free = or_(
+            PlayerLeaseModel.owner.is_(None),
+            PlayerLeaseModel.expires_at <= now,
+        )
+        for lease in leases:
+            if len(claimed) >= fair_share:
+                break
+            if lease.owner == owner:
+                continue
+            if lease.owner is not None and lease.expires_at > now:
+                continue
+            if self._update_lease(
+                lease, is_free, owner=owner, expires_at=expires_at
+            ):
+                claimed.append(lease.player_key())
+
+        return sorted(claimed, key=order.__getitem__)
+
+    @_reraise_disconnection_error
+    def release_leases(self, owner: str) -> None:
+        self._session.query(PlayerLeaseModel).filter(
+            PlayerLeaseModel.owner == owner
+        ).update(
+            {PlayerLeaseModel.owner: None, PlayerLeaseModel.expires_at: None},
+            synchronize_session=False,
+        )
+        self._session.query(PollerMemberModel).filter(
+            PollerMemberModel.owner == owner
+        ).delete(synchronize_session=False)
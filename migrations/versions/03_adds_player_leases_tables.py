@@ -0,0 +1,43 @@
+"""Adds player leases tables
+
+Revision ID: 03
+Revises: 02
+Create Date: 2026-10-18 14:02:11.503312
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '03'
+down_revision = '02'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'poller_members',
+        sa.Column('owner', sa.String(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('owner'),
+    )
+    op.create_table(
+        'player_leases',
+        sa.Column(
+            'game',
+            sa.Enum('mw_mp', 'mw_wz', name='game', native_enum=False),
+            nullable=False,
+        ),
+        sa.Column('platform', sa.String(), nullable=False),
+        sa.Column('nickname', sa.String(), nullable=False),
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('owner', sa.String(), nullable=True),
+        sa.Column('expires_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('game', 'platform', 'nickname', 'id'),
+    )
+
+
+def downgrade():
+    op.drop_table('player_leases')
+    op.drop_table('poller_members')
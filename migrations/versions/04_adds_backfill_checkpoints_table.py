@@ -0,0 +1,35 @@
+"""Adds backfill checkpoints table
+
+Revision ID: 04
+Revises: 03
+Create Date: 2026-10-18 15:21:47.118520
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '04'
+down_revision = '03'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'backfill_checkpoints',
+        sa.Column(
+            'game',
+            sa.Enum('mw_mp', 'mw_wz', name='game', native_enum=False),
+            nullable=False,
+        ),
+        sa.Column('platform', sa.String(), nullable=False),
+        sa.Column('nickname', sa.String(), nullable=False),
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('cursor', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('game', 'platform', 'nickname', 'id'),
+    )
+
+
+def downgrade():
+    op.drop_table('backfill_checkpoints')
@@ -0,0 +1,56 @@
+"""Adds matches requests table shared by matches logs
+
+Revision ID: 05
+Revises: 04
+Create Date: 2026-10-18 17:42:05.331907
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '05'
+down_revision = '04'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'player_matches_requests',
+        sa.Column('db_id', sa.Integer(), nullable=False),
+        sa.Column('meta', sa.JSON(), nullable=False),
+        sa.PrimaryKeyConstraint('db_id'),
+    )
+    with op.batch_alter_table('player_matches_logs') as batch_op:
+        batch_op.add_column(
+            sa.Column('request_id', sa.Integer(), nullable=True)
+        )
+        batch_op.create_foreign_key(
+            'fk_player_matches_logs_request_id',
+            'player_matches_requests',
+            ['request_id'],
+            ['db_id'],
+        )
+        batch_op.alter_column(
+            'meta', existing_type=sa.JSON(), nullable=True
+        )
+
+
+def downgrade():
+    op.execute(
+        'UPDATE player_matches_logs SET meta = ('
+        'SELECT meta FROM player_matches_requests '
+        'WHERE player_matches_requests.db_id = '
+        'player_matches_logs.request_id'
+        ') WHERE meta IS NULL'
+    )
+    with op.batch_alter_table('player_matches_logs') as batch_op:
+        batch_op.drop_constraint(
+            'fk_player_matches_logs_request_id', type_='foreignkey'
+        )
+        batch_op.drop_column('request_id')
+        batch_op.alter_column(
+            'meta', existing_type=sa.JSON(), nullable=False
+        )
+    op.drop_table('player_matches_requests')
@@ -0,0 +1,92 @@
+"""Adds compressed log blobs table
+
+Revision ID: 06
+Revises: 05
+Create Date: 2026-10-18 18:27:40.915263
+
+"""
+import gzip
+import json
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '06'
+down_revision = '05'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'log_blobs',
+        sa.Column('digest', sa.String(), nullable=False),
+        sa.Column('codec', sa.String(), nullable=False),
+        sa.Column('data', sa.LargeBinary(), nullable=False),
+        sa.PrimaryKeyConstraint('digest'),
+    )
+    with op.batch_alter_table('player_matches_logs') as batch_op:
+        batch_op.add_column(
+            sa.Column('source_digest', sa.String(), nullable=True)
+        )
+        batch_op.create_foreign_key(
+            'fk_player_matches_logs_source_digest',
+            'log_blobs',
+            ['source_digest'],
+            ['digest'],
+        )
+        batch_op.alter_column(
+            'source', existing_type=sa.JSON(), nullable=True
+        )
+
+
+def _decompress(data, codec):
+    # Decoding of codecs known to this revision, kept independent of app
+    # code which may change after it
+    if codec == 'gzip':
+        return gzip.decompress(data)
+    if codec == 'zstd':
+        import zstandard
+
+        return zstandard.ZstdDecompressor().decompress(data)
+    raise ValueError(f'Unknown log blob codec {codec!r}')
+
+
+def downgrade():
+    logs = sa.table(
+        'player_matches_logs',
+        sa.column('match_id', sa.String()),
+        sa.column('source', sa.JSON()),
+        sa.column('source_digest', sa.String()),
+    )
+    log_blobs = sa.table(
+        'log_blobs',
+        sa.column('digest', sa.String()),
+        sa.column('codec', sa.String()),
+        sa.column('data', sa.LargeBinary()),
+    )
+    conn = op.get_bind()
+    compressed = conn.execute(
+        sa.select([logs.c.match_id, log_blobs.c.codec, log_blobs.c.data])
+        .select_from(
+            logs.join(log_blobs, logs.c.source_digest == log_blobs.c.digest)
+        )
+        .where(logs.c.source.is_(None))
+    ).fetchall()
+    for match_id, codec, data in compressed:
+        conn.execute(
+            logs.update()
+            .where(logs.c.match_id == match_id)
+            .values(source=json.loads(_decompress(data, codec)))
+        )
+
+    with op.batch_alter_table('player_matches_logs') as batch_op:
+        batch_op.drop_constraint(
+            'fk_player_matches_logs_source_digest', type_='foreignkey'
+        )
+        batch_op.drop_column('source_digest')
+        batch_op.alter_column(
+            'source', existing_type=sa.JSON(), nullable=False
+        )
+    op.drop_table('log_blobs')
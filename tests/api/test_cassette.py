@@ -0,0 +1,102 @@
+from unittest.mock import Mock
+
+from pytest import fixture, raises
+from requests import Session
+
+from codstattracker.api.cassette import (
+    CassetteReader,
+    CassetteWriter,
+    Recording,
+    RecordingSession,
+    ReplaySession,
+)
+from codstattracker.api.exceptions import FetchError
+from codstattracker.api.models import Game, PlayerID
+from codstattracker.api.mycallofduty import replay_api_factory
+from codstattracker.api.mycallofduty.mw import PlayerAPI
+from codstattracker.api.transport import TransportOptions, create_session
+from codstattracker.bench.server import ReplayServer
+from codstattracker.logging import create_empty_logger
+
+PLAYER_ID = PlayerID('battle', 'p1', '1')
+
+
+@fixture
+def cassette_path(tmp_path):
+    return tmp_path / 'cassette.zip'
+
+
+def test_replays_recorded_matches(cassette_path):
+    with ReplayServer(matches_per_page=5) as server:
+        with CassetteWriter(cassette_path) as writer:
+            session = create_session(TransportOptions())
+            api = PlayerAPI(
+                RecordingSession(session, writer),
+                server.url,
+                logger=create_empty_logger(),
+            )
+            recorded = [
+                api.get_recent_matches(game, PLAYER_ID)
+                for game in (Game.mw_mp, Game.mw_wz)
+            ]
+
+    with CassetteReader(cassette_path) as reader:
+        api = replay_api_factory(reader, base_api_url=server.url)
+        replayed = [
+            api.get_recent_matches(game, PLAYER_ID)
+            for game in (Game.mw_mp, Game.mw_wz)
+        ]
+        with raises(FetchError):
+            api.get_recent_matches(Game.mw_mp, PlayerID('battle', 'p2', '2'))
+
+    assert replayed == recorded
+    assert server.stats.requests == 2
+
+
+def test_recordings_played_in_order(cassette_path):
+    with CassetteWriter(cassette_path) as writer:
+        for idx in range(2):
+            writer.record(
+                '/key', Recording(200, {'ETag': str(idx)}, b'body', idx)
+            )
+
+    with CassetteReader(cassette_path) as reader:
+        played = [reader.play('/key') for _ in range(3)]
+        assert reader.play('/other-key') is None
+
+    assert [recording.headers for recording in played] == [
+        {'ETag': '0'},
+        {'ETag': '1'},
+        {'ETag': '1'},
+    ]
+    assert played[0] == Recording(200, {'ETag': '0'}, b'body', 0)
+
+
+def test_records_only_used_headers(cassette_path):
+    response = Mock(
+        status_code=200,
+        headers={'ETag': 'tag', 'Set-Cookie': 'secret'},
+        content=b'body',
+    )
+    session = Mock(Session, **{'get.return_value': response})
+    with CassetteWriter(cassette_path) as writer:
+        assert RecordingSession(session, writer).get('http://a/b?c=1') is (
+            response
+        )
+
+    with CassetteReader(cassette_path) as reader:
+        assert reader.play('/b?c=1').headers == {'ETag': 'tag'}
+
+
+def test_realtime_replay_waits_latency(cassette_path):
+    with CassetteWriter(cassette_path) as writer:
+        writer.record('/key', Recording(200, {}, b'body', 0.5))
+    sleep = Mock()
+
+    with CassetteReader(cassette_path) as reader:
+        response = ReplaySession(reader, realtime=True, sleep=sleep).get(
+            'http://host/key'
+        )
+
+    assert response.content == b'body'
+    sleep.assert_called_once_with(0.5)
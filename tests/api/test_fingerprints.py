@@ -0,0 +1,30 @@
+from codstattracker.api.fingerprints import FingerprintCache
+
+
+def test_changed_content_detected():
+    cache = FingerprintCache()
+    cache.remember('url', {}, b'content')
+
+    assert cache.is_unchanged('url', 200, b'content')
+    assert not cache.is_unchanged('url', 200, b'other content')
+    assert not cache.is_unchanged('other-url', 200, b'content')
+
+
+def test_least_recently_used_evicted():
+    cache = FingerprintCache(max_size=2)
+    cache.remember('a', {'ETag': 'a'}, b'')
+    cache.remember('b', {'ETag': 'b'}, b'')
+    cache.request_headers('a')
+    cache.remember('c', {'ETag': 'c'}, b'')
+
+    assert cache.request_headers('a') == {'If-None-Match': 'a'}
+    assert cache.request_headers('b') == {}
+    assert cache.request_headers('c') == {'If-None-Match': 'c'}
+
+
+def test_not_modified_requires_cached_fingerprint():
+    cache = FingerprintCache()
+    cache.remember('url', {'ETag': 'a'}, b'content')
+
+    assert cache.is_unchanged('url', 304, b'')
+    assert not cache.is_unchanged('evicted-url', 304, b'')
@@ -1,9 +1,11 @@
+import pickle
+from dataclasses import field
 from typing import List
 
-from pytest import mark
+from pytest import mark, raises
 
 from codstattracker.api.models import PlayerID
-from codstattracker.base_model import Model
+from codstattracker.base_model import Model, slotted
 
 
 class RootModel(Model):
@@ -60,6 +62,67 @@ def test_get_dict_flat(model_inst, output):
     assert model_inst.as_dict_flat() == output
 
 
+def test_get_dict_flat_as_parent():
+    model_inst = MultipleInheritedModel(
+        foo=10,
+        bar=20.0,
+        baz='test',
+        field=[1],
+        nested=RootModel(foo=10, bar=20.0, baz='test'),
+    )
+
+    assert model_inst.as_dict_flat(RootModel) == {
+        'foo': 10,
+        'bar': 20.0,
+        'baz': 'test',
+    }
+    with raises(TypeError):
+        RootModel(foo=10, bar=20.0, baz='test').as_dict_flat(NestedModel)
+
+
+def test_all_fields_are_unique():
+    assert [field.name for field in MultipleInheritedModel.all_fields()] == [
+        'field',
+        'nested',
+        'foo',
+        'bar',
+        'baz',
+    ]
+
+
+@slotted
+class SlottedModel(Model):
+    foo: int
+    bar: List[int] = field(default_factory=list)
+
+
+class SlottedSubclassModel(SlottedModel):
+    baz: str = 'baz'
+
+
+def test_slotted_model_has_no_dict():
+    model_inst = SlottedModel(foo=10)
+
+    assert not hasattr(model_inst, '__dict__')
+    assert model_inst.as_dict_flat() == {'foo': 10, 'bar': []}
+    assert pickle.loads(pickle.dumps(model_inst)) == model_inst
+
+
+def test_slotted_model_subclass_keeps_dict():
+    model_inst = SlottedSubclassModel(foo=10)
+    model_inst.extra = 'value'
+
+    assert model_inst.as_dict_flat() == {'foo': 10, 'bar': [], 'baz': 'baz'}
+
+
+def test_slotted_model_requires_slotted_bases():
+    class ChildModel(RootModel):
+        child: int
+
+    with raises(TypeError):
+        slotted(ChildModel)
+
+
 def test_player_id_repr():
     assert (
         repr(
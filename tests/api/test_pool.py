@@ -0,0 +1,75 @@
+import asyncio
+from unittest.mock import AsyncMock, Mock
+
+from pytest import raises
+
+from codstattracker.api.exceptions import NotAuthenticatedError
+from codstattracker.api.interfaces import AsyncPlayerAPI, PlayerAPI
+from codstattracker.api.models import Game, PlayerID
+from codstattracker.api.pool import AsyncCredentialPool, CredentialPool
+from codstattracker.logging import create_empty_logger
+
+PLAYER_ID = PlayerID('battle', 'p1', '1')
+
+
+def create_pool(*results):
+    apis = []
+    for result in results:
+        api = Mock(PlayerAPI)
+        api.get_recent_matches.side_effect = (
+            result
+            if isinstance(result, Exception)
+            else lambda *_, result=result: result
+        )
+        apis.append(api)
+    return CredentialPool(apis, create_empty_logger()), apis
+
+
+def test_spreads_requests_among_credentials():
+    pool, apis = create_pool(['a'], ['b'])
+
+    results = [
+        pool.get_recent_matches(Game.mw_mp, PLAYER_ID) for _ in range(4)
+    ]
+
+    assert results == [['a'], ['b'], ['a'], ['b']]
+    assert [api.get_recent_matches.call_count for api in apis] == [2, 2]
+
+
+def test_routes_to_least_loaded_credential():
+    pool, apis = create_pool(['a'], ['b'])
+    busy = pool._acquire()
+
+    assert pool.get_recent_matches(Game.mw_mp, PLAYER_ID) == ['b']
+    pool._release(busy)
+    assert pool.get_recent_matches(Game.mw_mp, PLAYER_ID) == ['a']
+
+
+def test_evicts_not_authenticated_credential():
+    pool, apis = create_pool(NotAuthenticatedError('expired'), ['b'])
+
+    assert pool.get_recent_matches(Game.mw_mp, PLAYER_ID) == ['b']
+    assert pool.get_recent_matches(Game.mw_mp, PLAYER_ID) == ['b']
+    assert len(pool) == 1
+    assert apis[0].get_recent_matches.call_count == 1
+
+
+def test_raises_once_every_credential_is_evicted():
+    pool, _ = create_pool(
+        NotAuthenticatedError('expired'), NotAuthenticatedError('expired')
+    )
+
+    with raises(NotAuthenticatedError):
+        pool.get_recent_matches(Game.mw_mp, PLAYER_ID)
+    assert len(pool) == 0
+
+
+def test_async_evicts_not_authenticated_credential():
+    expired = AsyncMock(AsyncPlayerAPI)
+    expired.get_matches_played.side_effect = NotAuthenticatedError
+    valid = AsyncMock(AsyncPlayerAPI)
+    valid.get_matches_played.return_value = 10
+    pool = AsyncCredentialPool([expired, valid], create_empty_logger())
+
+    assert asyncio.run(pool.get_matches_played(Game.mw_mp, PLAYER_ID)) == 10
+    assert len(pool) == 1
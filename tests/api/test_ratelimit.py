@@ -0,0 +1,74 @@
+from pytest import approx, fixture
+
+from codstattracker.api.ratelimit import AdaptiveRateLimiter
+from codstattracker.poller.__main__ import _create_rate_limiter
+from codstattracker.poller.settings import Settings
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@fixture
+def clock():
+    return Clock()
+
+
+def test_burst_then_paced(clock):
+    limiter = AdaptiveRateLimiter(rate=2, burst=2, clock=clock)
+
+    assert limiter.reserve() == 0
+    assert limiter.reserve() == 0
+    assert limiter.reserve() == approx(0.5)
+    assert limiter.reserve() == approx(1.0)
+
+    clock.now = 1.0
+    assert limiter.reserve() == approx(0.5)
+
+
+def test_throttling_decreases_rate_and_success_restores_it(clock):
+    limiter = AdaptiveRateLimiter(
+        rate=4, min_rate=1, decrease_factor=0.5, increase_step=1, clock=clock
+    )
+
+    limiter.on_throttled()
+    limiter.on_throttled()
+    assert limiter.rate == 1
+    limiter.on_throttled()
+    assert limiter.rate == 1
+
+    for _ in range(10):
+        limiter.on_success()
+    assert limiter.rate == 4
+
+
+def test_retry_after_blocks_requests(clock):
+    limiter = AdaptiveRateLimiter(rate=10, burst=10, clock=clock)
+
+    limiter.on_throttled(retry_after=5)
+
+    assert limiter.reserve() == approx(5)
+    clock.now = 5
+    assert limiter.reserve() == 0
+
+
+def test_poller_rate_limiter_is_opt_in():
+    def create(**api):
+        return _create_rate_limiter(
+            Settings(
+                db={'uri': 'sqlite://', 'save_matches_log': False},
+                api={'auth_cookie': 'cookie', **api},
+                players_to_poll=[],
+            )
+        )
+
+    assert create() is None
+
+    limiter = create(rate_limit={})
+    for _ in range(1000):
+        limiter.on_success()
+    assert limiter.rate == approx(10)
@@ -0,0 +1,102 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock
+
+from pytest import raises
+
+from codstattracker.api.exceptions import FetchError
+from codstattracker.api.interfaces import PlayerAPI
+from codstattracker.api.models import Game, PlayerID
+from codstattracker.api.singleflight import (
+    AsyncSingleFlightPlayerAPI,
+    SingleFlightPlayerAPI,
+)
+
+PLAYER_1_ID = PlayerID('battle', 'p1', '1')
+PLAYER_2_ID = PlayerID('battle', 'p2', '2')
+
+
+def blocking_api(result):
+    release = threading.Event()
+    api = Mock(PlayerAPI)
+
+    def get_recent_matches(*args):
+        release.wait(5)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    api.get_recent_matches.side_effect = get_recent_matches
+    return api, release
+
+
+def fetch_concurrently(api, release, num_of_calls, *player_ids):
+    with ThreadPoolExecutor(len(player_ids)) as executor:
+        futures = [
+            executor.submit(api.get_recent_matches, Game.mw_mp, player_id)
+            for player_id in player_ids
+        ]
+        while api._api.get_recent_matches.call_count < num_of_calls:
+            time.sleep(0.01)
+        # Let duplicate requests join in-flight ones
+        time.sleep(0.1)
+        release.set()
+    return futures
+
+
+def test_merges_identical_requests():
+    api, release = blocking_api(['match'])
+
+    futures = fetch_concurrently(
+        SingleFlightPlayerAPI(api),
+        release,
+        2,
+        PLAYER_1_ID,
+        PLAYER_1_ID,
+        PLAYER_2_ID,
+    )
+
+    assert [future.result() for future in futures] == [['match']] * 3
+    assert api.get_recent_matches.call_count == 2
+
+
+def test_shares_error_with_all_waiters():
+    api, release = blocking_api(FetchError('failed'))
+    single_flight = SingleFlightPlayerAPI(api)
+
+    futures = fetch_concurrently(
+        single_flight, release, 1, PLAYER_1_ID, PLAYER_1_ID
+    )
+
+    for future in futures:
+        with raises(FetchError):
+            future.result()
+    assert api.get_recent_matches.call_count == 1
+    # Failed request is not remembered
+    with raises(FetchError):
+        single_flight.get_recent_matches(Game.mw_mp, PLAYER_1_ID)
+    assert api.get_recent_matches.call_count == 2
+
+
+def test_async_merges_identical_requests():
+    calls = []
+
+    class API:
+        async def get_recent_matches(self, *args):
+            calls.append(args)
+            await asyncio.sleep(0.01)
+            return ['match']
+
+    single_flight = AsyncSingleFlightPlayerAPI(API())
+
+    async def fetch():
+        return await asyncio.gather(
+            single_flight.get_recent_matches(Game.mw_mp, PLAYER_1_ID),
+            single_flight.get_recent_matches(Game.mw_mp, PLAYER_1_ID),
+            single_flight.get_recent_matches(Game.mw_wz, PLAYER_1_ID),
+        )
+
+    assert asyncio.run(fetch()) == [['match']] * 3
+    assert len(calls) == 2
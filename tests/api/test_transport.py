@@ -0,0 +1,41 @@
+from pytest import importorskip, raises
+
+from codstattracker.api.exceptions import FetchError
+from codstattracker.api.models import Game, PlayerID
+from codstattracker.api.mycallofduty.mw import PlayerAPI
+from codstattracker.api.transport import TransportOptions, create_session
+from codstattracker.bench.server import ReplayServer
+from codstattracker.logging import create_empty_logger
+
+
+def test_session_configured():
+    session = create_session(
+        TransportOptions(
+            pool_size=4, keep_alive=False, accept_encoding=['gzip']
+        )
+    )
+
+    assert session.headers['Accept-Encoding'] == 'gzip'
+    assert session.headers['Connection'] == 'close'
+    assert session.get_adapter('https://host')._pool_maxsize == 4
+
+
+def test_stalled_response_times_out():
+    session = create_session(TransportOptions(read_timeout=0.05))
+    with ReplayServer(latency=0.5) as server:
+        api = PlayerAPI(session, server.url, logger=create_empty_logger())
+        with raises(FetchError):
+            api.get_recent_matches(Game.mw_mp, PlayerID('battle', 'p1', '1'))
+
+
+def test_http2_session_streams_response():
+    importorskip('httpx')
+    importorskip('ijson')
+    session = create_session(TransportOptions(http2=True))
+    with ReplayServer(matches_per_page=5) as server:
+        api = PlayerAPI(session, server.url, logger=create_empty_logger())
+        matches = list(
+            api.iter_recent_matches(Game.mw_mp, PlayerID('battle', 'p1', '1'))
+        )
+
+    assert len(matches) == 5
@@ -1,30 +1,48 @@
+import io
+import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from functools import lru_cache
 from importlib.resources import read_text
 from unittest.mock import Mock, call
 
 from _pytest.mark import param
+from prometheus_client import REGISTRY
 from pytest import fixture, mark, raises
 from requests import Response, Session
 
 from codstattracker.api.exceptions import (
     FetchError,
+    NotAuthenticatedError,
     PlayerNotFoundError,
+    RateLimitedError,
     UnrecoverableFetchError,
 )
+from codstattracker.api.fingerprints import FingerprintCache
 from codstattracker.api.models import Game, PlayerID
+from codstattracker.api.mycallofduty import mw
 from codstattracker.api.mycallofduty.mw import PlayerAPI
+from codstattracker.api.ratelimit import AdaptiveRateLimiter
 from tests.api import assets
 from tests.api.assets import MATCH_1_IN, MATCH_1_OUT, MATCH_2_IN, MATCH_2_OUT
 
+NOT_AUTHENTICATED_BODY = json.dumps(
+    {
+        'status': 'error',
+        'data': {'message': 'Not permitted: not authenticated '},
+    }
+)
+
 
 @lru_cache
 def get_asset_file(filename: str) -> str:
     return read_text(assets, filename)
 
 
-def response_mock(body, status_code):
+def response_mock(body, status_code, headers=None):
     resp = Mock(Response, name='response')
     resp.status_code = status_code
+    resp.headers = headers or {}
     resp.encoding = 'utf-8'
     resp.text = resp.content = body
     resp.json = lambda **kwargs: Response.json(resp, **kwargs)
@@ -86,6 +104,12 @@ def test_parses_successful_response(
             (),
             id='Received error response',
         ),
+        param(
+            NOT_AUTHENTICATED_BODY,
+            NotAuthenticatedError,
+            ('Access not authorized', json.loads(NOT_AUTHENTICATED_BODY)),
+            id='Credential is not authenticated',
+        ),
         param(
             'something meaningful',
             UnrecoverableFetchError,
@@ -116,3 +140,333 @@ def test_errors(request_session, response_body, exc_cls, exc_args):
             Game.mw_mp, PlayerID('test_user', '1234', 'battle')
         )
     assert exc_info.value.args == exc_args
+
+
+@mark.parametrize('status_code', [429, 503])
+def test_throttled_response_slows_down_rate_limiter(
+    request_session, status_code
+):
+    request_session.get.return_value = response_mock(
+        '', status_code, {'Retry-After': '30'}
+    )
+    rate_limiter = AdaptiveRateLimiter(rate=4, min_rate=1, max_rate=4)
+    api = PlayerAPI(
+        request_session, 'http://fake-host/api', rate_limiter=rate_limiter
+    )
+
+    with raises(RateLimitedError) as exc_info:
+        api.get_recent_matches(
+            Game.mw_mp, PlayerID('battle', 'test_user', '1234')
+        )
+
+    assert exc_info.value.retry_after == 30
+    assert rate_limiter.rate == 2
+
+
+def test_unchanged_response_skipped(request_session):
+    request_session.get.return_value = response_mock(MATCH_1_IN.encode(), 200)
+    api = PlayerAPI(
+        request_session,
+        'http://fake-host/api',
+        fingerprint_cache=FingerprintCache(),
+    )
+    player_id = PlayerID('battle', 'test_user', '1234')
+
+    assert api.get_recent_matches(Game.mw_mp, player_id) == [MATCH_1_OUT]
+    assert api.get_recent_matches(Game.mw_mp, player_id) == []
+
+
+def test_not_modified_response_skipped(request_session):
+    request_session.get.side_effect = [
+        response_mock(MATCH_1_IN.encode(), 200, {'ETag': '"v1"'}),
+        response_mock(b'', 304),
+    ]
+    api = PlayerAPI(
+        request_session,
+        'http://fake-host/api',
+        fingerprint_cache=FingerprintCache(),
+    )
+    player_id = PlayerID('battle', 'test_user', '1234')
+
+    api.get_recent_matches(Game.mw_mp, player_id)
+    assert api.get_recent_matches(Game.mw_mp, player_id) == []
+    assert request_session.get.mock_calls[1].kwargs == {
+        'headers': {'If-None-Match': '"v1"'}
+    }
+
+
+def test_not_modified_response_repeated_once_fingerprint_evicted(
+    request_session,
+):
+    request_session.get.side_effect = [
+        response_mock(b'', 304),
+        response_mock(MATCH_1_IN.encode(), 200),
+    ]
+    api = PlayerAPI(
+        request_session,
+        'http://fake-host/api',
+        fingerprint_cache=FingerprintCache(),
+    )
+
+    matches = api.get_recent_matches(
+        Game.mw_mp, PlayerID('battle', 'test_user', '1234')
+    )
+
+    assert matches == [MATCH_1_OUT]
+    assert request_session.get.mock_calls[1].kwargs == {}
+
+
+def test_uses_given_json_decoder(request_session):
+    request_session.get.return_value = response_mock(MATCH_1_IN, 200)
+    json_loads = Mock(side_effect=json.loads)
+    api = PlayerAPI(
+        request_session, 'http://fake-host/api', json_loads=json_loads
+    )
+
+    matches = api.get_recent_matches(
+        Game.mw_mp, PlayerID('battle', 'test_user', '1234')
+    )
+
+    assert json_loads.mock_calls == [call(MATCH_1_IN)]
+    assert matches == [MATCH_1_OUT]
+
+
+@mark.parametrize(
+    'game, response, result',
+    [
+        param(Game.mw_mp, MATCH_1_IN, MATCH_1_OUT, id='MP matches'),
+        param(Game.mw_wz, MATCH_2_IN, MATCH_2_OUT, id='WZ matches'),
+    ],
+)
+def test_parses_response_without_validation(
+    game, response, result, request_session
+):
+    request_session.get.return_value = response_mock(response, 200)
+    api = PlayerAPI(request_session, 'http://fake-host/api', validate_every=2)
+    player_id = PlayerID('battle', 'test_user', '1234')
+
+    validated = api.get_recent_matches(game, player_id)
+    trusted = api.get_recent_matches(game, player_id)
+
+    assert validated == trusted == [result]
+
+
+def test_broken_response_fails_without_validation(request_session):
+    request_session.get.return_value = response_mock(
+        get_asset_file('success-response-a-bit-broken.json'), 200
+    )
+    api = PlayerAPI(
+        request_session, 'http://fake-host/api', validate_every=1000
+    )
+    player_id = PlayerID('battle', 'test_user', '1234')
+
+    for _ in range(2):
+        with raises(FetchError) as exc_info:
+            api.get_recent_matches(Game.mw_mp, player_id)
+        assert exc_info.value.args == ('Player info decode error',)
+
+
+@fixture(scope='module')
+def process_pool():
+    with ProcessPoolExecutor(
+        1, mp_context=multiprocessing.get_context('spawn')
+    ) as executor:
+        yield executor
+
+
+@mark.parametrize('validate_every', [1, 1000])
+def test_parses_response_in_executor(
+    validate_every, request_session, process_pool
+):
+    request_session.get.return_value = response_mock(MATCH_2_IN, 200)
+    api = PlayerAPI(
+        request_session,
+        'http://fake-host/api',
+        validate_every=validate_every,
+        parse_executor=process_pool,
+    )
+
+    matches = api.get_recent_matches(
+        Game.mw_wz, PlayerID('battle', 'test_user', '1234')
+    )
+
+    assert matches == [MATCH_2_OUT]
+
+
+def test_executor_parse_timings_are_recorded(request_session, process_pool):
+    def sample(name, **labels):
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    request_session.get.return_value = response_mock(MATCH_2_IN, 200)
+    api = PlayerAPI(
+        request_session, 'http://fake-host/api', parse_executor=process_pool
+    )
+    decodes = sample('cst_api_json_decode_duration_seconds_count')
+    parses = sample('cst_api_parse_duration_seconds_count', game='mw:wz')
+
+    api.get_recent_matches(Game.mw_wz, PlayerID('battle', 'test_user', '1234'))
+
+    assert sample('cst_api_json_decode_duration_seconds_count') == decodes + 1
+    assert (
+        sample('cst_api_parse_duration_seconds_count', game='mw:wz')
+        == parses + 1
+    )
+
+
+def test_executor_parse_errors_are_reraised(request_session, process_pool):
+    request_session.get.return_value = response_mock(
+        get_asset_file('user-not-found-response.json'), 200
+    )
+    api = PlayerAPI(
+        request_session, 'http://fake-host/api', parse_executor=process_pool
+    )
+
+    with raises(PlayerNotFoundError):
+        api.get_recent_matches(
+            Game.mw_mp, PlayerID('battle', 'test_user', '1234')
+        )
+
+
+def streamed_response(body, status_code=200):
+    resp = Response()
+    resp.status_code = status_code
+    resp.raw = io.BytesIO(body.encode())
+    return resp
+
+
+@mark.parametrize(
+    'game, response, result',
+    [
+        param(Game.mw_mp, MATCH_1_IN, MATCH_1_OUT, id='MP matches'),
+        param(Game.mw_wz, MATCH_2_IN, MATCH_2_OUT, id='WZ matches'),
+    ],
+)
+@mark.parametrize('validate_every', [1, 1000])
+def test_streams_matches(
+    game, response, result, validate_every, request_session
+):
+    request_session.get.return_value = streamed_response(response)
+    api = PlayerAPI(
+        request_session, 'http://fake-host/api', validate_every=validate_every
+    )
+    api.STREAM_CHUNK_SIZE = 256
+
+    matches = api.iter_recent_matches(
+        game, PlayerID('battle', 'test_user', '1234')
+    )
+
+    assert next(matches) == result
+    assert list(matches) == []
+    assert request_session.get.mock_calls[0].kwargs == {'stream': True}
+
+
+@mark.parametrize(
+    'response_body, exc_cls',
+    [
+        param(
+            get_asset_file('user-not-found-response.json'),
+            PlayerNotFoundError,
+            id='Error response',
+        ),
+        param(
+            get_asset_file('success-response-a-bit-broken.json'),
+            FetchError,
+            id='Broken match',
+        ),
+        param('{"status": "success"', UnrecoverableFetchError, id='Not JSON'),
+    ],
+)
+def test_streaming_errors(request_session, response_body, exc_cls):
+    request_session.get.return_value = streamed_response(response_body)
+    api = PlayerAPI(request_session, 'http://fake-host/api')
+
+    with raises(exc_cls):
+        list(
+            api.iter_recent_matches(
+                Game.mw_mp, PlayerID('battle', 'test_user', '1234')
+            )
+        )
+
+
+def test_streaming_falls_back_without_ijson(monkeypatch, request_session):
+    monkeypatch.setattr(mw, 'ijson', None)
+    request_session.get.return_value = response_mock(MATCH_1_IN, 200)
+    api = PlayerAPI(request_session, 'http://fake-host/api')
+
+    matches = api.iter_recent_matches(
+        Game.mw_mp, PlayerID('battle', 'test_user', '1234')
+    )
+
+    assert list(matches) == [MATCH_1_OUT]
+
+
+@mark.parametrize('validate_every', [1, 1000])
+def test_collects_source_slice_per_match(validate_every, request_session):
+    request_session.get.return_value = response_mock(MATCH_2_IN, 200)
+    api = PlayerAPI(
+        request_session,
+        'http://fake-host/api',
+        collect_source_info_data=True,
+        validate_every=validate_every,
+    )
+
+    (match,) = api.get_recent_matches(
+        Game.mw_wz, PlayerID('battle', 'test_user', '1234')
+    )
+
+    source, meta = match.get_entity_info()
+    assert source == json.loads(MATCH_2_IN)['data']['matches'][0]
+    assert meta == {'url': request_session.get.call_args.args[0]}
+
+
+@mark.parametrize(
+    'game, data, url',
+    [
+        param(
+            Game.mw_mp,
+            {'lifetime': {'all': {'properties': {'totalGamesPlayed': 42.0}}}},
+            (
+                'http://fake-host/api'
+                '/platform/battle/gamer/test_user%231234/profile/type/mp'
+            ),
+            id='MP profile',
+        ),
+        param(
+            Game.mw_wz,
+            {
+                'lifetime': {
+                    'mode': {'br_all': {'properties': {'gamesPlayed': 42.0}}}
+                }
+            },
+            (
+                'http://fake-host/api'
+                '/platform/battle/gamer/test_user%231234/profile/type/wz'
+            ),
+            id='WZ profile',
+        ),
+    ],
+)
+def test_gets_matches_played(game, data, url, request_session):
+    request_session.get.return_value = response_mock(
+        json.dumps({'status': 'success', 'data': data}), 200
+    )
+    api = PlayerAPI(request_session, 'http://fake-host/api')
+
+    assert (
+        api.get_matches_played(game, PlayerID('battle', 'test_user', '1234'))
+        == 42
+    )
+    assert request_session.get.mock_calls == [call(url)]
+
+
+def test_broken_profile_fails(request_session):
+    request_session.get.return_value = response_mock(
+        json.dumps({'status': 'success', 'data': {'lifetime': {}}}), 200
+    )
+    api = PlayerAPI(request_session, 'http://fake-host/api')
+
+    with raises(FetchError) as exc_info:
+        api.get_matches_played(
+            Game.mw_mp, PlayerID('battle', 'test_user', '1234')
+        )
+    assert exc_info.value.args == ('Player profile decode error',)
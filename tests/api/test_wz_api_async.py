@@ -0,0 +1,168 @@
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from importlib.resources import read_text
+
+from _pytest.mark import param
+from pytest import importorskip, mark, raises
+
+from codstattracker.api.exceptions import (
+    FetchError,
+    PlayerNotFoundError,
+    UnrecoverableFetchError,
+)
+from codstattracker.api.models import Game, PlayerID
+from tests.api import assets
+from tests.api.assets import MATCH_1_IN, MATCH_1_OUT, MATCH_2_IN, MATCH_2_OUT
+
+importorskip('aiohttp')
+
+from codstattracker.api.mycallofduty.mw_async import (  # noqa: E402
+    PlayerAPI,
+)
+
+
+class FakeResponse:
+    def __init__(self, body, status):
+        self.status = status
+        self.headers = {}
+        self._body = body
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return None
+
+    async def json(self, content_type='application/json'):
+        return json.loads(self._body)
+
+    async def read(self):
+        return self._body.encode()
+
+
+class FakeSession:
+    def __init__(self, body, status=200):
+        self.requested_urls = []
+        self._response = FakeResponse(body, status)
+
+    def get(self, url):
+        self.requested_urls.append(str(url))
+        return self._response
+
+
+@mark.parametrize(
+    'game, url, response, result',
+    [
+        param(
+            Game.mw_mp,
+            (
+                'http://fake-host/api'
+                '/platform/battle/gamer/test_user%231234/matches'
+                '/mp/start/0/end/0/details'
+            ),
+            MATCH_1_IN,
+            MATCH_1_OUT,
+            id='Parse MP matches',
+        ),
+        param(
+            Game.mw_wz,
+            (
+                'http://fake-host/api'
+                '/platform/battle/gamer/test_user%231234/matches'
+                '/wz/start/0/end/0/details'
+            ),
+            MATCH_2_IN,
+            MATCH_2_OUT,
+            id='Parse WZ matches',
+        ),
+    ],
+)
+def test_parses_successful_response(game, url, response, result):
+    session = FakeSession(response)
+    api = PlayerAPI(session, 'http://fake-host/api')
+
+    matches = asyncio.run(
+        api.get_recent_matches(game, PlayerID('battle', 'test_user', '1234'))
+    )
+
+    assert session.requested_urls == [url]
+    assert matches == [result]
+
+
+def test_parses_response_in_executor():
+    api = PlayerAPI(
+        FakeSession(MATCH_1_IN),
+        'http://fake-host/api',
+        parse_executor=ThreadPoolExecutor(1),
+    )
+
+    matches = asyncio.run(
+        api.get_recent_matches(
+            Game.mw_mp, PlayerID('battle', 'test_user', '1234')
+        )
+    )
+
+    assert matches == [MATCH_1_OUT]
+
+
+@mark.parametrize(
+    'response_body, status, exc_cls',
+    [
+        param(
+            read_text(assets, 'user-not-found-response.json'),
+            200,
+            PlayerNotFoundError,
+            id='Received error response',
+        ),
+        param(
+            'something meaningful',
+            200,
+            UnrecoverableFetchError,
+            id='Response is not a JSON',
+        ),
+        param('{}', 500, UnrecoverableFetchError, id='Unexpected status'),
+        param(
+            read_text(assets, 'success-response-a-bit-broken.json'),
+            200,
+            FetchError,
+            id='Response generally valid but a bit broken',
+        ),
+    ],
+)
+def test_errors(response_body, status, exc_cls):
+    api = PlayerAPI(FakeSession(response_body, status), 'http://fake-host/api')
+    with raises(exc_cls):
+        asyncio.run(
+            api.get_recent_matches(
+                Game.mw_mp, PlayerID('test_user', '1234', 'battle')
+            )
+        )
+
+
+def test_gets_matches_played():
+    session = FakeSession(
+        json.dumps(
+            {
+                'status': 'success',
+                'data': {
+                    'lifetime': {
+                        'all': {'properties': {'totalGamesPlayed': 42.0}}
+                    }
+                },
+            }
+        )
+    )
+    api = PlayerAPI(session, 'http://fake-host/api')
+
+    matches_played = asyncio.run(
+        api.get_matches_played(
+            Game.mw_mp, PlayerID('battle', 'test_user', '1234')
+        )
+    )
+
+    assert matches_played == 42
+    assert session.requested_urls == [
+        'http://fake-host/api'
+        '/platform/battle/gamer/test_user%231234/profile/type/mp'
+    ]
@@ -0,0 +1,89 @@
+import json
+
+from pytest import raises
+from requests import Session
+
+from codstattracker.api.exceptions import RateLimitedError
+from codstattracker.api.jsonlib import stdlib_loads
+from codstattracker.api.models import Game, PlayerID
+from codstattracker.api.mycallofduty.mw import PlayerAPI
+from codstattracker.bench.__main__ import run_benchmark
+from codstattracker.bench.decoding import measure_decode_share
+from codstattracker.bench.logs import measure_compression
+from codstattracker.bench.memory import create_database, measure_load_memory
+from codstattracker.bench.payloads import PayloadFactory
+from codstattracker.bench.saving import create_matches, measure_save_conversion
+from codstattracker.bench.server import ReplayServer
+from codstattracker.logging import create_empty_logger
+
+PLAYER_ID = PlayerID('battle', 'p1', '1')
+
+
+def test_replay_server_serves_matches():
+    with ReplayServer(matches_per_page=5) as server:
+        api = PlayerAPI(Session(), server.url, logger=create_empty_logger())
+        matches = api.get_recent_matches(Game.mw_wz, PLAYER_ID)
+
+    assert len(matches) == 5
+    assert len({match.id for match in matches}) == 5
+    assert all(match.br_stats is not None for match in matches)
+
+
+def test_replay_server_throttles_requests():
+    with ReplayServer(rate_limit=1) as server:
+        api = PlayerAPI(Session(), server.url, logger=create_empty_logger())
+        api.get_recent_matches(Game.mw_mp, PLAYER_ID)
+        with raises(RateLimitedError):
+            api.get_recent_matches(Game.mw_mp, PLAYER_ID)
+
+    assert server.stats.throttled == 1
+
+
+def test_benchmark_polls_every_player(tmp_path):
+    with ReplayServer(matches_per_page=3) as server:
+        result = run_benchmark(
+            server, f'sqlite:///{tmp_path / "bench.db"}', 4, max_in_flight=2
+        )
+
+    assert result.matches == 12
+    assert result.server_stats.requests == 4
+    assert result.players_per_second > 0
+
+
+def test_decoding_benchmark_measures_decode_share():
+    content = json.dumps(
+        PayloadFactory().matches_page('bench#1', 'mp', 1, 5)
+    ).encode()
+
+    total, decode = measure_decode_share(content, stdlib_loads, repeat=1)
+
+    assert 0 < decode < total
+
+
+def test_compression_benchmark_dedupes_sources():
+    page = PayloadFactory().matches_page('bench#1', 'wz', 1, 5)
+    sources = page['data']['matches'] * 2
+
+    result = measure_compression(sources, 'gzip')
+
+    assert (result.sources, result.blobs) == (10, 5)
+    assert result.ratio > 2
+
+
+def test_saving_benchmark_measures_conversion():
+    matches = create_matches(3, Game.mw_wz)
+
+    to_db, cached, walked = measure_save_conversion(matches, repeat=1)
+
+    assert len(matches) == 3
+    assert 0 < cached < to_db
+    assert walked > 0
+
+
+def test_memory_benchmark_measures_loaded_matches():
+    engine = create_database(10, Game.mw_wz)
+
+    loaded, orm = measure_load_memory(engine, Game.mw_wz)
+
+    assert loaded.matches == orm.matches == 10
+    assert 0 < loaded.size < orm.size
@@ -0,0 +1,114 @@
+from collections import namedtuple
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from unittest.mock import Mock, call
+
+from pytest import fixture, raises
+
+from codstattracker.api.exceptions import FetchError
+from codstattracker.api.interfaces import PlayerAPI
+from codstattracker.api.models import Game, PlayerID
+from codstattracker.logging import create_empty_logger
+from codstattracker.poller.backfill import Backfiller
+from codstattracker.storage.interfaces import BackfillStorage
+
+GAME = Game.mw_mp
+PLAYER_ID = PlayerID('battle', 'p1', '1')
+NOW = datetime(2020, 11, 10, tzinfo=timezone.utc)
+SINCE = datetime(2020, 11, 1, tzinfo=timezone.utc)
+DAY = timedelta(days=1)
+
+FakeMatch = namedtuple('FakeMatch', 'id start')
+
+
+@fixture
+def storage():
+    storage = Mock(BackfillStorage, name='storage')
+    storage.save_match_series.side_effect = lambda player_id, matches: len(
+        matches
+    )
+    cursors = {}
+    storage.load_backfill_cursor.side_effect = (
+        lambda game, player_id: cursors.get((game, player_id))
+    )
+    storage.save_backfill_cursor.side_effect = (
+        lambda game, player_id, cursor: cursors.update(
+            {(game, player_id): cursor}
+        )
+    )
+    return storage
+
+
+@fixture
+def storage_ctx(storage):
+    @contextmanager
+    def ctx():
+        yield storage
+
+    return ctx
+
+
+@fixture
+def api():
+    return Mock(PlayerAPI, name='api')
+
+
+def create_backfiller(storage_ctx, api, window=3 * DAY, page_size=2):
+    return Backfiller(
+        storage_ctx,
+        api,
+        create_empty_logger(),
+        since=SINCE,
+        window=window,
+        page_size=page_size,
+        clock=lambda: NOW,
+    )
+
+
+def test_walks_history_backwards_by_windows(storage_ctx, api, storage):
+    api.iter_recent_matches.return_value = []
+
+    create_backfiller(storage_ctx, api).backfill(GAME, PLAYER_ID)
+
+    assert api.iter_recent_matches.mock_calls == [
+        call(GAME, PLAYER_ID, from_=NOW - 3 * DAY, until=NOW),
+        call(GAME, PLAYER_ID, from_=NOW - 6 * DAY, until=NOW - 3 * DAY),
+        call(GAME, PLAYER_ID, from_=SINCE, until=NOW - 6 * DAY),
+    ]
+    assert storage.load_backfill_cursor(GAME, PLAYER_ID) == SINCE
+
+
+def test_truncated_window_continues_from_oldest_match(
+    storage_ctx, api, storage
+):
+    full_page = [
+        FakeMatch('m2', NOW - DAY),
+        FakeMatch('m1', NOW - 2 * DAY),
+    ]
+    api.iter_recent_matches.side_effect = [full_page, []]
+
+    create_backfiller(storage_ctx, api, window=9 * DAY).backfill(
+        GAME, PLAYER_ID
+    )
+
+    assert api.iter_recent_matches.mock_calls == [
+        call(GAME, PLAYER_ID, from_=SINCE, until=NOW),
+        call(GAME, PLAYER_ID, from_=SINCE, until=NOW - 2 * DAY),
+    ]
+    assert storage.save_match_series.mock_calls == [call(PLAYER_ID, full_page)]
+
+
+def test_resumes_from_checkpoint(storage_ctx, api, storage):
+    api.iter_recent_matches.side_effect = [[], FetchError()]
+    backfiller = create_backfiller(storage_ctx, api)
+    with raises(FetchError):
+        backfiller.backfill(GAME, PLAYER_ID)
+
+    api.iter_recent_matches.reset_mock(side_effect=True)
+    api.iter_recent_matches.return_value = []
+    backfiller.backfill(GAME, PLAYER_ID)
+
+    assert api.iter_recent_matches.mock_calls[0] == call(
+        GAME, PLAYER_ID, from_=NOW - 6 * DAY, until=NOW - 3 * DAY
+    )
+    assert storage.load_backfill_cursor(GAME, PLAYER_ID) == SINCE
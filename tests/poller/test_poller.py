@@ -0,0 +1,399 @@
+import asyncio
+import threading
+from collections import namedtuple
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from unittest.mock import Mock, call
+
+from prometheus_client import REGISTRY
+from pytest import fixture, raises
+
+from codstattracker.api.exceptions import (
+    FetchError,
+    PlayerNotFoundError,
+    UnrecoverableFetchError,
+)
+from codstattracker.api.interfaces import AsyncPlayerAPI, PlayerAPI
+from codstattracker.api.models import Game, PlayerID
+from codstattracker.logging import create_empty_logger
+from codstattracker.poller.impl import AsyncPoller, Poller
+from codstattracker.poller.leases import LeaseCoordinator
+from codstattracker.poller.resilience import CircuitBreaker, RetryPolicy
+from codstattracker.poller.scheduler import AdaptiveScheduler
+from codstattracker.storage.interfaces import (
+    LeaseStorage,
+    LoadStorage,
+    SaveStorage,
+)
+
+PLAYERS = [
+    (Game.mw_mp, PlayerID('battle', 'p1', '1')),
+    (Game.mw_mp, PlayerID('battle', 'p2', '2')),
+    (Game.mw_wz, PlayerID('battle', 'p3', '3')),
+]
+
+FakeMatch = namedtuple('FakeMatch', 'id start')
+
+
+def fake_matches(player_id, start=datetime(2020, 11, 1, tzinfo=timezone.utc)):
+    return [FakeMatch(f'{player_id.nickname}-match', start)]
+
+
+@fixture
+def api():
+    return Mock(PlayerAPI, name='api')
+
+
+@fixture
+def save_storage():
+    save_storage = Mock(SaveStorage, name='save_storage')
+    saved_ids = set()
+
+    def save_match_series(player_id, matches):
+        new_ids = {match.id for match in matches} - saved_ids
+        saved_ids.update(new_ids)
+        return len(new_ids)
+
+    save_storage.save_match_series.side_effect = save_match_series
+    return save_storage
+
+
+@fixture
+def storage_ctx(save_storage):
+    @contextmanager
+    def ctx():
+        yield save_storage
+
+    return ctx
+
+
+def create_poller(storage_ctx, api, **kwargs):
+    return Poller(storage_ctx, api, PLAYERS, create_empty_logger(), **kwargs)
+
+
+def test_saves_fetched_matches(storage_ctx, api, save_storage):
+    api.get_recent_matches.side_effect = (
+        lambda game, player_id, **kwargs: fake_matches(player_id)
+    )
+
+    create_poller(storage_ctx, api).regular_pool()
+
+    assert len(save_storage.save_match_series.mock_calls) == len(PLAYERS)
+    save_storage.save_match_series.assert_has_calls(
+        [call(player_id, fake_matches(player_id)) for _, player_id in PLAYERS],
+        any_order=True,
+    )
+
+
+def test_fetch_error_skips_only_failed_player(storage_ctx, api, save_storage):
+    def get_recent_matches(game, player_id, **kwargs):
+        if player_id.nickname == 'p2':
+            raise FetchError
+        return fake_matches(player_id)
+
+    api.get_recent_matches.side_effect = get_recent_matches
+
+    create_poller(storage_ctx, api, max_in_flight=3).regular_pool()
+
+    assert len(save_storage.save_match_series.mock_calls) == 2
+    save_storage.save_match_series.assert_has_calls(
+        [
+            call(PLAYERS[0][1], fake_matches(PLAYERS[0][1])),
+            call(PLAYERS[2][1], fake_matches(PLAYERS[2][1])),
+        ],
+        any_order=True,
+    )
+
+
+def test_unrecoverable_error_stops_polling(storage_ctx, api, save_storage):
+    api.get_recent_matches.side_effect = UnrecoverableFetchError
+
+    with raises(UnrecoverableFetchError):
+        create_poller(storage_ctx, api).regular_pool()
+
+    assert save_storage.save_match_series.mock_calls == []
+
+
+def test_fetches_players_concurrently(storage_ctx, api, save_storage):
+    # Every request waits for all others, so sequential polling would break
+    # the barrier
+    barrier = threading.Barrier(len(PLAYERS), timeout=5)
+
+    def get_recent_matches(game, player_id, **kwargs):
+        barrier.wait()
+        return fake_matches(player_id)
+
+    api.get_recent_matches.side_effect = get_recent_matches
+
+    create_poller(storage_ctx, api, max_in_flight=len(PLAYERS)).regular_pool()
+
+    assert len(save_storage.save_match_series.mock_calls) == len(PLAYERS)
+
+
+def test_saves_while_fetching(storage_ctx, api, save_storage):
+    events = []
+
+    def get_recent_matches(game, player_id, **kwargs):
+        events.append(('fetch', player_id.nickname))
+        return fake_matches(player_id)
+
+    api.get_recent_matches.side_effect = get_recent_matches
+
+    def save_match_series(player_id, matches):
+        events.append(('save', player_id.nickname))
+        return len(matches)
+
+    save_storage.save_match_series.side_effect = save_match_series
+
+    create_poller(storage_ctx, api, save_queue_size=0).regular_pool()
+
+    assert events == [
+        ('fetch', 'p1'),
+        ('save', 'p1'),
+        ('fetch', 'p2'),
+        ('save', 'p2'),
+        ('fetch', 'p3'),
+        ('save', 'p3'),
+    ]
+
+
+def test_async_poller_limits_in_flight_requests(storage_ctx, save_storage):
+    in_flight = 0
+    max_seen_in_flight = 0
+
+    class API(AsyncPlayerAPI):
+        async def get_recent_matches(self, game, player_id, **kwargs):
+            nonlocal in_flight, max_seen_in_flight
+            in_flight += 1
+            max_seen_in_flight = max(max_seen_in_flight, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            if player_id.nickname == 'p2':
+                raise FetchError
+            return fake_matches(player_id)
+
+    poller = AsyncPoller(
+        storage_ctx, API(), PLAYERS, create_empty_logger(), max_in_flight=2
+    )
+    asyncio.run(poller.regular_pool())
+
+    assert max_seen_in_flight == 2
+    assert len(save_storage.save_match_series.mock_calls) == 2
+    save_storage.save_match_series.assert_has_calls(
+        [
+            call(PLAYERS[0][1], fake_matches(PLAYERS[0][1])),
+            call(PLAYERS[2][1], fake_matches(PLAYERS[2][1])),
+        ],
+        any_order=True,
+    )
+
+
+def test_incremental_polling_uses_high_water_mark(
+    storage_ctx, api, save_storage
+):
+    game, player_id = PLAYERS[0]
+    stored_start = datetime(2020, 11, 1, tzinfo=timezone.utc)
+    new_start = datetime(2020, 11, 2, tzinfo=timezone.utc)
+    load_storage = Mock(LoadStorage, name='load_storage')
+    load_storage.load_last_match_starts.return_value = {
+        (game, player_id): stored_start
+    }
+
+    @contextmanager
+    def load_storage_ctx():
+        yield load_storage
+
+    api.get_recent_matches.return_value = fake_matches(player_id, new_start)
+    poller = Poller(
+        storage_ctx,
+        api,
+        [(game, player_id)],
+        create_empty_logger(),
+        load_storage_ctx=load_storage_ctx,
+    )
+
+    poller.regular_pool()
+    poller.regular_pool()
+
+    assert api.get_recent_matches.mock_calls == [
+        call(game, player_id, from_=stored_start),
+        call(game, player_id, from_=new_start),
+    ]
+    assert len(load_storage.load_last_match_starts.mock_calls) == 1
+
+
+def test_daemon_reschedules_players_by_activity(storage_ctx, api):
+    active, idle = PLAYERS[0], PLAYERS[1]
+    now = 0.0
+    scheduler = AdaptiveScheduler(
+        [active, idle],
+        min_interval=10,
+        max_interval=1000,
+        initial_interval=100,
+        clock=lambda: now,
+    )
+    poller = Poller(storage_ctx, api, [active, idle], create_empty_logger())
+    stop = threading.Event()
+
+    def get_recent_matches(game, player_id, **kwargs):
+        if player_id is idle[1]:
+            return []
+        # Every poll of the active player brings a brand new match
+        stop.set()
+        return fake_matches(
+            player_id, datetime.fromtimestamp(now, timezone.utc)
+        )
+
+    api.get_recent_matches.side_effect = get_recent_matches
+    poller.run_forever(scheduler, stop)
+
+    assert scheduler.interval(active) == 50
+    assert scheduler.interval(idle) == 200
+
+
+def test_retries_recoverable_errors(storage_ctx, api, save_storage):
+    game, player_id = PLAYERS[0]
+    api.get_recent_matches.side_effect = [
+        FetchError(),
+        FetchError(),
+        fake_matches(player_id),
+    ]
+    poller = Poller(
+        storage_ctx,
+        api,
+        [(game, player_id)],
+        create_empty_logger(),
+        retry_policy=RetryPolicy(max_attempts=3, base_delay=0),
+    )
+
+    poller.regular_pool()
+
+    assert len(api.get_recent_matches.mock_calls) == 3
+    assert save_storage.save_match_series.mock_calls == [
+        call(player_id, fake_matches(player_id))
+    ]
+
+
+def test_circuit_breaker_skips_failing_player(storage_ctx, api):
+    game, player_id = PLAYERS[0]
+    api.get_recent_matches.side_effect = PlayerNotFoundError
+    poller = Poller(
+        storage_ctx,
+        api,
+        [(game, player_id)],
+        create_empty_logger(),
+        retry_policy=RetryPolicy(max_attempts=3, base_delay=0),
+        circuit_breaker=CircuitBreaker(failure_threshold=2),
+    )
+
+    for _ in range(4):
+        poller.regular_pool()
+
+    assert len(api.get_recent_matches.mock_calls) == 2
+
+
+def test_polls_only_leased_players(storage_ctx, api, save_storage):
+    lease_storage = Mock(LeaseStorage, name='lease_storage')
+    lease_storage.claim_leases.return_value = [PLAYERS[1]]
+
+    @contextmanager
+    def lease_storage_ctx():
+        yield lease_storage
+
+    api.get_recent_matches.side_effect = (
+        lambda game, player_id, **kwargs: fake_matches(player_id)
+    )
+    coordinator = LeaseCoordinator(
+        lease_storage_ctx, 'poller-1', ttl=60, logger=create_empty_logger()
+    )
+    poller = create_poller(storage_ctx, api, lease_coordinator=coordinator)
+
+    poller.regular_pool()
+    # Leases are still fresh, so they are not claimed again
+    poller.regular_pool()
+
+    assert len(lease_storage.claim_leases.mock_calls) == 1
+    assert (
+        save_storage.save_match_series.mock_calls
+        == [call(PLAYERS[1][1], fake_matches(PLAYERS[1][1]))] * 2
+    )
+
+
+def test_collects_metrics(storage_ctx, api):
+    def get_recent_matches(game, player_id, **kwargs):
+        if player_id.nickname == 'p2':
+            raise FetchError
+        return fake_matches(player_id)
+
+    def sample(name, **labels):
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    api.get_recent_matches.side_effect = get_recent_matches
+    ingested = sample('cst_matches_ingested_total', game='mw:mp')
+    errors = sample(
+        'cst_fetch_errors_total',
+        game='mw:mp',
+        player='battle:p2#2',
+        error='FetchError',
+    )
+    saves = sample('cst_storage_save_duration_seconds_count')
+
+    create_poller(storage_ctx, api).regular_pool()
+
+    assert sample('cst_matches_ingested_total', game='mw:mp') == ingested + 1
+    assert sample(
+        'cst_fetch_errors_total',
+        game='mw:mp',
+        player='battle:p2#2',
+        error='FetchError',
+    ) == (errors + 1)
+    assert sample('cst_storage_save_duration_seconds_count') == saves + 2
+
+
+def test_counts_only_saved_matches_as_ingested(storage_ctx, api):
+    def sample():
+        return (
+            REGISTRY.get_sample_value(
+                'cst_matches_ingested_total', {'game': 'mw:mp'}
+            )
+            or 0
+        )
+
+    api.get_recent_matches.side_effect = (
+        lambda game, player_id, **kwargs: fake_matches(player_id)
+    )
+    ingested = sample()
+    poller = create_poller(storage_ctx, api)
+
+    poller.regular_pool()
+    poller.regular_pool()
+
+    # Two MP players, matches of the second pass are stored already
+    assert sample() == ingested + 2
+
+
+def test_profile_precheck_skips_unchanged_players(storage_ctx, api):
+    old_match = FakeMatch('old', datetime(2020, 11, 1, tzinfo=timezone.utc))
+    new_match = FakeMatch('new', datetime(2020, 11, 2, tzinfo=timezone.utc))
+    api.get_matches_played.side_effect = [10, 10, 11, 11, 11]
+    api.get_recent_matches.side_effect = [
+        [old_match],
+        # History lags behind the changed counter
+        [old_match],
+        [old_match, new_match],
+    ]
+    poller = Poller(
+        storage_ctx,
+        api,
+        PLAYERS[:1],
+        create_empty_logger(),
+        precheck_profile=True,
+    )
+
+    fetched = []
+    for _ in range(5):
+        calls_before = api.get_recent_matches.call_count
+        poller.regular_pool()
+        fetched.append(api.get_recent_matches.call_count > calls_before)
+
+    assert fetched == [True, False, True, True, False]
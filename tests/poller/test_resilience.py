@@ -0,0 +1,69 @@
+from pytest import mark
+
+from codstattracker.api.exceptions import (
+    FetchError,
+    PlayerNotFoundError,
+    RateLimitedError,
+)
+from codstattracker.poller.__main__ import _resilience_kwargs
+from codstattracker.poller.resilience import CircuitBreaker, RetryPolicy
+from codstattracker.poller.settings import Settings
+
+
+@mark.parametrize(
+    'attempt, exc, delay',
+    [
+        (1, FetchError(), 1.0),
+        (2, FetchError(), 2.0),
+        (3, FetchError(), 3.0),
+        (4, FetchError(), None),
+        (1, PlayerNotFoundError(), None),
+        (1, RateLimitedError(retry_after=20), 20),
+    ],
+)
+def test_retry_policy_delays(attempt, exc, delay):
+    policy = RetryPolicy(
+        max_attempts=4, base_delay=1, max_delay=3, jitter=lambda: 1.0
+    )
+    assert policy.delay(attempt, exc) == delay
+
+
+def test_retry_policy_jitters_delay():
+    policy = RetryPolicy(base_delay=10, jitter=lambda: 0.25)
+    assert policy.delay(1, FetchError()) == 2.5
+
+
+def test_circuit_breaker_opens_and_recovers():
+    now = 0.0
+    breaker = CircuitBreaker(
+        failure_threshold=2, cooldown=100, clock=lambda: now
+    )
+
+    assert not breaker.record_failure('a')
+    assert breaker.allows('a')
+    assert breaker.record_failure('a')
+    assert not breaker.allows('a')
+    assert breaker.allows('b')
+
+    now = 100
+    assert breaker.allows('a')
+    # Trial failure opens circuit right away
+    assert breaker.record_failure('a')
+    assert not breaker.allows('a')
+
+    now = 200
+    breaker.record_success('a')
+    assert not breaker.record_failure('a')
+
+
+@mark.parametrize('daemon', [False, True])
+def test_circuit_breaker_is_used_by_daemon_only(daemon):
+    settings = Settings(
+        db={'uri': 'sqlite://', 'save_matches_log': False},
+        api={'auth_cookie': 'cookie'},
+        players_to_poll=[],
+    )
+
+    kwargs = _resilience_kwargs(settings, daemon)
+
+    assert isinstance(kwargs['circuit_breaker'], CircuitBreaker) is daemon
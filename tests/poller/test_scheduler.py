@@ -0,0 +1,56 @@
+from pytest import fixture
+
+from codstattracker.poller.scheduler import AdaptiveScheduler
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@fixture
+def clock():
+    return Clock()
+
+
+@fixture
+def scheduler(clock):
+    return AdaptiveScheduler(
+        ['a', 'b'],
+        min_interval=10,
+        max_interval=80,
+        initial_interval=20,
+        clock=clock,
+    )
+
+
+def test_all_keys_due_at_start(scheduler):
+    assert scheduler.pop_due() == ['a', 'b']
+    assert scheduler.pop_due() == []
+    assert scheduler.next_due_in() is None
+
+
+def test_active_key_polled_more_often(scheduler, clock):
+    scheduler.pop_due()
+    assert scheduler.report('a', has_new_data=True) == 10
+    assert scheduler.report('b', has_new_data=False) == 40
+
+    clock.now = 10
+    assert scheduler.pop_due() == ['a']
+    assert scheduler.next_due_in() == 30
+
+    clock.now = 40
+    assert scheduler.pop_due() == ['b']
+
+
+def test_intervals_clamped(scheduler):
+    scheduler.pop_due()
+    for _ in range(5):
+        scheduler.report('a', has_new_data=True)
+        scheduler.report('b', has_new_data=False)
+
+    assert scheduler.interval('a') == 10
+    assert scheduler.interval('b') == 80
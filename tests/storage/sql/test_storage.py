@@ -1,15 +1,31 @@
 import copy
-from datetime import datetime, timedelta
+import json
+from datetime import datetime, timedelta, timezone
 
 from pytest import fixture, mark
 
-from codstattracker.api.models import Game, PlayerID
+from codstattracker.api.models import (
+    BattleRoyaleStats,
+    Game,
+    MatchStats,
+    PlayerID,
+    PlayerMatch,
+    WeaponStats,
+)
 from codstattracker.storage.sql.models import (
+    LogBlobModel,
     PlayerMatchLogModel,
     PlayerMatchModel,
+    PlayerMatchRequestModel,
     PlayerModel,
+    WeaponStatsModel,
+)
+from codstattracker.storage.sql.storages import (
+    BackfillStorage,
+    LeaseStorage,
+    LoadStorage,
+    SaveStorage,
 )
-from codstattracker.storage.sql.storages import LoadStorage, SaveStorage
 from tests.storage.sql.utils import random_match_model
 
 PLAYER_1_ID = PlayerID(platform='battle', nickname='p1', id='1234')
@@ -163,6 +179,32 @@ def test_saves_match_stats(matches, save_storage, load_storage):
     assert [match.id for match in wz_load_result] == ['new_wz_match']
 
 
+def test_loads_plain_models(save_storage, load_storage):
+    match = random_match_model('wz_match', Game.mw_wz, PLAYER_1_ID)
+    match.weapon_stats = [
+        WeaponStatsModel('ar', 10, 2, 1, 30, 3),
+        WeaponStatsModel('smg', 20, 4, 2, 50, 6),
+    ]
+    save_storage.save_match_series(PLAYER_1_ID, [match])
+
+    (loaded,) = load_storage.load_last_matches(Game.mw_wz, PLAYER_1_ID)
+
+    assert type(loaded) is PlayerMatch
+    assert (loaded.id, loaded.start, loaded.map) == (
+        match.id,
+        match.start,
+        match.map,
+    )
+    assert loaded.stats.as_dict_flat() == match.as_dict_flat(MatchStats)
+    assert loaded.weapon_stats == [
+        WeaponStats('ar', 10, 2, 1, 30, 3),
+        WeaponStats('smg', 20, 4, 2, 50, 6),
+    ]
+    assert loaded.br_stats == BattleRoyaleStats(
+        **match.br_stats.as_dict_flat(BattleRoyaleStats)
+    )
+
+
 def test_repeated_save_successful(save_storage, session_ctx):
     matches = [
         random_match_model('some_id_1', Game.mw_mp, PLAYER_1_ID),
@@ -183,6 +225,17 @@ def test_repeated_save_successful(save_storage, session_ctx):
         s.commit()
 
 
+def test_save_returns_number_of_new_matches(save_storage):
+    matches = [
+        random_match_model('some_id_1', Game.mw_mp, PLAYER_1_ID),
+        random_match_model('some_id_2', Game.mw_mp, PLAYER_1_ID),
+    ]
+
+    assert save_storage.save_match_series(PLAYER_1_ID, matches[:1]) == 1
+    assert save_storage.save_match_series(PLAYER_1_ID, matches) == 1
+    assert save_storage.save_match_series(PLAYER_1_ID, matches) == 0
+
+
 def test_saves_matches_logs(session):
     tracked_match = random_match_model('tracked', Game.mw_mp, PLAYER_1_ID)
     # Assigning instance attribute is enough to satisfy
@@ -200,4 +253,162 @@ def test_saves_matches_logs(session):
     log_model = session.query(PlayerMatchLogModel).one()
     assert log_model.match_id == 'tracked'
     assert log_model.source == {'test': 'data'}
-    assert log_model.meta == {'test': 'meta'}
+    assert log_model.request.meta == {'test': 'meta'}
+
+
+def test_matches_logs_share_request_meta(session):
+    meta = {'url': 'http://fake-host/api'}
+    tracked_matches = []
+    for idx in range(3):
+        match = random_match_model(f'tracked-{idx}', Game.mw_mp, PLAYER_1_ID)
+        match.get_entity_info = lambda idx=idx: ({'idx': idx}, meta)
+        tracked_matches.append(match)
+
+    save_storage = SaveStorage(session, save_matches_logs=True)
+    save_storage.save_match_series(PLAYER_1_ID, tracked_matches[:1])
+    save_storage.save_match_series(PLAYER_1_ID, tracked_matches)
+    session.commit()
+
+    log_models = (
+        session.query(PlayerMatchLogModel)
+        .order_by(PlayerMatchLogModel.match_id)
+        .all()
+    )
+    assert [log_model.source for log_model in log_models] == [
+        {'idx': 0},
+        {'idx': 1},
+        {'idx': 2},
+    ]
+    assert session.query(PlayerMatchRequestModel).count() == 2
+    assert log_models[1].request is log_models[2].request
+    assert log_models[1].request.meta == meta
+
+
+def test_load_last_match_starts(matches, load_storage):
+    assert load_storage.load_last_match_starts() == {
+        (Game.mw_mp, PLAYER_1_ID): datetime(
+            year=2010, month=1, day=1, hour=12, minute=40, tzinfo=timezone.utc
+        ),
+        (Game.mw_mp, PlayerID(platform='ps', nickname='p2', id='4321')): (
+            datetime(
+                year=2010,
+                month=1,
+                day=1,
+                hour=12,
+                minute=40,
+                tzinfo=timezone.utc,
+            )
+        ),
+    }
+
+
+LEASED_PLAYERS = [
+    (Game.mw_mp, PlayerID('battle', f'p{idx}', str(idx))) for idx in range(4)
+]
+LEASE_TTL = timedelta(minutes=10)
+NOW = datetime(2020, 11, 1)
+
+
+def claim_leases(session_ctx, owner, now=NOW):
+    with session_ctx() as s:
+        leased = LeaseStorage(s, clock=lambda: now).claim_leases(
+            owner, LEASED_PLAYERS, LEASE_TTL
+        )
+        s.commit()
+    return leased
+
+
+def test_leases_rebalanced_between_pollers(session_ctx):
+    assert claim_leases(session_ctx, 'a') == LEASED_PLAYERS
+    # Every player is leased already, but "b" is known as live since now
+    assert claim_leases(session_ctx, 'b') == []
+
+    assert claim_leases(session_ctx, 'a') == LEASED_PLAYERS[:2]
+    assert claim_leases(session_ctx, 'b') == LEASED_PLAYERS[2:]
+
+
+def test_expired_leases_taken_over(session_ctx):
+    claim_leases(session_ctx, 'a')
+    claim_leases(session_ctx, 'b')
+
+    later = NOW + LEASE_TTL + timedelta(seconds=1)
+    assert claim_leases(session_ctx, 'b', later) == LEASED_PLAYERS
+
+
+def test_released_leases_taken_over(session_ctx):
+    claim_leases(session_ctx, 'a')
+    with session_ctx() as s:
+        LeaseStorage(s).release_leases('a')
+        s.commit()
+
+    assert claim_leases(session_ctx, 'b') == LEASED_PLAYERS
+
+
+def test_backfill_cursor_saved(session_ctx):
+    cursor = datetime(2020, 11, 1, 12, tzinfo=timezone.utc)
+    with session_ctx() as s:
+        storage = BackfillStorage(s)
+        assert storage.load_backfill_cursor(Game.mw_mp, PLAYER_1_ID) is None
+        storage.save_backfill_cursor(Game.mw_mp, PLAYER_1_ID, cursor)
+        storage.save_backfill_cursor(
+            Game.mw_mp, PLAYER_1_ID, cursor - timedelta(days=1)
+        )
+        s.commit()
+
+    with session_ctx() as s:
+        assert BackfillStorage(s).load_backfill_cursor(
+            Game.mw_mp, PLAYER_1_ID
+        ) == cursor - timedelta(days=1)
+
+
+@mark.parametrize('codec', ['gzip', 'zstd'])
+def test_saves_compressed_matches_logs(session, codec):
+    source = {'test': 'data' * 100}
+    tracked_matches = []
+    for idx in range(2):
+        match = random_match_model(f'tracked-{idx}', Game.mw_mp, PLAYER_1_ID)
+        match.get_entity_info = lambda: (source, {'test': 'meta'})
+        tracked_matches.append(match)
+
+    save_storage = SaveStorage(
+        session, save_matches_logs=True, logs_codec=codec
+    )
+    save_storage.save_match_series(PLAYER_1_ID, tracked_matches)
+    session.commit()
+
+    log_models = session.query(PlayerMatchLogModel).all()
+    assert [log_model.source for log_model in log_models] == [source] * 2
+    assert all(log_model.plain_source is None for log_model in log_models)
+    blob = session.query(LogBlobModel).one()
+    assert blob.codec == codec
+    assert len(blob.data) < len(json.dumps(source))
+
+
+def test_migrates_matches_logs(session):
+    for idx in range(3):
+        match = random_match_model(f'tracked-{idx}', Game.mw_mp, PLAYER_1_ID)
+        match.get_entity_info = lambda idx=idx: ({'idx': idx}, {})
+        SaveStorage(session, save_matches_logs=True).save_match_series(
+            PLAYER_1_ID, [match]
+        )
+    session.commit()
+    storage = SaveStorage(session, logs_codec='gzip')
+
+    assert storage.compress_matches_logs(batch_size=2) == 2
+    assert storage.compress_matches_logs(batch_size=2) == 1
+    assert storage.compress_matches_logs(batch_size=2) == 0
+    session.commit()
+    assert session.query(LogBlobModel).count() == 3
+    assert (
+        session.query(PlayerMatchLogModel)
+        .filter(PlayerMatchLogModel.plain_source.isnot(None))
+        .count()
+        == 0
+    )
+
+    assert [
+        log_model.source
+        for log_model in session.query(PlayerMatchLogModel).order_by(
+            PlayerMatchLogModel.match_id
+        )
+    ] == [{'idx': 0}, {'idx': 1}, {'idx': 2}]
@@ -0,0 +1,21 @@
+from unittest.mock import patch
+
+from codstattracker import metrics
+
+
+def test_exposed_writes_textfile(tmp_path):
+    textfile = tmp_path / 'cst.prom'
+    metrics.MATCHES_INGESTED.labels('mw:mp').inc(0)
+
+    with metrics.exposed(textfile=textfile, textfile_interval=60):
+        pass
+
+    assert 'cst_matches_ingested_total{game="mw:mp"}' in textfile.read_text()
+
+
+def test_exposed_serves_on_local_host_by_default():
+    with patch.object(metrics, 'start_http_server') as start_http_server:
+        with metrics.exposed(port=9100):
+            pass
+
+    start_http_server.assert_called_once_with(9100, '127.0.0.1')